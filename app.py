@@ -2,45 +2,94 @@ from flask import Flask
 from backend_celery.celery_factory import celery_init_app
 from config import LocalDevelopment
 from models import db, User, Role
-from flask_security import Security, SQLAlchemyUserDatastore, auth_required
+from flask_security import Security, auth_required
 from flask_caching import Cache
+from services.hashing import PasswordHasher
+from services.auth_cache import PrincipalCache, CachedUserDatastore
+from services.versioning import VersionStamps
+from services.events import create_broker
+from services.challenges import ChallengeCatalog
+from services.leaderboard import create_leaderboards
+from services.metrics import metrics
+import redis
+from init_data import init_db_command, backfill_allowance_schedules_command, rebuild_rollups_command
 
 def createApp():
+    """Full web app: extensions, security, API resources and routes"""
     app = Flask(__name__, template_folder='frontend', static_folder='frontend', static_url_path='/static')
     app.config.from_object(LocalDevelopment)
     
     # Initialize extensions
     db.init_app(app)
+    metrics.init_app(app)  # Request latency, cache hit/miss, /metrics
     cache = Cache(app)
     app.cache = cache  # Make cache available to resources
+    app.versions = VersionStamps(cache)  # ETag stamps, bumped on writes
+    app.events = create_broker(app)  # Live deltas for the /events stream
+    app.redis = redis.Redis.from_url(app.config['COORDINATION_REDIS_URL'])  # Rate limits
+    app.challenges = ChallengeCatalog(app.versions)  # Per-process active challenge list
+    app.leaderboards = create_leaderboards(app)  # Redis sorted-set rankings
     
     # Initialize Flask-Security
-    datastore = SQLAlchemyUserDatastore(db, User, Role)
+    app.principals = PrincipalCache(cache, app.config.get('AUTH_PRINCIPAL_CACHE_TIMEOUT', 60))
+    datastore = CachedUserDatastore(db, User, Role, app.principals)
     app.security = Security(app, datastore=datastore, register_blueprint=False)
+    app.hasher = PasswordHasher(app)  # Off-thread bcrypt for login/register
     
-    # Create app context
-    app.app_context().push()
+    # Celery is needed here only so routes can .delay() tasks
+    celery_init_app(app)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(backfill_allowance_schedules_command)
+    app.cli.add_command(rebuild_rollups_command)
     
-    # Register API routes AFTER app context is created
-    from resources.child_resources import child_api
-    from resources.parent_resources import parent_api
-    from resources.admin_resources import admin_api
-    from resources.school_resources import school_api
-    from resources.teacher_resources import teacher_api
-    child_api.init_app(app)
-    parent_api.init_app(app)
-    admin_api.init_app(app)
-    school_api.init_app(app)
-    teacher_api.init_app(app)
+    # Resources and routes read current_app at import time
+    with app.app_context():
+        from resources.child_resources import child_api
+        from resources.parent_resources import parent_api
+        from resources.admin_resources import admin_api
+        from resources.school_resources import school_api
+        from resources.teacher_resources import teacher_api
+        child_api.init_app(app)
+        parent_api.init_app(app)
+        admin_api.init_app(app)
+        school_api.init_app(app)
+        teacher_api.init_app(app)
+        import routes
+        routes.register(app)
     
     return app
 
-# Create app instance
-app = createApp()
-celery_app = celery_init_app(app)
-# Import other modules that need app context
-import init_data
-import routes
-import backend_celery.celery_schedule
+def createCeleryApp():
+    """Minimal app for Celery workers and beat: config, DB and the task schedule"""
+    app = Flask(__name__)
+    app.config.from_object(LocalDevelopment)
+    db.init_app(app)
+    metrics.init_app(app)  # Task timings and counts
+    app.versions = VersionStamps(Cache(app))  # Tasks bump ETag stamps too
+    app.redis = redis.Redis.from_url(app.config['COORDINATION_REDIS_URL'])  # Task locks
+    app.events = create_broker(app)
+    app.leaderboards = create_leaderboards(app)  # Deletions mark boards for rebuild
+    celery_app = celery_init_app(app)
+    
+    with app.app_context():
+        import backend_celery.celery_schedule
+    
+    return celery_app
+
+_instances = {}
+
+def __getattr__(name):
+    """
+    Build `app` / `celery_app` on first access instead of at import, so
+    `celery -A app:celery_app` never pays for web setup and importing this
+    module has no side effects
+    """
+    factories = {'app': createApp, 'celery_app': createCeleryApp}
+    if name not in factories:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name not in _instances:
+        _instances[name] = factories[name]()
+    return _instances[name]
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    createApp().run(debug=True)
\ No newline at end of file
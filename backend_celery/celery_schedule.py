@@ -1,40 +1,50 @@
 from celery.schedules import crontab
 from flask import current_app as app
 from backend_celery.tasks import (
-    send_daily_spending_reminders, 
-    send_weekly_spending_reminders,
-    send_weekly_parent_summaries, 
-    process_recurring_allowances
+    dispatch_reminders,
+    process_recurring_allowances,
+    snapshot_daily_family_summaries,
+    detect_spending_alerts,
+    prune_exports
 )
 
 celery_app = app.extensions['celery']
 
 @celery_app.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
-    # Daily spending reminders at 6 PM
+    # Daily and weekly reminders and parent summaries, at each user's own
+    # reminder hour; the dispatcher spreads the batches over the hour
     sender.add_periodic_task(
-        crontab(hour=15, minute=37), 
-        send_daily_spending_reminders.s(), 
-        name='Send daily spending reminders to children'
+        crontab(minute=0), 
+        dispatch_reminders.s(), 
+        name='Dispatch reminders due this hour'
     )
     
-    # Weekly spending reminders on Sundays at 10 AM
+    # Daily check for recurring allowances at 9 AM
     sender.add_periodic_task(
-        crontab(hour=15, minute=50, day_of_week=2), 
-        send_weekly_spending_reminders.s(), 
-        name='Send weekly spending reminders to children'
+        crontab(hour=9, minute=0), 
+        process_recurring_allowances.s(), 
+        name='Process recurring allowances'
     )
     
-    # Weekly parent summaries on Sundays at 8 PM
+    # Yesterday's family summaries, stored for the parent report API
     sender.add_periodic_task(
-        crontab(hour=15, minute=50, day_of_week=2), 
-        send_weekly_parent_summaries.s(), 
-        name='Send weekly financial summaries to parents'
+        crontab(hour=0, minute=30), 
+        snapshot_daily_family_summaries.s(), 
+        name='Store daily family summaries'
     )
     
-    # Daily check for recurring allowances at 9 AM
+    # Low balance, unusual spending and milestones from yesterday's spending;
+    # digest users get them with their next digest
     sender.add_periodic_task(
-        crontab(hour=17, minute=48), 
-        process_recurring_allowances.s(), 
-        name='Process recurring allowances'
-    )
\ No newline at end of file
+        crontab(hour=8, minute=0), 
+        detect_spending_alerts.s(), 
+        name='Detect spending alerts'
+    )
+    
+    # XLSX ledger exports are kept for EXPORT_MAX_AGE_HOURS
+    sender.add_periodic_task(
+        crontab(minute=15), 
+        prune_exports.s(), 
+        name='Prune old ledger exports'
+    )
@@ -162,6 +162,10 @@ def get_base_template(content: str, title: str = "Kids Pocket Money Tracker") ->
 
 def get_daily_reminder_template(child_name: str, current_balance: float) -> str:
     """Template for daily spending reminders"""
+    return get_base_template(get_daily_reminder_fragment(child_name, current_balance), "Daily Spending Reminder")
+
+def get_daily_reminder_fragment(child_name: str, current_balance: float) -> str:
+    """Body of daily spending reminders, also used as a digest section"""
     content = f"""
     <h3>Hi {child_name}! <span class="emoji">👋</span></h3>
     <p>Don't forget to record your spending for today!</p>
@@ -184,10 +188,14 @@ def get_daily_reminder_template(child_name: str, current_balance: float) -> str:
     
     <p>Even small purchases matter! Keep up the great work with managing your money! <span class="emoji">🌟</span></p>
     """
-    return get_base_template(content, "Daily Spending Reminder")
+    return content
 
 def get_weekly_reminder_template(child_name: str, week_stats: dict, goals: list) -> str:
     """Template for weekly spending reminders with statistics"""
+    return get_base_template(get_weekly_reminder_fragment(child_name, week_stats, goals), "Weekly Financial Summary")
+
+def get_weekly_reminder_fragment(child_name: str, week_stats: dict, goals: list) -> str:
+    """Body of weekly spending reminders, also used as a digest section"""
     content = f"""
     <h3>Hi {child_name}! <span class="emoji">📊</span></h3>
     <p>Here's your weekly spending summary:</p>
@@ -250,7 +258,7 @@ def get_weekly_reminder_template(child_name: str, week_stats: dict, goals: list)
     <p>Keep up the excellent work managing your money! <span class="emoji">💪</span></p>
     """
     
-    return get_base_template(content, "Weekly Financial Summary")
+    return content
 
 def get_parent_summary_template(parent_name: str, children_data: list, family_stats: dict) -> str:
     """Template for weekly parent summaries"""
@@ -292,7 +300,7 @@ def get_parent_summary_template(parent_name: str, children_data: list, family_st
                     <div class="stat-label">Current Balance</div>
                 </div>
                 <div class="stat-card">
-                    <span class="stat-value spending">₹{child_data['week_spent']:.2f}</span>
+                    <span class="stat-value spending">₹{child_data['spent']:.2f}</span>
                     <div class="stat-label">Spent This Week</div>
                 </div>
             </div>
@@ -331,6 +339,10 @@ def get_parent_summary_template(parent_name: str, children_data: list, family_st
 
 def get_allowance_notification_template(child_name: str, amount: float, frequency: str, parent_name: str, new_balance: float, stored_in: str = None) -> str:
     """Template for allowance received notifications"""
+    return get_base_template(get_allowance_notification_fragment(child_name, amount, frequency, parent_name, new_balance, stored_in), f"{frequency.title()} Allowance Received!")
+
+def get_allowance_notification_fragment(child_name: str, amount: float, frequency: str, parent_name: str, new_balance: float, stored_in: str = None) -> str:
+    """Body of allowance received notifications, also used as a digest section"""
     content = f"""
     <h3>Hi {child_name}! <span class="emoji">💰</span></h3>
     <p>Good news! You've received your {frequency} allowance.</p>
@@ -367,10 +379,14 @@ def get_allowance_notification_template(child_name: str, amount: float, frequenc
     <p>Keep up the great work with managing your money responsibly! <span class="emoji">🌟</span></p>
     """
     
-    return get_base_template(content, f"{frequency.title()} Allowance Received!")
+    return content
 
 def get_goal_achievement_template(child_name: str, goal_title: str, goal_amount: float) -> str:
     """Template for goal achievement notifications"""
+    return get_base_template(get_goal_achievement_fragment(child_name, goal_title, goal_amount), "🏆 Goal Achieved!")
+
+def get_goal_achievement_fragment(child_name: str, goal_title: str, goal_amount: float) -> str:
+    """Body of goal achievement notifications, also used as a digest section"""
     content = f"""
     <h3>Congratulations {child_name}! <span class="emoji">🎉</span></h3>
     <p>You've successfully reached your savings goal!</p>
@@ -408,10 +424,14 @@ def get_goal_achievement_template(child_name: str, goal_title: str, goal_amount:
     <p>You should be incredibly proud of yourself! <span class="emoji">🌟</span></p>
     """
     
-    return get_base_template(content, "🏆 Goal Achieved!")
+    return content
 
 def get_low_balance_warning_template(child_name: str, current_balance: float, threshold: float = 50.0) -> str:
     """Template for low balance warnings"""
+    return get_base_template(get_low_balance_warning_fragment(child_name, current_balance, threshold), "⚠️ Low Balance Alert")
+
+def get_low_balance_warning_fragment(child_name: str, current_balance: float, threshold: float = 50.0) -> str:
+    """Body of low balance warnings, also used as a digest section"""
     content = f"""
     <h3>Hi {child_name}! <span class="emoji">⚠️</span></h3>
     <p>Just a friendly reminder about your account balance.</p>
@@ -445,10 +465,14 @@ def get_low_balance_warning_template(child_name: str, current_balance: float, th
     <p>You've got this! <span class="emoji">💪</span></p>
     """
     
-    return get_base_template(content, "⚠️ Low Balance Alert")
+    return content
 
 def get_spending_milestone_template(child_name: str, milestone_type: str, amount: float, timeframe: str) -> str:
     """Template for spending milestone notifications"""
+    return get_base_template(get_spending_milestone_fragment(child_name, milestone_type, amount, timeframe), "📊 Spending Milestone")
+
+def get_spending_milestone_fragment(child_name: str, milestone_type: str, amount: float, timeframe: str) -> str:
+    """Body of spending milestones, also used as a digest section"""
     content = f"""
     <h3>Hi {child_name}! <span class="emoji">📊</span></h3>
     <p>We wanted to share an interesting milestone about your spending habits!</p>
@@ -485,7 +509,29 @@ def get_spending_milestone_template(child_name: str, milestone_type: str, amount
     <p>Keep being mindful about your financial choices! <span class="emoji">🌟</span></p>
     """
     
-    return get_base_template(content, "📊 Spending Milestone")
+    return content
+
+def get_digest_template(recipient_name: str, sections: list, period: str = 'daily') -> str:
+    """
+    Several notifications combined into one email
+    
+    Args:
+        recipient_name: Name for the greeting
+        sections: (heading, fragment) pairs from the get_*_fragment functions
+        period: 'daily' or 'weekly', for the title
+    """
+    content = f"""
+    <h3>Hi {recipient_name}! <span class="emoji">📬</span></h3>
+    <p>Here's everything from your Pocket Money Tracker since your last update.</p>
+    """
+    for heading, fragment in sections:
+        content += f"""
+    <hr>
+    <h4>{heading}</h4>
+    {fragment}
+    """
+    
+    return get_base_template(content, f"Your {period.title()} Digest")
 
 def get_financial_report_template(report_data: dict) -> str:
     """Template for comprehensive financial reports"""
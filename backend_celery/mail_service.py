@@ -2,6 +2,8 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Optional
+from services.metrics import EMAIL_LATENCY
+import time
 
 SMTP_SERVER = "localhost"
 SMTP_PORT = 1025
@@ -21,6 +23,7 @@ def send_email(to: str, subject: str, content: str, content_type: str = 'html')
     Returns:
         bool: True if email sent successfully, False otherwise
     """
+    start = time.perf_counter()
     try:
         msg = MIMEMultipart()
         msg['To'] = to
@@ -33,8 +36,10 @@ def send_email(to: str, subject: str, content: str, content_type: str = 'html')
             client.send_message(msg)
             client.quit()
         
+        EMAIL_LATENCY.observe(time.perf_counter() - start, outcome='sent')
         return True
     except Exception as e:
+        EMAIL_LATENCY.observe(time.perf_counter() - start, outcome='failed')
         print(f"Failed to send email to {to}: {str(e)}")
         return False
 
@@ -2,36 +2,98 @@ from celery import shared_task
 from datetime import datetime, timedelta, date
 from backend_celery.mail_service import send_notification_email
 from backend_celery.email_templates import (
-    get_daily_reminder_template,
-    get_weekly_reminder_template,
     get_parent_summary_template,
-    get_allowance_notification_template,
-    get_goal_achievement_template,
     get_low_balance_warning_template
 )
 from flask import current_app, render_template_string
-from sqlalchemy import func, desc
+from sqlalchemy import desc
+from sqlalchemy.exc import OperationalError
 from models import (
-    Child, Parent, User, Goal, Spending, PocketMoney, 
-    PocketMoneyPlace, PocketMoneyLog, ParentChildLink, db
+    Child, User, Goal, Spending, PocketMoney, db
 )
+from services.versioning import touch_children, touch_users
+from services.events import publish
+from services.goal_progress import refresh_goal_progress, notify_goal_achievements
+from services.child_data import retry_on_conflict
+from services.metrics import record_task_items
+from services.locks import single_instance
+from services.allowance_schedule import due_schedules, pay_schedule
+from services.reminders import REMINDER_KINDS, due_recipients, due_digest_recipients, batches, weekly_reminder_chunks
+from services.notifications import deliver, pending_digests, render_digest, discard
+from services.family_summary import build_summaries, save_snapshots, period_bounds, parent_chunks
+from services.spending_alerts import detect_alerts
+from services.deletion import plan_deletion, run_plan
+from services.ledger import LEDGER_HEADER, ledger_rows
+import itertools
+import os
+import pyexcel
 import pytz
 import calendar
-from decimal import Decimal
+def _active_recipients(profile, user_ids=None) -> list:
+    """Child or Parent rows of active users, limited to user_ids when given"""
+    query = profile.query.join(User).filter(User.active == True)
+    if user_ids:
+        query = query.filter(User.id.in_(user_ids))
+    return query.all()
+
+@shared_task(ignore_result=True)
+@single_instance()
+def dispatch_reminders():
+    """
+    Queue reminders for users whose local time has reached their reminder hour
+    Runs hourly. Recipients go out in batches of REMINDER_BATCH_SIZE, each
+    delayed a little more, so sending is spread over REMINDER_SPREAD_SECONDS
+    """
+    try:
+        now = datetime.now(pytz.utc)
+        size = current_app.config.get('REMINDER_BATCH_SIZE', 200)
+        spread = current_app.config.get('REMINDER_SPREAD_SECONDS', 3000)
+        senders = {
+            'daily_spending': send_daily_spending_reminders,
+            'weekly_spending': send_weekly_spending_reminders,
+            'parent_summary': send_weekly_parent_summaries
+        }
+
+        queued = []
+        for kind, (role, weekday) in REMINDER_KINDS.items():
+            for local_date, user_ids in due_recipients(role, now, weekday):
+                for batch in batches(user_ids, size):
+                    queued.append((senders[kind], batch, local_date.isoformat()))
+
+        for index, (sender, batch, on_date) in enumerate(queued):
+            sender.apply_async(args=(batch, on_date), countdown=int(index * spread / len(queued)))
+
+        # Digests go last, so they include the reminders queued above
+        digests = list(batches(due_digest_recipients(now), size))
+        for batch in digests:
+            send_notification_digests.apply_async(args=(batch,), countdown=spread + 60)
+
+        current_app.logger.info(
+            f"Reminders queued: {sum(len(batch) for _, batch, _ in queued)} recipients in {len(queued)} batches, "
+            f"{len(digests)} digest batches"
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error in dispatch_reminders: {str(e)}")
+
 @shared_task(ignore_result=True)
-def send_daily_spending_reminders():
+@single_instance()
+def send_daily_spending_reminders(user_ids=None, on_date=None):
     """
     Send daily reminders to children to record their spending
     User Story 2.4: Daily reminders for spending updates
+    dispatch_reminders passes one batch of user ids and their local date;
+    with no arguments every active child is reminded
     """
     try:
         # Get all active children
-        children = Child.query.join(User).filter(User.active == True).all()
+        children = _active_recipients(Child, user_ids)
         
         if not children:
             current_app.logger.info("No active children found for daily reminders")
             return
         
+        today = date.fromisoformat(on_date) if on_date else date.today()
         sent_count = 0
         failed_count = 0
         
@@ -41,7 +103,6 @@ def send_daily_spending_reminders():
                     continue
                 
                 # Check if child has recorded spending today
-                today = date.today()
                 today_spending = Spending.query.filter(
                     Spending.child_id == child.id,
                     Spending.spend_date == today
@@ -49,15 +110,12 @@ def send_daily_spending_reminders():
                 
                 # Only send reminder if no spending recorded today
                 if today_spending == 0:
-                    template_content = get_daily_reminder_template(
-                        child.user_account.name,
-                        float(child.total_balance)
-                    )
-                    
-                    if send_notification_email(
-                        child.user_account.email,
+                    if deliver(
+                        child.user_account,
+                        'daily_reminder',
                         "💰 Daily Spending Reminder",
-                        template_content
+                        child_name=child.user_account.name,
+                        current_balance=float(child.total_balance)
                     ):
                         sent_count += 1
                     else:
@@ -67,346 +125,373 @@ def send_daily_spending_reminders():
                 failed_count += 1
                 current_app.logger.error(f"Failed to send daily reminder to child {child.id}: {str(e)}")
         
+        # Reminders queued for digests
+        db.session.commit()
+        
         current_app.logger.info(f"Daily reminders sent: {sent_count} successful, {failed_count} failed")
+        record_task_items('send_daily_spending_reminders', sent_count, failed_count)
         
     except Exception as e:
         current_app.logger.error(f"Error in send_daily_spending_reminders: {str(e)}")
 
 @shared_task(ignore_result=True)
-def send_weekly_spending_reminders():
+@single_instance()
+def send_weekly_spending_reminders(user_ids=None, on_date=None):
     """
     Send weekly reminders to children who haven't been tracking regularly
     User Story 2.4: Weekly reminders for spending updates
+    Takes the same batch arguments as send_daily_spending_reminders
+    Week stats and goals come from grouped queries, one pair per chunk of children
     """
     try:
-        # Get all active children
-        children = Child.query.join(User).filter(User.active == True).all()
-        
-        if not children:
-            current_app.logger.info("No active children found for weekly reminders")
-            return
-        
         # Calculate date range for the past week
-        today = date.today()
-        week_ago = today - timedelta(days=7)
+        today = date.fromisoformat(on_date) if on_date else date.today()
+        chunk_size = current_app.config.get('REMINDER_CHUNK_SIZE', 500)
         
         sent_count = 0
         failed_count = 0
         
-        for child in children:
-            try:
-                if not child.user_account or not child.user_account.email:
-                    continue
-                
-                # Count spending entries in the past week
-                week_spending_count = Spending.query.filter(
-                    Spending.child_id == child.id,
-                    Spending.spend_date >= week_ago,
-                    Spending.spend_date <= today
-                ).count()
-                
-                # Get total amount spent this week
-                week_total = db.session.query(func.sum(Spending.amount)).filter(
-                    Spending.child_id == child.id,
-                    Spending.spend_date >= week_ago,
-                    Spending.spend_date <= today
-                ).scalar() or 0
-
-                # Prepare week statistics
-                week_stats = {
-                    'entries_count': week_spending_count,
-                    'total_spent': float(week_total),
-                    'current_balance': float(child.total_balance),
-                    'avg_per_entry': float(week_total) / week_spending_count if week_spending_count > 0 else 0
-                }
-
-                # Get active goals with progress
-                active_goals = Goal.query.filter_by(
-                    child_id=child.id, 
-                    status='active'
-                ).all()
-
-                goals_data = []
-                for goal in active_goals:
-                    progress = (float(child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 else 0
-                    remaining = max(0, float(goal.amount) - float(child.total_balance))
-                    goals_data.append({
-                        'title': goal.title,
-                        'progress': progress,
-                        'remaining': remaining
-                    })
-
-                template_content = get_weekly_reminder_template(
-                    child.user_account.name,
-                    week_stats,
-                    goals_data
-                )
-                
-                if send_notification_email(
-                    child.user_account.email,
-                    f"📊 Weekly Financial Summary - {today.strftime('%B %d, %Y')}",
-                    template_content
-                ):
-                    sent_count += 1
-                else:
+        for chunk in weekly_reminder_chunks(today, user_ids, chunk_size):
+            for recipient, week_stats, goals_data in chunk:
+                try:
+                    if deliver(
+                        recipient,
+                        'weekly_reminder',
+                        f"📊 Weekly Financial Summary - {today.strftime('%B %d, %Y')}",
+                        child_name=recipient.name,
+                        week_stats=week_stats,
+                        goals=goals_data
+                    ):
+                        sent_count += 1
+                    else:
+                        failed_count += 1
+                        
+                except Exception as e:
                     failed_count += 1
-                    
-            except Exception as e:
-                failed_count += 1
-                current_app.logger.error(f"Failed to send weekly reminder to child {child.id}: {str(e)}")
+                    current_app.logger.error(f"Failed to send weekly reminder to {recipient.email}: {str(e)}")
+            # Reminders queued for digests
+            db.session.commit()
+        
+        if not sent_count and not failed_count:
+            current_app.logger.info("No active children found for weekly reminders")
+            return
         
         current_app.logger.info(f"Weekly reminders sent: {sent_count} successful, {failed_count} failed")
+        record_task_items('send_weekly_spending_reminders', sent_count, failed_count)
         
     except Exception as e:
         current_app.logger.error(f"Error in send_weekly_spending_reminders: {str(e)}")
 
 @shared_task(ignore_result=True)
-def send_weekly_parent_summaries():
+@single_instance()
+def send_weekly_parent_summaries(user_ids=None, on_date=None):
     """
     Send weekly summaries to parents about their children's financial activity
     User Story 2.7: Weekly email summaries for parents
+    Takes the same batch arguments as send_daily_spending_reminders
+    Each parent's summary is stored as a 'weekly' snapshot first, which the
+    parent report API serves afterwards
     """
     try:
-        # Get all active parents
-        parents = Parent.query.join(User).filter(User.active == True).all()
+        today = date.fromisoformat(on_date) if on_date else date.today()
+        start, end = period_bounds('weekly', today)
+        chunk_size = current_app.config.get('REMINDER_CHUNK_SIZE', 500)
+        
+        sent_count = 0
+        failed_count = 0
+        
+        for parents in parent_chunks(user_ids, chunk_size):
+            summaries = build_summaries([parent.id for parent in parents], start, end)
+            save_snapshots('weekly', end, summaries)
+            db.session.commit()
+            touch_users(*(parent.user_id for parent in parents))
+            
+            for parent in parents:
+                try:
+                    summary = summaries[parent.id]
+                    if not parent.email or not summary['children_data']:
+                        continue
+                    
+                    family_stats = {
+                        'total_balance': summary['summary']['total_balance'],
+                        'total_spent': summary['summary']['total_spent'],
+                        'total_allowances': summary['summary']['total_allowances_given'],
+                        'children_count': summary['summary']['total_children']
+                    }
+                    
+                    template_content = get_parent_summary_template(
+                        parent.name,
+                        summary['children_data'],
+                        family_stats
+                    )
+                    
+                    if send_notification_email(
+                        parent.email,
+                        f"👨‍👩‍👧‍👦 Weekly Family Financial Summary - {today.strftime('%B %d, %Y')}",
+                        template_content
+                    ):
+                        sent_count += 1
+                    else:
+                        failed_count += 1
+                        
+                except Exception as e:
+                    failed_count += 1
+                    current_app.logger.error(f"Failed to send weekly summary to parent {parent.id}: {str(e)}")
         
-        if not parents:
+        if not sent_count and not failed_count:
             current_app.logger.info("No active parents found for weekly summaries")
             return
         
-        # Calculate date range for the past week
-        today = date.today()
-        week_ago = today - timedelta(days=7)
+        current_app.logger.info(f"Weekly parent summaries sent: {sent_count} successful, {failed_count} failed")
+        record_task_items('send_weekly_parent_summaries', sent_count, failed_count)
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in send_weekly_parent_summaries: {str(e)}")
+        db.session.rollback()
+
+@shared_task(ignore_result=True)
+@single_instance()
+def snapshot_daily_family_summaries(on_date=None):
+    """
+    Store every parent's 'daily' family summary for one day (default yesterday)
+    """
+    try:
+        day = date.fromisoformat(on_date) if on_date else date.today() - timedelta(days=1)
+        start, end = period_bounds('daily', day)
+        chunk_size = current_app.config.get('REMINDER_CHUNK_SIZE', 500)
+        
+        stored_count = 0
+        for parents in parent_chunks(chunk_size=chunk_size):
+            save_snapshots('daily', end, build_summaries([parent.id for parent in parents], start, end))
+            db.session.commit()
+            touch_users(*(parent.user_id for parent in parents))
+            stored_count += len(parents)
+        
+        current_app.logger.info(f"Daily family summaries stored: {stored_count} successful, 0 failed")
+        record_task_items('snapshot_daily_family_summaries', stored_count, 0)
+        
+    except Exception as e:
+        current_app.logger.error(f"Error in snapshot_daily_family_summaries: {str(e)}")
+        db.session.rollback()
+
+@shared_task(ignore_result=True)
+@single_instance()
+def detect_spending_alerts(on_date=None):
+    """
+    Low balance, unusual spending and milestone notifications for one day's
+    spending (default yesterday), for all children from spending_rollups
+    """
+    try:
+        day = date.fromisoformat(on_date) if on_date else date.today() - timedelta(days=1)
+        config = current_app.config
+        alerts = detect_alerts(
+            day,
+            low_balance=config.get('LOW_BALANCE_THRESHOLD', 50),
+            milestones=config.get('SPENDING_MILESTONES', ()),
+            window_days=config.get('SPENDING_ALERT_WINDOW_DAYS', 28),
+            z_score=config.get('SPENDING_ALERT_Z_SCORE', 3.0),
+            min_amount=config.get('SPENDING_ALERT_MIN_AMOUNT', 0)
+        )
         
         sent_count = 0
         failed_count = 0
         
-        for parent in parents:
+        for alert in alerts:
             try:
-                if not parent.user_account or not parent.user_account.email:
-                    continue
-                
-                # Get all children linked to this parent
-                children_links = ParentChildLink.query.filter_by(parent_id=parent.id).all()
-                
-                if not children_links:
-                    continue
-                
-                # Prepare family statistics
-                total_family_balance = 0
-                total_family_spent = 0
-                total_family_allowances = 0
-                children_data = []
-                
-                for link in children_links:
-                    child = link.child
-                    if not child:
-                        continue
-                    
-                    # Get child's week statistics
-                    week_spending = Spending.query.filter(
-                        Spending.child_id == child.id,
-                        Spending.spend_date >= week_ago,
-                        Spending.spend_date <= today
-                    ).all()
-                    
-                    week_total = sum(float(spend.amount) for spend in week_spending)
-                    total_family_spent += week_total
-                    total_family_balance += Decimal(str(child.total_balance))
-                    
-                    # Get allowances given this week
-                    week_allowances = PocketMoney.query.filter(
-                        PocketMoney.child_id == child.id,
-                        PocketMoney.date_given >= week_ago,
-                        PocketMoney.date_given <= today
-                    ).all()
-                    
-                    week_allowance_total = sum(float(allowance.amount) for allowance in week_allowances)
-                    total_family_allowances += week_allowance_total
-                    
-                    # Get spending breakdown by category
-                    spending_by_category = {}
-                    for spend in week_spending:
-                        category = spend.category or 'Other'
-                        spending_by_category[category] = spending_by_category.get(category, 0) + float(spend.amount)
-                    
-                    # Get goal progress
-                    active_goals = Goal.query.filter_by(
-                        child_id=child.id, 
-                        status='active'
-                    ).all()
-                    
-                    goals_data = []
-                    for goal in active_goals:
-                        progress = (float(child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 else 0
-                        goals_data.append({
-                            'title': goal.title,
-                            'progress': progress
-                        })
-                    
-                    child_data = {
-                        'name': child.user_account.name if child.user_account else 'Unknown',
-                        'balance': float(child.total_balance),
-                        'week_spent': week_total,
-                        'transaction_count': len(week_spending),
-                        'allowances_received': week_allowance_total,
-                        'spending_categories': spending_by_category,
-                        'goals': goals_data
-                    }
-                    children_data.append(child_data)
-
-                family_stats = {
-                    'total_balance': total_family_balance,
-                    'total_spent': total_family_spent,
-                    'total_allowances': total_family_allowances,
-                    'children_count': len(children_links)
-                }
-
-                template_content = get_parent_summary_template(
-                    parent.user_account.name,
-                    children_data,
-                    family_stats
-                )
-                
-                if send_notification_email(
-                    parent.user_account.email,
-                    f"👨‍👩‍👧‍👦 Weekly Family Financial Summary - {today.strftime('%B %d, %Y')}",
-                    template_content
-                ):
+                if deliver(alert.recipient, alert.kind, alert.subject, **alert.params):
                     sent_count += 1
                 else:
                     failed_count += 1
                     
             except Exception as e:
                 failed_count += 1
-                current_app.logger.error(f"Failed to send weekly summary to parent {parent.id}: {str(e)}")
+                current_app.logger.error(f"Failed to send {alert.kind} alert to user {alert.recipient.id}: {str(e)}")
         
-        current_app.logger.info(f"Weekly parent summaries sent: {sent_count} successful, {failed_count} failed")
+        # Notifications queued for digests
+        db.session.commit()
+        
+        current_app.logger.info(f"Spending alerts sent: {sent_count} successful, {failed_count} failed")
+        record_task_items('detect_spending_alerts', sent_count, failed_count)
         
     except Exception as e:
-        current_app.logger.error(f"Error in send_weekly_parent_summaries: {str(e)}")
+        current_app.logger.error(f"Error in detect_spending_alerts: {str(e)}")
+        db.session.rollback()
 
 @shared_task(ignore_result=True)
+@single_instance()
 def process_recurring_allowances():
     """
-    Process and distribute recurring allowances based on schedule
+    Pay recurring allowances whose schedule is due, catching up missed periods
+    Only schedules with next_due_at <= now are read, so the cost follows the
+    number of due allowances rather than all of them
     """
     try:
-        today = date.today()
+        now = datetime.now()
+        max_catch_up = current_app.config.get('ALLOWANCE_MAX_CATCH_UP', 12)
+
+        def pay_due():
+            """Stage and commit every due payment; rerun whole if the database was locked"""
+            paid = []
+            failed = []
+            for schedule in due_schedules(now):
+                try:
+                    occurrences = pay_schedule(schedule, now, max_catch_up)
+                    if occurrences:
+                        paid.append((schedule, occurrences))
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    # pay_schedule stages nothing when the rule fails, so the others still commit
+                    failed.append(schedule.id)
+                    current_app.logger.error(f"Failed to process allowance schedule {schedule.id}: {str(e)}")
 
-        # Only get active recurring allowances
-        recurring_allowances = PocketMoney.query.filter_by(recurring=True).all()
+            # One progress pass for every child that was paid
+            reached = refresh_goal_progress(*{schedule.child_id for schedule, _ in paid}) if paid else []
+            db.session.commit()
+            return paid, failed, reached
+
+        paid, failed, reached = retry_on_conflict(pay_due)
+        processed_count = len(paid)
+        failed_count = len(failed)
 
-        if not recurring_allowances:
-            current_app.logger.info("No recurring allowances found")
+        if not paid and not failed:
+            current_app.logger.info("No recurring allowances due")
             return
 
-        processed_count = 0
+        if paid:
+            audiences = touch_children(*(schedule.child_id for schedule, _ in paid))
+            for schedule, occurrences in paid:
+                child = schedule.child
+                total = float(schedule.amount) * len(occurrences)
+                publish(audiences[child.id], 'allowance.created', {
+                    'child_id': child.id,
+                    'allowance': {
+                        'amount': total,
+                        'date_given': occurrences[-1].date().isoformat(),
+                        'recurring_schedule': schedule.rule,
+                        'stored_in': schedule.stored_in
+                    },
+                    'total_balance': float(child.total_balance)
+                })
+
+                # Notify only once the credit is committed
+                if child.user_account and child.user_account.email:
+                    parent_name = (
+                        schedule.parent.user_account.name
+                        if schedule.parent and schedule.parent.user_account
+                        else "Your parent"
+                    )
+                    deliver(
+                        child.user_account,
+                        'allowance',
+                        f"💰 {schedule.rule.title()} Allowance Received!",
+                        child_name=child.user_account.name,
+                        amount=total,
+                        frequency=schedule.rule,
+                        parent_name=parent_name,
+                        new_balance=float(child.total_balance),
+                        stored_in=schedule.stored_in
+                    )
+            # Notifications queued for digests
+            db.session.commit()
+            notify_goal_achievements(reached)
+
+        current_app.logger.info(f"Recurring allowances processed: {processed_count} successful, {failed_count} failed")
+        record_task_items('process_recurring_allowances', processed_count, failed_count)
+
+    except Exception as e:
+        current_app.logger.error(f"Error in process_recurring_allowances: {str(e)}")
+        db.session.rollback()
+
+@shared_task(ignore_result=True)
+def send_goal_achievement_notifications(goal_ids):
+    """
+    Congratulate children on goals completed by refresh_goal_progress
+    """
+    try:
+        goals = db.session.query(Goal, User).join(
+            Child, Goal.child_id == Child.id
+        ).join(
+            User, Child.user_id == User.id
+        ).filter(
+            Goal.id.in_(goal_ids),
+            Goal.status == 'completed'
+        ).all()
+
+        sent_count = 0
         failed_count = 0
 
-        for allowance in recurring_allowances:
+        for goal, user in goals:
             try:
-                if not allowance.recurring_schedule:
+                if not user.email:
                     continue
 
-                # Check if allowance should be processed today
-                should_process = False
-                days_since = (today - allowance.date_given).days
-
-                if allowance.recurring_schedule == 'daily':
-                    should_process = True
-                elif allowance.recurring_schedule == 'weekly':
-                    should_process = days_since >= 7
-                elif allowance.recurring_schedule == 'fortnightly':
-                    should_process = days_since >= 14
-                elif allowance.recurring_schedule == 'monthly':
-                    should_process = (
-                        today.month != allowance.date_given.month or
-                        today.year != allowance.date_given.year
-                    )
+                if deliver(
+                    user,
+                    'goal_achieved',
+                    f"🎉 Goal Achieved: {goal.title}",
+                    child_name=user.name,
+                    goal_title=goal.title,
+                    goal_amount=float(goal.amount)
+                ):
+                    sent_count += 1
+                else:
+                    failed_count += 1
 
-                if not should_process:
-                    continue
+            except Exception as e:
+                failed_count += 1
+                current_app.logger.error(f"Failed to send goal achievement for goal {goal.id}: {str(e)}")
 
-                # Create new allowance entry
-                new_allowance = PocketMoney(
-                    child_id=allowance.child_id,
-                    parent_id=allowance.parent_id,
-                    amount=allowance.amount,
-                    date_given=today,
-                    recurring=True,
-                    recurring_schedule=allowance.recurring_schedule,
-                    stored_in=allowance.stored_in
-                )
-
-                # Mark the old one as processed so it won't run again
-                allowance.recurring = False
-
-                # Update child's balance (Decimal safe)
-                child = Child.query.get(allowance.child_id)
-                if child:
-                    child.total_balance += Decimal(str(allowance.amount))
-
-                    # Update money storage place if specified
-                    if allowance.stored_in:
-                        money_place = PocketMoneyPlace.query.filter_by(
-                            child_id=child.id,
-                            name=allowance.stored_in
-                        ).first()
-                        if money_place:
-                            money_place.amount_stored += Decimal(str(allowance.amount))
-
-                    # Create transaction log
-                    log_entry = PocketMoneyLog(
-                        child_id=child.id,
-                        amount=allowance.amount,
-                        date=today,
-                        source='Recurring Allowance',
-                        destination=allowance.stored_in or 'General Balance'
-                    )
+        # Notifications queued for digests
+        db.session.commit()
+
+        current_app.logger.info(f"Goal achievements sent: {sent_count} successful, {failed_count} failed")
+        record_task_items('send_goal_achievement_notifications', sent_count, failed_count)
+
+    except Exception as e:
+        current_app.logger.error(f"Error in send_goal_achievement_notifications: {str(e)}")
 
-                    db.session.add(new_allowance)
-                    db.session.add(log_entry)
-
-                    # Send notification
-                    if child.user_account and child.user_account.email:
-                        parent_name = (
-                            allowance.parent.user_account.name
-                            if allowance.parent and allowance.parent.user_account
-                            else "Your parent"
-                        )
-                        template_content = get_allowance_notification_template(
-                            child.user_account.name,
-                            float(allowance.amount),
-                            allowance.recurring_schedule,
-                            parent_name,
-                            float(child.total_balance),
-                            allowance.stored_in
-                        )
-                        send_notification_email(
-                            child.user_account.email,
-                            f"💰 {allowance.recurring_schedule.title()} Allowance Received!",
-                            template_content
-                        )
-
-                    processed_count += 1
-
-                # Update original's date_given (optional)
-                allowance.date_given = today
+@shared_task(ignore_result=True)
+@single_instance()
+def send_notification_digests(user_ids=None):
+    """
+    Send each user's queued notifications as one email
+    dispatch_reminders passes batches of users whose digest is due; with no
+    arguments every queued notification goes out
+    """
+    try:
+        sent_count = 0
+        failed_count = 0
+        delivered = []
+
+        for user, rows in pending_digests(user_ids):
+            try:
+                if not user.email:
+                    continue
+                period = user.notification_mode if user.notification_mode in ('daily', 'weekly') else 'daily'
+                if send_notification_email(
+                    user.email,
+                    f"📬 Your {period.title()} Pocket Money Digest ({len(rows)} updates)",
+                    render_digest(user, rows)
+                ):
+                    sent_count += 1
+                    delivered += [row.id for row in rows]
+                else:
+                    failed_count += 1
 
             except Exception as e:
                 failed_count += 1
-                current_app.logger.error(f"Failed to process recurring allowance {allowance.id}: {str(e)}")
-                db.session.rollback()
-                continue
+                current_app.logger.error(f"Failed to send digest to user {user.id}: {str(e)}")
 
-        if processed_count > 0:
-            db.session.commit()
+        # Failed digests keep their rows for the next window
+        discard(delivered)
+        db.session.commit()
 
-        current_app.logger.info(f"Recurring allowances processed: {processed_count} successful, {failed_count} failed")
+        current_app.logger.info(f"Notification digests sent: {sent_count} successful, {failed_count} failed")
+        record_task_items('send_notification_digests', sent_count, failed_count)
 
     except Exception as e:
-        current_app.logger.error(f"Error in process_recurring_allowances: {str(e)}")
+        current_app.logger.error(f"Error in send_notification_digests: {str(e)}")
         db.session.rollback()
 
 @shared_task(ignore_result=False, bind=True)
@@ -451,11 +536,10 @@ def create_child_financial_report(self, child_id, start_date, end_date):
         goals = Goal.query.filter_by(child_id=child_id).all()
         goals_data = []
         for goal in goals:
-            progress = (float(child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 else 0
             goals_data.append({
                 'title': goal.title,
                 'target': float(goal.amount),
-                'progress': progress,
+                'progress': goal.progress_percentage or 0,
                 'status': goal.status
             })
         
@@ -476,4 +560,78 @@ def create_child_financial_report(self, child_id, start_date, end_date):
         
     except Exception as e:
         current_app.logger.error(f"Error creating financial report for child {child_id}: {str(e)}")
-        return {'error': str(e)}
\ No newline at end of file
+        return {'error': str(e)}
+
+@shared_task(ignore_result=False, bind=True)
+def delete_records(self, target, target_id, requested_by=None):
+    """
+    Delete a user, school, teacher or class and every row depending on it
+    Rows go in committed batches so the SQLite write lock is never held for
+    long; progress is published as the PROGRESS state's meta, polled at
+    GET /deletions/<task id>
+    """
+    about = {'target': target, 'target_id': target_id, 'requested_by': requested_by}
+    try:
+        rows = run_plan(
+            plan_deletion(target, target_id),
+            batch_size=current_app.config.get('DELETION_BATCH_SIZE', 500),
+            pause=current_app.config.get('DELETION_PAUSE_SECONDS', 0.05),
+            progress=lambda progress: self.update_state(state='PROGRESS', meta={**about, **progress})
+        )
+        
+        deleted_count = sum(rows.values())
+        current_app.logger.info(f"Deleted {target} {target_id}: {deleted_count} rows")
+        record_task_items('delete_records', deleted_count, 0)
+        return {**about, 'rows': rows}
+        
+    except Exception as e:
+        current_app.logger.error(f"Error deleting {target} {target_id}: {str(e)}")
+        db.session.rollback()
+        record_task_items('delete_records', 0, 1)
+        # Re-raised so the task ends in FAILURE; running it again picks up where it stopped
+        raise
+
+@shared_task(ignore_result=False, bind=True)
+def export_child_ledger_xlsx(self, child_id, start_date=None, end_date=None):
+    """
+    Write a child's full transaction ledger to an XLSX file
+    Rows stream from the DB cursor into pyexcel, so large histories don't build up in memory
+    """
+    try:
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+
+        export_dir = current_app.config.get('EXPORT_DIR', 'exports')
+        os.makedirs(export_dir, exist_ok=True)
+        filename = f"ledger_child_{child_id}_{date.today().isoformat()}.xlsx"
+        path = os.path.join(export_dir, f"{self.request.id}.xlsx")
+
+        pyexcel.isave_as(
+            array=itertools.chain([LEDGER_HEADER], ledger_rows(child_id, start_dt, end_dt)),
+            dest_file_name=path
+        )
+        pyexcel.free_resources()
+
+        return {'child_id': child_id, 'path': os.path.abspath(path), 'filename': filename}
+
+    except Exception as e:
+        current_app.logger.error(f"Error exporting ledger for child {child_id}: {str(e)}")
+        return {'child_id': child_id, 'error': str(e)}
+
+@shared_task(ignore_result=True)
+def prune_exports():
+    """Delete XLSX exports older than EXPORT_MAX_AGE_HOURS; the download API answers 404 for them after"""
+    export_dir = current_app.config.get('EXPORT_DIR', 'exports')
+    cutoff = datetime.now().timestamp() - current_app.config.get('EXPORT_MAX_AGE_HOURS', 24) * 3600
+    if not os.path.isdir(export_dir):
+        return
+
+    removed = 0
+    for entry in os.scandir(export_dir):
+        if entry.is_file() and entry.name.endswith('.xlsx') and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError as e:
+                current_app.logger.warning(f"Could not remove export {entry.name}: {str(e)}")
+    current_app.logger.info(f"Pruned {removed} old exports")
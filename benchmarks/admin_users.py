@@ -0,0 +1,59 @@
+"""
+Benchmark the admin user listing: loading every user with lazily loaded
+roles (the endpoint before paging) against keyset pages, a deep page and a
+prefix search from services/user_directory.py, over generated families.
+
+Run from the project root:
+    python -m benchmarks.admin_users [families ...]
+"""
+
+import sys
+import time
+from flask import Flask
+from models import db, User
+from services.user_directory import user_page, count_users
+from generate_data import generate
+
+def list_all():
+    """The endpoint before paging: every user, roles loaded one query per user"""
+    return len([[role.name for role in user.roles] for user in User.query.all()])
+
+def deep_page(pages=20):
+    cursor = None
+    for _ in range(pages):
+        users, cursor = user_page(sort='name', limit=50, after=cursor)
+    return len(users)
+
+def timed(fn):
+    db.session.expire_all()
+    start = time.perf_counter()
+    rows = fn()
+    return time.perf_counter() - start, rows
+
+def run(families):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        generate(families, years=0.1, seed=42)
+        print(f"{User.query.count():,} users:")
+        for name, fn in (
+            ('all users', list_all),
+            ('first page by name', lambda: len(user_page(sort='name', limit=50)[0])),
+            ('20th page by name', deep_page),
+            ('role page', lambda: len(user_page(role='parent', sort='email', limit=50)[0])),
+            ('prefix search', lambda: len(user_page(prefix='child1', sort='email', limit=50)[0])),
+            ('capped search count', lambda: count_users(prefix='child1', cap=10000)[0]),
+        ):
+            seconds, rows = timed(fn)
+            print(f"  {name:20} {seconds * 1000:9.1f} ms  {rows:8,} rows")
+        db.session.remove()
+        db.drop_all()
+
+def main():
+    for families in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        run(families)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Stress concurrent balance changes: worker threads spend from and pay
+allowances into the same few children at once, as web and Celery workers
+do, then every final balance is checked against the changes the workers
+saw succeed.
+
+Runs the conditional UPDATE in services/child_data.py and, for comparison,
+the read-modify-write it replaced. Uses a temporary SQLite file, since an
+in-memory database is private to one connection.
+
+Run from the project root:
+    python -m benchmarks.balance_stress [workers] [operations per worker]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from flask import Flask
+from sqlalchemy import insert
+from models import db, User, Child
+from services.child_data import apply_balance_change, retry_on_conflict, InsufficientBalance
+
+CHILDREN = 3
+START = Decimal('100.00')
+# Mostly spends, some allowances
+DELTAS = [Decimal(amount) for amount in ('-1', '-2.50', '-5', '-10', '-20', '5', '25')]
+
+def read_modify_write(child, delta):
+    """Balance changes before this service: check and write back the value this worker read"""
+    if child.total_balance + delta < 0:
+        raise InsufficientBalance()
+    child.total_balance += delta
+
+def worker(app, change, seed, operations, applied, outcomes):
+    rng = random.Random(seed)
+    with app.app_context():
+        for _ in range(operations):
+            child_id = rng.randint(1, CHILDREN)
+            delta = rng.choice(DELTAS)
+
+            def work():
+                child = db.session.get(Child, child_id)
+                time.sleep(0.001)  # the rest of the request
+                change(child, delta)
+                db.session.commit()
+
+            try:
+                retry_on_conflict(work)
+                applied[child_id] += delta
+                outcomes['applied'] += 1
+            except InsufficientBalance:
+                db.session.rollback()
+                outcomes['rejected'] += 1
+            except Exception:
+                db.session.rollback()
+                outcomes['failed'] += 1
+        db.session.remove()
+
+def run(label, change, workers, operations):
+    path = tempfile.mktemp(suffix='.sqlite3')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [
+            {'id': i, 'email': f'child{i}@example.com', 'name': f'Child {i}', 'password': 'x',
+             'active': True, 'fs_uniquifier': f'u{i}'}
+            for i in range(1, CHILDREN + 1)
+        ])
+        db.session.execute(insert(Child), [
+            {'id': i, 'user_id': i, 'total_balance': START} for i in range(1, CHILDREN + 1)
+        ])
+        db.session.commit()
+
+    # One dict per worker, merged after, so the tally itself has no races
+    applied = [Counter() for _ in range(workers)]
+    outcomes = [Counter() for _ in range(workers)]
+    threads = [
+        threading.Thread(target=worker, args=(app, change, seed, operations, applied[seed], outcomes[seed]))
+        for seed in range(workers)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    with app.app_context():
+        balances = dict(db.session.query(Child.id, Child.total_balance))
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(path)
+
+    expected = {child_id: START + sum(tally[child_id] for tally in applied) for child_id in balances}
+    lost = sum(abs(balances[child_id] - expected[child_id]) for child_id in balances)
+    total = sum(outcomes, Counter())
+    print(f"  {label:20} {seconds:6.2f} s  applied {total['applied']:6,}  rejected {total['rejected']:5,}"
+          f"  failed {total['failed']:4,}  lost {lost:9.2f}  negative {sum(b < 0 for b in balances.values())}")
+    return lost == 0 and all(balance >= 0 for balance in balances.values())
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"{workers} workers x {operations} balance changes on {CHILDREN} children:")
+    run('read-modify-write', read_modify_write, workers, operations)
+    if not run('conditional UPDATE', apply_balance_change, workers, operations):
+        sys.exit('Conditional UPDATE lost or overdrew a balance')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark the shared child data layer (services/child_data.py) on a seeded
+in-memory SQLite database, and show the plan for the spending list query
+
+Run from the project root:
+    python -m benchmarks.child_queries [children] [spendings_per_child]
+"""
+
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+from flask import Flask
+from sqlalchemy import insert, text
+from models import (
+    db, User, Child, Goal, Spending, PocketMoneyLog, PocketMoneyPlace, Challenge, ChallengeProgress
+)
+from services import child_data
+
+CATEGORIES = ['Food & Drinks', 'Toys & Games', 'Books', 'Clothes', 'Entertainment', 'Other']
+
+def seed(children, per_child):
+    rng = random.Random(42)
+    start = date(2022, 1, 1)
+    db.session.execute(insert(User), [
+        {'id': i, 'email': f'child{i}@example.com', 'name': f'Child {i}', 'password': 'x',
+         'active': True, 'fs_uniquifier': f'u{i}'}
+        for i in range(1, children + 1)
+    ])
+    db.session.execute(insert(Child), [
+        {'id': i, 'user_id': i, 'total_balance': 100} for i in range(1, children + 1)
+    ])
+    db.session.execute(insert(Spending), [
+        {'child_id': child_id, 'category': rng.choice(CATEGORIES), 'amount': rng.randint(1, 20),
+         'spend_date': start + timedelta(days=rng.randrange(1000)), 'description': 'Bench'}
+        for child_id in range(1, children + 1) for _ in range(per_child)
+    ])
+    db.session.execute(insert(PocketMoneyLog), [
+        {'child_id': child_id, 'amount': 5, 'date': start + timedelta(days=rng.randrange(1000)),
+         'source': 'Allowance', 'destination': 'General Balance'}
+        for child_id in range(1, children + 1) for _ in range(per_child // 4)
+    ])
+    db.session.execute(insert(PocketMoneyPlace), [
+        {'child_id': child_id, 'name': name, 'amount_stored': 50}
+        for child_id in range(1, children + 1) for name in ('Piggy Bank', 'Wallet')
+    ])
+    db.session.execute(insert(Goal), [
+        {'child_id': child_id, 'title': 'Bike', 'amount': 150, 'status': 'active', 'progress_percentage': 66.7}
+        for child_id in range(1, children + 1)
+    ])
+    db.session.execute(insert(Challenge), [
+        {'id': i, 'title': f'Challenge {i}', 'reward': 'Badge'} for i in range(1, 21)
+    ])
+    db.session.execute(insert(ChallengeProgress), [
+        {'child_id': child_id, 'challenge_id': challenge_id, 'status': rng.choice(['started', 'completed'])}
+        for child_id in range(1, children + 1) for challenge_id in rng.sample(range(1, 21), 5)
+    ])
+    db.session.commit()
+
+def main():
+    children = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    per_child = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(children, per_child)
+        rng = random.Random(7)
+        child_ids = [rng.randint(1, children) for _ in range(200)]
+
+        cases = {
+            'spending_query(limit 50)': lambda cid: child_data.spending_query(cid).limit(50).all(),
+            'spending_query(category)': lambda cid: child_data.spending_query(cid, category='Books').limit(50).all(),
+            'spending_by_category': child_data.spending_by_category,
+            'balance_breakdown': lambda cid: child_data.balance_breakdown(db.session.get(Child, cid)),
+            'goal_rows': child_data.goal_rows,
+            'challenge_counts': child_data.challenge_counts,
+            'challenge_history': child_data.challenge_history,
+        }
+
+        print(f"{children:,} children x {per_child:,} spendings; mean of {len(child_ids)} calls each:")
+        for name, fn in cases.items():
+            seconds = min(timeit.repeat(lambda: [fn(cid) for cid in child_ids], number=1, repeat=3))
+            print(f"  {name:28} {seconds / len(child_ids) * 1000:7.3f} ms/call")
+
+        compiled = child_data.spending_query(1).limit(50).statement.compile(
+            db.engine, compile_kwargs={'literal_binds': True}
+        )
+        print("\nSpending list plan:")
+        for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')):
+            print(f"  {row[-1]}")
+
+if __name__ == '__main__':
+    main()
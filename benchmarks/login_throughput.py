@@ -0,0 +1,80 @@
+"""
+Benchmark password verification throughput (logins/second per core)
+
+First checks that PasswordHasher and Flask-Security accept each other's
+hashes, since every seeded account was hashed by flask_security.
+
+Run from the project root:
+    python -m benchmarks.login_throughput [seconds]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask
+from flask_security import Security, SQLAlchemyUserDatastore, hash_password, verify_password
+from config import LocalDevelopment
+from models import db, User, Role
+from services.hashing import PasswordHasher, build_context, _init_worker, _verify
+
+def check_round_trip():
+    """Log in against a flask_security hash, and the other way round"""
+    app = Flask(__name__)
+    app.config.from_object(LocalDevelopment)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    Security(app, datastore=SQLAlchemyUserDatastore(db, User, Role), register_blueprint=False)
+    hasher = PasswordHasher(app)
+    with app.test_request_context():
+        valid, _ = hasher.verify('password123', hash_password('password123'))
+        if not valid:
+            sys.exit('PasswordHasher rejected a flask_security.hash_password hash')
+        if not verify_password('password123', hasher.hash('password123')):
+            sys.exit('flask_security.verify_password rejected a PasswordHasher hash')
+        if hasher.verify('wrong', hash_password('password123'))[0]:
+            sys.exit('PasswordHasher accepted a wrong password')
+    print("Round trip with flask_security: ok")
+
+def measure_inline(context, password_hash, seconds):
+    """Verify on the calling thread, as routes.py used to"""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        context.verify('password123', password_hash)
+        count += 1
+    return count / seconds
+
+def measure_pool(scheme, options, password_hash, workers, seconds):
+    """Verify on a process pool, keeping every worker busy"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(scheme, options)) as pool:
+        # Warm up so process start-up isn't counted
+        list(pool.map(_verify, ['password123'] * workers, [password_hash] * workers))
+
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            batch = list(pool.map(_verify, ['password123'] * workers * 4, [password_hash] * workers * 4))
+            count += len(batch)
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    scheme = LocalDevelopment.SECURITY_PASSWORD_HASH
+    options = LocalDevelopment.SECURITY_PASSWORD_HASH_PASSLIB_OPTIONS
+    workers = LocalDevelopment.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+    check_round_trip()
+    context = build_context(scheme, options)
+    password_hash = context.hash('password123')
+
+    print(f"Scheme: {scheme} {options}")
+    inline_rate = measure_inline(context, password_hash, seconds)
+    print(f"Inline:          {inline_rate:8.2f} logins/s (1 core)")
+
+    pool_rate = measure_pool(scheme, options, password_hash, workers, seconds)
+    print(f"Pool ({workers} workers): {pool_rate:8.2f} logins/s ({pool_rate / workers:.2f} per core)")
+
+if __name__ == '__main__':
+    main()
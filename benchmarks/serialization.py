@@ -0,0 +1,50 @@
+"""
+Benchmark compiled serializers against Flask-RESTful marshal for 10k-row lists
+
+Run from the project root:
+    python -m benchmarks.serialization [rows]
+"""
+
+import sys
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from flask_restful import marshal
+from app import createApp
+
+def make_rows(count):
+    """Spending-shaped tuples in spending_fields order"""
+    start = date(2024, 1, 1)
+    return [
+        (i, i % 500, 'Food & Drinks', Decimal('12.50'), start + timedelta(days=i % 365), 'Snack at school', 'Alex Smith')
+        for i in range(count)
+    ]
+
+def report(name, seconds, count):
+    print(f"  {name:32} {seconds * 1000:8.1f} ms  ({count / seconds:,.0f} rows/s)")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    app = createApp()
+    with app.app_context():
+        from resources.child_resources import spending_fields, spending_serializer
+
+    rows = make_rows(count)
+    keys = list(spending_fields)
+    objects = [SimpleNamespace(**dict(zip(keys, row))) for row in rows]
+    dicts = [dict(zip(keys, row)) for row in rows]
+
+    def best(fn):
+        return min(timeit.repeat(fn, number=1, repeat=5))
+
+    print(f"Serializing {count:,} spending rows (best of 5):")
+    report('marshal(objects)', best(lambda: marshal(objects, spending_fields)), count)
+    report('marshal(dicts)', best(lambda: marshal(dicts, spending_fields)), count)
+    report('Serializer(objects)', best(lambda: spending_serializer(objects)), count)
+    report('Serializer(dicts)', best(lambda: spending_serializer(dicts)), count)
+    report('Serializer.rows(tuples)', best(lambda: spending_serializer.rows(rows)), count)
+    report('Serializer.dumps(objects)', best(lambda: spending_serializer.dumps(objects)), count)
+
+if __name__ == '__main__':
+    main()
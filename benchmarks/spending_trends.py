@@ -0,0 +1,57 @@
+"""
+Benchmark the parent spending trends report: grouping the spendings table
+directly against reading spending_rollups (services/rollups.py), per bucket,
+over three years of skewed spending from generate_data.py.
+
+Run from the project root:
+    python -m benchmarks.spending_trends [families ...]
+"""
+
+import sys
+import time
+from datetime import date, timedelta
+from flask import Flask
+from models import db, Child, ParentChildLink, Spending
+from services.rollups import BUCKETS, spending_trends
+from generate_data import generate
+
+END = date(2025, 6, 1)
+DAYS = 3 * 365
+REPEATS = 5
+
+def timed(child_ids, bucket, rolled_up):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        rows = spending_trends(child_ids, bucket, END - timedelta(days=DAYS), END, by_category=True, rolled_up=rolled_up)
+    return (time.perf_counter() - start) / REPEATS, len(rows)
+
+def run(families):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        generate(families, years=3, end=END, seed=42)
+        # The largest family, as the parent endpoint would ask for it
+        links = db.session.query(ParentChildLink.parent_id, ParentChildLink.child_id).all()
+        by_parent = {}
+        for parent_id, child_id in links:
+            by_parent.setdefault(parent_id, []).append(child_id)
+        family = max(by_parent.values(), key=len)
+        everyone = [child_id for (child_id,) in db.session.query(Child.id)]
+        print(f"{families:,} families, {len(everyone):,} children, {Spending.query.count():,} spendings:")
+        for bucket in BUCKETS:
+            for label, child_ids in (('family', family), ('all', everyone)):
+                raw, rows = timed(child_ids, bucket, False)
+                rolled, _ = timed(child_ids, bucket, True)
+                print(f"  {bucket:5} {label:6} {rows:7,} rows  spendings {raw * 1000:8.1f} ms"
+                      f"  rollups {rolled * 1000:8.1f} ms  x{raw / rolled:5.1f}")
+        db.session.remove()
+        db.drop_all()
+
+def main():
+    for families in [int(arg) for arg in sys.argv[1:]] or [100, 1000]:
+        run(families)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark cold-start time of the web app, the Celery app and a bare import
+
+Each case runs in a fresh interpreter so module caches don't hide import cost.
+
+Run from the project root:
+    python -m benchmarks.startup [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+
+CASES = {
+    'import app (lazy)': 'import app',
+    'web app (createApp)': 'import app; app.createApp()',
+    'celery app (createCeleryApp)': 'import app; app.createCeleryApp()',
+}
+
+TIMER = '''
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+'''
+
+def measure(code, runs):
+    """Return per-run wall times for code in fresh interpreters"""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', TIMER.format(code=code)],
+            capture_output=True, text=True, check=True
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Cold start over {runs} runs (median / min):")
+    for name, code in CASES.items():
+        timings = measure(code, runs)
+        print(f"  {name:30} {statistics.median(timings) * 1000:8.1f} ms / {min(timings) * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark weekly spending reminder preparation: the old per-child loop
+(COUNT, SUM and goals queries per child) against the chunked grouped path
+in services/reminders.py. Both render every email body; nothing is sent.
+
+Run from the project root:
+    python -m benchmarks.weekly_reminders [children ...]
+"""
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+from flask import Flask
+from sqlalchemy import insert, func
+from models import db, User, Child, Goal, Spending
+from services.reminders import weekly_reminder_chunks
+from backend_celery.email_templates import get_weekly_reminder_template
+
+CATEGORIES = ['Food & Drinks', 'Toys & Games', 'Books', 'Clothes', 'Entertainment', 'Other']
+TODAY = date(2025, 6, 1)
+
+def seed(children):
+    rng = random.Random(42)
+    db.session.execute(insert(User), [
+        {'id': i, 'email': f'child{i}@example.com', 'name': f'Child {i}', 'password': 'x',
+         'active': True, 'fs_uniquifier': f'u{i}'}
+        for i in range(1, children + 1)
+    ])
+    db.session.execute(insert(Child), [
+        {'id': i, 'user_id': i, 'total_balance': rng.randint(0, 500)} for i in range(1, children + 1)
+    ])
+    # About half of each child's spendings fall in the reminder week
+    db.session.execute(insert(Spending), [
+        {'child_id': child_id, 'category': rng.choice(CATEGORIES), 'amount': rng.randint(1, 20),
+         'spend_date': TODAY - timedelta(days=rng.randrange(14)), 'description': 'Bench'}
+        for child_id in range(1, children + 1) for _ in range(rng.randrange(10))
+    ])
+    db.session.execute(insert(Goal), [
+        {'child_id': child_id, 'title': f'Goal {n}', 'amount': 150, 'status': rng.choice(['active', 'completed']),
+         'progress_percentage': rng.uniform(0, 100), 'remaining_amount': rng.randint(0, 150)}
+        for child_id in range(1, children + 1) for n in range(rng.randrange(3))
+    ])
+    db.session.commit()
+
+def per_child_loop():
+    """The reminder task before it batched: three queries per child"""
+    week_ago = TODAY - timedelta(days=7)
+    bodies = 0
+    for child in Child.query.join(User).filter(User.active == True).all():
+        if not child.user_account or not child.user_account.email:
+            continue
+        count = Spending.query.filter(
+            Spending.child_id == child.id, Spending.spend_date >= week_ago, Spending.spend_date <= TODAY
+        ).count()
+        total = db.session.query(func.sum(Spending.amount)).filter(
+            Spending.child_id == child.id, Spending.spend_date >= week_ago, Spending.spend_date <= TODAY
+        ).scalar() or 0
+        week_stats = {
+            'entries_count': count,
+            'total_spent': float(total),
+            'current_balance': float(child.total_balance),
+            'avg_per_entry': float(total) / count if count > 0 else 0
+        }
+        goals = [{
+            'title': goal.title,
+            'progress': goal.progress_percentage or 0,
+            'remaining': float(goal.remaining_amount if goal.remaining_amount is not None else goal.amount)
+        } for goal in Goal.query.filter_by(child_id=child.id, status='active').all()]
+        get_weekly_reminder_template(child.user_account.name, week_stats, goals)
+        bodies += 1
+    return bodies
+
+def batched():
+    bodies = 0
+    for chunk in weekly_reminder_chunks(TODAY):
+        for recipient, week_stats, goals in chunk:
+            get_weekly_reminder_template(recipient.name, week_stats, goals)
+            bodies += 1
+    return bodies
+
+def run(children):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(children)
+        print(f"{children:,} children:")
+        for name, fn in (('per-child loop', per_child_loop), ('grouped chunks', batched)):
+            db.session.expire_all()
+            start = time.perf_counter()
+            bodies = fn()
+            seconds = time.perf_counter() - start
+            print(f"  {name:16} {seconds:8.2f} s  {bodies / seconds:9,.0f} emails/s")
+        db.session.remove()
+        db.drop_all()
+
+def main():
+    for children in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]:
+        run(children)
+
+if __name__ == '__main__':
+    main()
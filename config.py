@@ -9,8 +9,73 @@ class LocalDevelopment(Config):
     SECURITY_PASSWORD_SALT =   'meowmeowonasaltybeach'
     SECRET_KEY = 'forinternalsecurity'
     SECURITY_TOKEN_AUTHENTICATION_HEADER = 'Authentication-Token'
+    SECURITY_PASSWORD_HASH_PASSLIB_OPTIONS = {'bcrypt__rounds': 12}
 
-    CACHE_TYPE = 'RedisCache'
+    # Password hashing pool (see services/hashing.py)
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_MAX_PENDING = 16
+    PASSWORD_HASH_TIMEOUT = 10
+    PASSWORD_HASH_RETRY_AFTER = 2
+
+    # Seconds a token principal (id, active, roles) may be served from cache
+    AUTH_PRINCIPAL_CACHE_TIMEOUT = 60
+
+    # Live events (see services/events.py); 'memory' for single-process dev/tests
+    EVENTS_BROKER = 'redis'
+    EVENTS_REDIS_URL = 'redis://localhost:6379/2'
+    EVENTS_QUEUE_SIZE = 100
+    EVENTS_HEARTBEAT = 15
+
+    # Challenge leaderboards (see services/leaderboard.py); boards rebuild from SQL after this many seconds
+    LEADERBOARD_REDIS_URL = 'redis://localhost:6379/3'
+    LEADERBOARD_REBUILD_AFTER = 86400
+
+    # Missed allowance periods paid per schedule in one run (see services/allowance_schedule.py)
+    ALLOWANCE_MAX_CATCH_UP = 12
+
+    # Hourly reminder dispatch (see services/reminders.py): recipients per batch, seconds to spread batches over
+    REMINDER_BATCH_SIZE = 200
+    REMINDER_SPREAD_SECONDS = 3000
+    # Children per grouped-query chunk inside one weekly reminder run
+    REMINDER_CHUNK_SIZE = 500
+
+    # Nightly spending alerts (see services/spending_alerts.py): low balance line, lifetime
+    # milestones, and how far above the trailing daily average a category's day must be
+    LOW_BALANCE_THRESHOLD = 50
+    SPENDING_MILESTONES = (500, 1000, 2500, 5000, 10000, 25000, 50000)
+    SPENDING_ALERT_WINDOW_DAYS = 28
+    SPENDING_ALERT_Z_SCORE = 3.0
+    SPENDING_ALERT_MIN_AMOUNT = 50
+
+    # Parent spending trends read spending_rollups; False aggregates spendings directly (see services/rollups.py)
+    REPORTS_USE_ROLLUPS = True
+
+    # Admin user listing (see services/user_directory.py): search matches counted at most, seconds plain totals are cached
+    ADMIN_USER_COUNT_CAP = 10000
+    ADMIN_USER_COUNT_TIMEOUT = 300
+
+    # Background deletes (see services/deletion.py): rows per committed batch, pause between batches,
+    # seconds the requester is remembered for GET /deletions/<task id>
+    DELETION_BATCH_SIZE = 500
+    DELETION_PAUSE_SECONDS = 0.05
+    DELETION_REQUESTER_TIMEOUT = 86400
+
+    # Most spendings accepted by one POST /api/child/spends/batch
+    SPENDING_BATCH_LIMIT = 100
+
+    # Where background XLSX ledger exports are written, and how long they are kept
+    EXPORT_DIR = 'exports'
+    EXPORT_MAX_AGE_HOURS = 24
+
+    # Task locks and rate limits (see services/locks.py, services/rate_limit.py)
+    COORDINATION_REDIS_URL = 'redis://localhost:6379/5'
+
+    # Metrics (see services/metrics.py); per-process buffers flush into this Redis hash
+    METRICS_REDIS_URL = 'redis://localhost:6379/4'
+    METRICS_FLUSH_INTERVAL = 5
+    METRICS_ALLOWED_ADDRS = ('127.0.0.1', '::1')
+
+    CACHE_TYPE = 'services.metrics.InstrumentedRedisCache'  # RedisCache plus hit/miss counters
     CACHE_DEFAULT_TIMEOUT = 30
     CACHE_REDIS_PORT = 6379
 
@@ -5,6 +5,8 @@ Script to load dummy data for testing the child financial management system
 from app import app
 from models import *
 from flask_security import hash_password
+from services.goal_progress import refresh_goal_progress
+from services.rollups import rebuild_rollups
 from datetime import datetime, date, timedelta
 import random
 
@@ -240,6 +242,8 @@ def create_goals(child_ids):
             )
             db.session.add(goal)
     
+    # Seed stored progress; no achievement emails for dummy data
+    refresh_goal_progress(*child_ids)
     db.session.commit()
     print("Goals created!")
 
@@ -278,6 +282,8 @@ def create_spending_records(child_ids):
             )
             db.session.add(spending)
     
+    db.session.flush()
+    rebuild_rollups(child_ids)
     db.session.commit()
     print("Spending records created!")
 
@@ -358,6 +364,7 @@ def create_challenges():
         db.session.add(challenge)
     
     db.session.commit()
+    app.challenges.invalidate()  # Running web workers drop their cached catalog
     print("Challenges created!")
 
 def create_pocket_money_logs(child_ids, parent_ids):
@@ -392,6 +399,9 @@ def main():
     with app.app_context():
         print("Starting dummy data loading...")
         
+        # Schema is no longer created on import; make sure it exists
+        db.create_all()
+        
         # Clear existing data
         clear_data()
         
@@ -0,0 +1,247 @@
+"""
+Large-scale synthetic data for benchmarks and load tests
+
+Unlike dummy_data.py (a handful of demo accounts), this writes families of
+parents and children with years of spending shaped like real use:
+
+- heavy-tailed activity: a child's spendings per day follow a Pareto
+  distribution, so a few children log far more than most, and some stop
+  using the app after a while
+- seasonality: weekends, festive months and summer spend more
+- growth: more children join late in the history than early
+- family sizes from one child to a long tail of large families
+- lognormal amounts per category, weekly allowances that keep balances
+  positive, and a few goals per child
+
+Rows go in through executemany on the raw SQLite connection in chunks, in
+one transaction, with explicit ids so related rows need no round trips.
+Nothing needs Redis, Celery or the network, so it runs anywhere:
+
+    python generate_data.py --families 20000 --years 3 --database sqlite:///bench.sqlite3
+"""
+
+import bisect
+import math
+import random
+import time
+from datetime import date, timedelta
+import click
+from flask import Flask
+from sqlalchemy import func, text
+from models import db, User, Role, Child, Parent
+from services.rollups import rebuild_rollups
+
+# category: (median amount, lognormal sigma, descriptions)
+CATEGORIES = {
+    'Food & Drinks': (40, 0.6, ['Snack at school', 'Ice cream', 'Juice', 'Canteen lunch']),
+    'Entertainment': (180, 0.8, ['Movie ticket', 'Arcade', 'Bowling', 'Game top-up']),
+    'Toys & Games': (250, 0.9, ['Trading cards', 'Puzzle', 'Board game', 'Action figure']),
+    'Books & Education': (150, 0.7, ['Comic book', 'Notebook', 'Storybook', 'Art supplies']),
+    'Clothes': (400, 0.8, ['T-shirt', 'Socks', 'Cap', 'Shoes']),
+    'Gifts': (300, 0.7, ['Birthday gift', 'Gift for friend', 'Festival gift']),
+    'Other': (80, 1.0, ['Stationery', 'Donation', 'Bus fare', 'Miscellaneous']),
+}
+# Most children favour a few categories; these are the mean shares
+CATEGORY_SHARES = [30, 18, 15, 12, 10, 5, 10]
+
+# children per family: relative weight
+FAMILY_SIZES = {1: 40, 2: 35, 3: 14, 4: 6, 5: 3, 6: 1, 8: 0.6, 12: 0.4}
+
+# Spending multipliers; Monday is 0
+WEEKDAY_WEIGHTS = (0.8, 0.8, 0.85, 0.9, 1.1, 1.5, 1.4)
+MONTH_WEIGHTS = (0.9, 0.85, 0.9, 1.0, 1.15, 1.2, 1.0, 0.95, 0.95, 1.2, 1.3, 1.35)
+
+TIMEZONES = {'Asia/Kolkata': 85, 'Asia/Dubai': 5, 'Europe/London': 4, 'America/New_York': 3, 'Asia/Singapore': 3}
+NOTIFICATION_MODES = {'instant': 70, 'daily': 20, 'weekly': 10}
+
+# Column lists for the bulk inserts, in foreign key order
+INSERTS = {
+    'user': ('id', 'name', 'email', 'password', 'fs_uniquifier', 'active', 'timezone', 'reminder_hour',
+             'notification_mode'),
+    'user_roles': ('user_id', 'role_id'),
+    'parents': ('id', 'user_id'),
+    'children': ('id', 'user_id', 'total_balance'),
+    'parent_child_links': ('parent_id', 'child_id', '"primary"'),
+    'spendings': ('child_id', 'category', 'amount', 'spend_date', 'description'),
+    'pocket_money': ('child_id', 'parent_id', 'amount', 'date_given', 'recurring', 'recurring_schedule', 'stored_in'),
+    'goals': ('child_id', 'title', 'amount', 'deadline', 'status', 'progress_percentage', 'remaining_amount'),
+}
+
+
+def generate(families, years=3, end=None, seed=0, password='x', spends_per_day=0.6, activity_alpha=1.6,
+             churn=0.25, chunk_size=50_000, progress=None) -> dict:
+    """
+    Add `families` families with up to `years` of history ending on `end`
+    (default today), in the current app's database, and rebuild their
+    spending rollups. Commits.
+
+    spends_per_day is the mean for an active child; activity_alpha is the
+    Pareto shape of per-child activity (lower is more skewed). churn is the
+    share of children who stop before `end`. `password` is stored as-is,
+    so pass a hash when the accounts should be able to log in.
+
+    Returns row counts and seconds taken.
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    end = end or date.today()
+    days = [end - timedelta(days=offset) for offset in range(int(years * 365) - 1, -1, -1)]
+    stamps = [day.isoformat() for day in days]
+    cumulative = list(_cumulative(_day_weight(day) for day in days))
+    role_ids = _role_ids('parent', 'child')
+    writer = _BulkWriter(db.session.connection(), chunk_size)
+
+    next_user = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+    next_parent = (db.session.query(func.max(Parent.id)).scalar() or 0) + 1
+    next_child = first_child = (db.session.query(func.max(Child.id)).scalar() or 0) + 1
+    sizes, size_weights = list(FAMILY_SIZES), list(FAMILY_SIZES.values())
+    # Pareto(alpha) has mean alpha / (alpha - 1); scale so the mean rate is spends_per_day
+    rate_scale = spends_per_day * (activity_alpha - 1) / activity_alpha
+
+    for family in range(families):
+        parent_user, next_user = next_user, next_user + 1
+        parent_id, next_parent = next_parent, next_parent + 1
+        writer.add('user', _user_row(rng, parent_user, 'parent', password))
+        writer.add('user_roles', (parent_user, role_ids['parent']))
+        writer.add('parents', (parent_id, parent_user))
+
+        for position in range(rng.choices(sizes, size_weights)[0]):
+            child_user, next_user = next_user, next_user + 1
+            child_id, next_child = next_child, next_child + 1
+            writer.add('user', _user_row(rng, child_user, 'child', password))
+            writer.add('user_roles', (child_user, role_ids['child']))
+
+            # Joined late more often than early; some stop before the end
+            first = min(int(len(days) * (1 - rng.random() ** 2)), len(days) - 1)
+            last = len(days) if rng.random() >= churn else rng.randint(first + 1, len(days))
+            rate = min(rate_scale * rng.paretovariate(activity_alpha), 25)
+            spendings, spent = _spendings(rng, child_id, stamps, cumulative, first, last, rate)
+
+            # Allowances cover the spending, so balances stay positive
+            weeks = max((last - first) // 7, 1)
+            allowance = max(round(spent / weeks * rng.uniform(1.05, 1.5)), 50)
+            balance = round(allowance * math.ceil((len(days) - first) / 7) - spent, 2)
+
+            writer.add('children', (child_id, child_user, balance))
+            writer.add('parent_child_links', (parent_id, child_id, int(position == 0)))
+            for row in spendings:
+                writer.add('spendings', row)
+            for offset in range(first, len(days), 7):
+                writer.add('pocket_money', (child_id, parent_id, allowance, stamps[offset], 1, 'weekly', 'wallet'))
+            for goal in range(rng.choice([0, 1, 1, 2, 3])):
+                target = rng.choice([500, 1000, 2500, 5000])
+                writer.add('goals', (
+                    child_id, f'Goal {goal + 1}', target, (end + timedelta(days=rng.randint(7, 180))).isoformat(),
+                    'active', min(balance / target * 100, 100), max(target - balance, 0)
+                ))
+
+        if progress and (family + 1) % 1000 == 0:
+            progress(family + 1, writer.counts.get('spendings', 0))
+
+    writer.flush()
+    child_ids = list(range(first_child, next_child))
+    for start in range(0, len(child_ids), 500):
+        rebuild_rollups(child_ids[start:start + 500])
+    db.session.commit()
+
+    counts = dict(writer.counts)
+    counts['seconds'] = time.perf_counter() - started
+    return counts
+
+def _spendings(rng, child_id, stamps, cumulative, first, last, rate) -> tuple:
+    """(spending rows, total) for seasonally weighted days in [first, last)"""
+    low = cumulative[first - 1] if first else 0
+    span = cumulative[last - 1] - low
+    expected = rate * (last - first)
+    count = int(expected) + (rng.random() < expected - int(expected))
+
+    names = list(CATEGORIES)
+    # Each child's own category mix around the mean shares
+    mix = [rng.gammavariate(share / 5, 1) for share in CATEGORY_SHARES]
+    scale = rng.lognormvariate(0, 0.4)
+    rows = []
+    total = 0
+    for category in rng.choices(names, mix, k=count):
+        median, sigma, descriptions = CATEGORIES[category]
+        amount = max(round(rng.lognormvariate(math.log(median * scale), sigma), 2), 1)
+        day = stamps[bisect.bisect_right(cumulative, low + rng.random() * span, first, last - 1)]
+        rows.append((child_id, category, amount, day, rng.choice(descriptions)))
+        total += amount
+    return rows, round(total, 2)
+
+def _user_row(rng, user_id, role, password):
+    return (
+        user_id, f'{role.title()} {user_id}', f'{role}{user_id}@generated.example', password, f'gen-{user_id}', 1,
+        rng.choices(list(TIMEZONES), list(TIMEZONES.values()))[0], rng.randint(16, 20),
+        rng.choices(list(NOTIFICATION_MODES), list(NOTIFICATION_MODES.values()))[0]
+    )
+
+def _day_weight(day):
+    return WEEKDAY_WEIGHTS[day.weekday()] * MONTH_WEIGHTS[day.month - 1]
+
+def _cumulative(weights):
+    total = 0
+    for weight in weights:
+        total += weight
+        yield total
+
+def _role_ids(*names) -> dict:
+    for name in names:
+        if not Role.query.filter_by(name=name).first():
+            db.session.add(Role(name=name, description=f'{name} user'))
+    db.session.flush()
+    return {role.name: role.id for role in Role.query.filter(Role.name.in_(names))}
+
+class _BulkWriter:
+    """Buffers rows per table and writes them with executemany, parents before children"""
+
+    def __init__(self, connection, chunk_size):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.rows = {table: [] for table in INSERTS}
+        self.counts = {}
+
+    def add(self, table, row):
+        self.rows[table].append(row)
+        if len(self.rows[table]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for table, columns in INSERTS.items():
+            rows = self.rows[table]
+            if not rows:
+                continue
+            self.connection.exec_driver_sql(
+                f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})', rows
+            )
+            self.counts[table] = self.counts.get(table, 0) + len(rows)
+            self.rows[table] = []
+
+@click.command()
+@click.option('--families', default=1000, show_default=True, help='Families to add')
+@click.option('--years', default=3.0, show_default=True, help='Years of history')
+@click.option('--database', default='sqlite:///database.sqlite3', show_default=True, help='SQLAlchemy URL')
+@click.option('--seed', default=0, show_default=True, help='Random seed')
+@click.option('--spends-per-day', default=0.6, show_default=True, help="Mean spendings per active child's day")
+@click.option('--alpha', default=1.6, show_default=True, help='Pareto shape of per-child activity')
+@click.option('--churn', default=0.25, show_default=True, help='Share of children who stop early')
+def main(families, years, database, seed, spends_per_day, alpha, churn):
+    """Add generated families to a database, creating its tables if needed"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(text('PRAGMA synchronous = OFF'))
+        counts = generate(
+            families, years, seed=seed, spends_per_day=spends_per_day, activity_alpha=alpha, churn=churn,
+            progress=lambda done, spendings: click.echo(f'{done:,} families, {spendings:,} spendings')
+        )
+        seconds = counts.pop('seconds')
+        for table, count in counts.items():
+            click.echo(f'{table:20} {count:12,}')
+        rows = sum(counts.values())
+        click.echo(f'{rows:,} rows in {seconds:.1f} s ({rows / seconds * 60:,.0f} rows/min)')
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,14 @@
+import click
 from flask import current_app as app
+from flask.cli import with_appcontext
 from models import db, Goal, Child
 from flask_security import SQLAlchemySessionUserDatastore, hash_password
 from datetime import datetime
+from services.allowance_schedule import backfill_schedules
+from services.rollups import rebuild_rollups
 
-with app.app_context():
+def init_db():
+    """Create the schema and seed roles and default accounts"""
     db.create_all()
     userdatastore : SQLAlchemySessionUserDatastore = app.security.datastore
     userdatastore.find_or_create_role(name='admin', description='admin')
@@ -25,4 +30,26 @@ with app.app_context():
     # if not Quiz.query.first():
     #     default_quiz = Quiz(chapter_id=1, remarks="This is a default quiz.",creation_date=datetime.strptime("01-01-2025", "%d-%m-%Y"), date_of_quiz = datetime.strptime("01-01-2025", "%d-%m-%Y"), time_duration= "00:00")
     #     db.session.add(default_quiz)
-    db.session.commit()
\ No newline at end of file
+    db.session.commit()
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create tables and seed roles (flask --app app init-db)"""
+    init_db()
+    click.echo('Database initialised')
+
+@click.command('backfill-allowance-schedules')
+@with_appcontext
+def backfill_allowance_schedules_command():
+    """Create schedules for recurring allowances made before schedules existed"""
+    count = backfill_schedules()
+    click.echo(f'{count} allowance schedules created')
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute spending_rollups from spendings, e.g. for a database older than the rollups"""
+    rebuild_rollups()
+    db.session.commit()
+    click.echo('Spending rollups rebuilt')
@@ -22,6 +22,11 @@ class User(db.Model, UserMixin):
     password = db.Column(db.String(255), nullable=False)  # Will store hashed password
     fs_uniquifier = db.Column(db.String, unique=True, nullable=False)
     active = db.Column(db.Boolean, default=True)
+    # When reminders are sent, in the user's own time (see services/reminders.py)
+    timezone = db.Column(db.String(50), nullable=False, default='Asia/Kolkata', server_default='Asia/Kolkata')
+    reminder_hour = db.Column(db.Integer, nullable=False, default=18, server_default='18')
+    # 'instant' emails each notification; 'daily' / 'weekly' combine them into one digest (see services/notifications.py)
+    notification_mode = db.Column(db.String(10), nullable=False, default='instant', server_default='instant')
     roles = db.relationship('Role', backref='user', secondary= 'user_roles')
     # Relationships
     children = db.relationship('Child', backref='user_account', lazy=True)
@@ -29,6 +34,13 @@ class User(db.Model, UserMixin):
     teachers = db.relationship('Teacher', backref='user_account', lazy=True)
     schools = db.relationship('School', backref='user_account', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_user_reminder_slot', 'timezone', 'reminder_hour'),
+        # Admin listing sorts and prefix-searches case-insensitively (see services/user_directory.py)
+        db.Index('ix_user_name_lower', db.func.lower(name)),
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+    )
+
 class Role(db.Model, RoleMixin):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, unique=True, nullable = False)
@@ -39,6 +51,11 @@ class UserRoles(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     role_id = db.Column(db.Integer, db.ForeignKey('role.id'))
 
+    __table_args__ = (
+        db.Index('ix_user_roles_user', 'user_id', 'role_id'),
+        db.Index('ix_user_roles_role', 'role_id', 'user_id'),
+    )
+
 class School(db.Model):
     __tablename__ = 'schools'
     
@@ -68,6 +85,7 @@ class Child(db.Model):
     spendings = db.relationship('Spending', backref='child', lazy=True)
     challenge_progress = db.relationship('ChallengeProgress', backref='child', lazy=True)
     notes_received = db.relationship('NotesEncouragement', backref='child', lazy=True)
+    allowance_schedules = db.relationship('AllowanceSchedule', backref='child', lazy=True)
 
 class Parent(db.Model):
     __tablename__ = 'parents'
@@ -78,6 +96,7 @@ class Parent(db.Model):
     # Relationships
     child_links = db.relationship('ParentChildLink', backref='parent', lazy=True)
     pocket_money_given = db.relationship('PocketMoney', backref='parent', lazy=True)
+    allowance_schedules = db.relationship('AllowanceSchedule', backref='parent', lazy=True)
 
 class Teacher(db.Model):
     __tablename__ = 'teachers'
@@ -112,12 +131,33 @@ class PocketMoney(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False)
-    parent_id = db.Column(db.Integer, db.ForeignKey('parents.id'), nullable=False)
+    parent_id = db.Column(db.Integer, db.ForeignKey('parents.id'))  # None once the parent's account is deleted
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     date_given = db.Column(db.Date, nullable=False)
     recurring = db.Column(db.Boolean, default=False)
     recurring_schedule = db.Column(db.String(50))  # 'weekly', 'monthly', etc.
     stored_in = db.Column(db.String(100))  # 'wallet', 'bank_account', etc.
+    schedule_id = db.Column(db.Integer, db.ForeignKey('allowance_schedules.id'), index=True)  # Set on recurring payments
+
+class AllowanceSchedule(db.Model):
+    """A recurring allowance; the daily task pays rows whose next_due_at has passed"""
+    __tablename__ = 'allowance_schedules'
+
+    id = db.Column(db.Integer, primary_key=True)
+    child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False)
+    parent_id = db.Column(db.Integer, db.ForeignKey('parents.id'), nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    stored_in = db.Column(db.String(100))
+    rule = db.Column(db.String(20), nullable=False)  # 'daily', 'weekly', 'fortnightly', 'monthly', 'cron'
+    cron = db.Column(db.String(100))  # 'minute hour day month weekday' when rule is 'cron'
+    anchor_date = db.Column(db.Date, nullable=False)  # First payment; monthly keeps its day of month
+    next_due_at = db.Column(db.DateTime, nullable=False)
+    last_paid_at = db.Column(db.DateTime)
+    active = db.Column(db.Boolean, default=True, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_allowance_schedules_due', 'active', 'next_due_at'),
+    )
     
 class PocketMoneyLog(db.Model):
     __tablename__ = 'pocket_money_logs'
@@ -128,6 +168,41 @@ class PocketMoneyLog(db.Model):
     date = db.Column(db.Date, nullable=False)
     source = db.Column(db.String(100))  # 'allowance', 'chores', 'gift', etc.
     destination = db.Column(db.String(100))  # 'spent', 'saved', 'donated', etc.
+    
+    __table_args__ = (
+        db.Index('ix_pocket_money_logs_child_date', 'child_id', 'date'),
+    )
+
+class FamilySummary(db.Model):
+    """A parent's family report for one day or week, stored once by the batch jobs"""
+    __tablename__ = 'family_summaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    parent_id = db.Column(db.Integer, db.ForeignKey('parents.id'), nullable=False)
+    period = db.Column(db.String(10), nullable=False)  # 'daily', 'weekly'
+    period_start = db.Column(db.Date, nullable=False)
+    period_end = db.Column(db.Date, nullable=False)
+    data = db.Column(db.Text, nullable=False)  # Compact JSON: summary and children_data
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('parent_id', 'period', 'period_start', name='ux_family_summaries_period'),
+    )
+
+class PendingNotification(db.Model):
+    """A notification waiting for its user's next digest email"""
+    __tablename__ = 'pending_notifications'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)  # key of services.notifications.TEMPLATES
+    subject = db.Column(db.String(200), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON arguments for the kind's fragment
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_pending_notifications_user', 'user_id', 'id'),
+    )
 
 class PocketMoneyPlace(db.Model):
     __tablename__ = 'pocket_money_places'
@@ -141,11 +216,14 @@ class Goal(db.Model):
     __tablename__ = 'goals'
     
     id = db.Column(db.Integer, primary_key=True)
-    child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False)
+    child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     deadline = db.Column(db.Date)
     status = db.Column(db.String(20), default='active')  # 'active', 'completed', 'cancelled', 'waiting for approval'
+    # Maintained from the child's balance by services/goal_progress.py
+    progress_percentage = db.Column(db.Float, default=0.0)
+    remaining_amount = db.Column(db.Numeric(10, 2))
 
 class Spending(db.Model):
     __tablename__ = 'spendings'
@@ -156,6 +234,27 @@ class Spending(db.Model):
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     spend_date = db.Column(db.Date, nullable=False)
     description = db.Column(db.Text)
+    client_key = db.Column(db.String(64))  # Idempotency key from offline/batch uploads
+    
+    __table_args__ = (
+        db.Index('ix_spendings_child_date', 'child_id', 'spend_date'),
+        db.Index('ux_spendings_child_client_key', 'child_id', 'client_key', unique=True),
+    )
+
+class SpendingRollup(db.Model):
+    """Spending per child, day and category, kept in step with spendings (see services/rollups.py)"""
+    __tablename__ = 'spending_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    entries = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('child_id', 'day', 'category', name='ux_spending_rollups_child_day_category'),
+    )
 
 class Challenge(db.Model):
     __tablename__ = 'challenges'
@@ -177,6 +276,11 @@ class ChallengeProgress(db.Model):
     child_id = db.Column(db.Integer, db.ForeignKey('children.id'), nullable=False)
     challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False)
     status = db.Column(db.String(20), default='started')  # 'started', 'completed', 'abandoned'
+    completed_on = db.Column(db.DateTime)  # Orders challenge leaderboards
+    
+    __table_args__ = (
+        db.Index('ix_challenge_progress_child_challenge', 'child_id', 'challenge_id'),
+    )
 
 class NotesEncouragement(db.Model):
     __tablename__ = 'notes_encouragement'
@@ -1,9 +1,14 @@
-from flask_restful import Api, Resource, fields, marshal_with
+from flask_restful import Api, Resource, fields, marshal, marshal_with
 from flask_security import auth_required, current_user
-from flask import request
+from flask import request, current_app as app
 from models import db, User, Role
 from sqlalchemy.exc import IntegrityError
+from services.user_directory import SORTS, user_page, count_users
+from backend_celery.tasks import delete_records
+from services.deletion import remember_requester
 
+principals = app.principals
+cache = app.cache
 admin_api = Api(prefix='/api/admin')
 
 # Serializers
@@ -15,6 +20,14 @@ user_fields = {
     'roles': fields.List(fields.String)
 }
 
+user_page_fields = {
+    'users': fields.List(fields.Nested(user_fields)),
+    'total': fields.Integer,
+    'total_is_estimate': fields.Boolean,
+    'next_cursor': fields.String,
+    'limit': fields.Integer
+}
+
 role_fields = {
     'id': fields.Integer,
     'name': fields.String,
@@ -29,25 +42,62 @@ def is_admin():
 
 class AdminUserApi(Resource):
     @auth_required('token')
-    @marshal_with(user_fields)
     def get(self):
-        """List all users or filter by role"""
+        """
+        One page of users
+        Query: role, q (email or name prefix), sort=id|name|email (prefix - for
+        descending), limit (default 50, at most 200), cursor (next_cursor of
+        the previous page)
+        """
         if not is_admin():
             return {'message': 'Not authorized'}, 403
 
-        role_filter = request.args.get('role')
-        if role_filter:
-            users = User.query.join(User.roles).filter(Role.name == role_filter).all()
-        else:
-            users = User.query.all()
+        role_filter = request.args.get('role') or None
+        prefix = request.args.get('q', '').strip() or None
+        sort = request.args.get('sort', 'id')
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-')
+        if sort not in SORTS:
+            return {'message': f"sort must be one of: {', '.join(SORTS)}"}, 400
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
 
-        for user in users:
-            user.roles = [r.name for r in user.roles]
-        return users
+        try:
+            users, next_cursor = user_page(role_filter, prefix, sort, descending, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        # Searches count at most a capped number of matches; plain and
+        # per-role totals are counted exactly but cached for a few minutes
+        if prefix:
+            total, estimated = count_users(role_filter, prefix, cap=app.config.get('ADMIN_USER_COUNT_CAP', 10000))
+        else:
+            key = f'admin_user_count:{role_filter or "*"}'
+            total = cache.get(key)
+            if total is None:
+                total, _ = count_users(role_filter)
+                cache.set(key, total, timeout=app.config.get('ADMIN_USER_COUNT_TIMEOUT', 300))
+            estimated = True
+
+        return marshal({
+            'users': [{
+                'id': user.id,
+                'name': user.name,
+                'email': user.email,
+                'active': user.active,
+                'roles': [role.name for role in user.roles]
+            } for user in users],
+            'total': total,
+            'total_is_estimate': estimated,
+            'next_cursor': next_cursor,
+            'limit': limit
+        }, user_page_fields)
 
     @auth_required('token')
     def delete(self, user_id):
-        """Delete user"""
+        """
+        Delete a user and everything that depends on them in the background
+        The account is deactivated at once, so it can't sign in meanwhile
+        """
         if not is_admin():
             return {'message': 'Not authorized'}, 403
 
@@ -55,9 +105,16 @@ class AdminUserApi(Resource):
         if not user:
             return {'message': 'User not found'}, 404
 
-        db.session.delete(user)
+        user.active = False
         db.session.commit()
-        return {'message': f'User {user_id} deleted'}, 200
+        principals.invalidate(user.fs_uniquifier)
+        task = delete_records.delay('user', user.id, current_user.id)
+        remember_requester(task.id, current_user.id)
+        return {
+            'message': f'User {user_id} is being deleted',
+            'task_id': task.id,
+            'status_url': f'/deletions/{task.id}'
+        }, 202
 
     @auth_required('token')
     def patch(self, user_id):
@@ -77,6 +134,7 @@ class AdminUserApi(Resource):
 
         user.active = active_status
         db.session.commit()
+        principals.invalidate(user.fs_uniquifier)
         return {'message': f"User {'activated' if active_status else 'deactivated'}"}, 200
 
     @auth_required('token')
@@ -105,6 +163,7 @@ class AdminUserApi(Resource):
                 return {'message': f'Role not found: {role_name}'}, 400
 
         db.session.commit()
+        principals.invalidate(user.fs_uniquifier)
         return {'message': 'Roles updated successfully'}, 200
 
 # ------------------ Role Management ------------------
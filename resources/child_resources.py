@@ -4,8 +4,20 @@ from models import Goal, Child, User, db
 from flask_security import auth_required, current_user
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
-from models import PocketMoneyPlace, PocketMoneyLog, Challenge, ChallengeProgress, Spending
+from models import PocketMoneyPlace, Challenge, ChallengeProgress, Spending
 from sqlalchemy import func, desc
+from services.serializers import Serializer, serialize_with
+from services.versioning import conditional_get, touch_children
+from services.events import publish
+from services.goal_progress import refresh_goal_progress, notify_goal_achievements
+from services.challenges import child_challenge_progress
+from services.leaderboard import record_challenge_completion
+from services.rollups import roll_spending, roll_many
+from services.child_data import (
+    adjust_balance, retry_on_conflict, InsufficientBalance, balance_breakdown, spending_query, spending_by_category,
+    challenge_history, record_spendings, SUGGESTED_CATEGORIES
+)
+from decimal import Decimal, InvalidOperation
 
 cache = app.cache
 child_api = Api(prefix='/api/child')
@@ -23,6 +35,7 @@ goal_fields = {
     'remaining_amount': fields.Float,
     'progress_percentage': fields.Float,
 }
+goal_serializer = Serializer(goal_fields)
 
 # --------------------------Goal Management-----------------------------
 
@@ -52,10 +65,8 @@ class GoalApi(Resource):
         if not self._check_goal_access(goal):
             return {'message': 'Not authorized to view this goal'}, 403
         
-        # Add calculated fields
+        # Progress is stored by refresh_goal_progress; only the name is added
         goal.child_name = goal.child.user_account.name if goal.child and goal.child.user_account else None
-        goal.remaining_amount = float(goal.amount) - float(goal.child.total_balance) if goal.child else float(goal.amount)
-        goal.progress_percentage = (float(goal.child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 and goal.child else 0
         
         return goal
     
@@ -82,12 +93,13 @@ class GoalApi(Resource):
             if 'status' in data and data['status'] in ['active', 'completed', 'cancelled', 'waiting for approval']:
                 goal.status = data['status']
             
+            reached = refresh_goal_progress(goal.child_id)
             db.session.commit()
+            touch_children(goal.child_id)
+            notify_goal_achievements(reached)
             
-            # Add calculated fields for response
+            # Add child name for response
             goal.child_name = goal.child.user_account.name if goal.child and goal.child.user_account else None
-            goal.remaining_amount = float(goal.amount) - float(goal.child.total_balance) if goal.child else float(goal.amount)
-            goal.progress_percentage = (float(goal.child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 and goal.child else 0
             
             return goal, 200
             
@@ -109,8 +121,10 @@ class GoalApi(Resource):
             return {'message': 'Not authorized to delete this goal'}, 403
         
         try:
+            child_id = goal.child_id
             db.session.delete(goal)
             db.session.commit()
+            touch_children(child_id)
             return {'message': 'Goal deleted successfully'}, 200
         except Exception as e:
             db.session.rollback()
@@ -138,7 +152,7 @@ class GoalApi(Resource):
 class GoalListApi(Resource):
     @auth_required('token')
     @cache.cached(timeout=5)
-    @marshal_with(goal_fields)
+    @serialize_with(goal_serializer)
     def get(self):
         return self.fetch_all_goals()
     
@@ -162,11 +176,9 @@ class GoalListApi(Resource):
         else:
             goals = []
         
-        # Add calculated fields to each goal
+        # Add child names; progress is stored on the goal
         for goal in goals:
             goal.child_name = goal.child.user_account.name if goal.child and goal.child.user_account else None
-            goal.remaining_amount = float(goal.amount) - float(goal.child.total_balance) if goal.child else float(goal.amount)
-            goal.progress_percentage = (float(goal.child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 and goal.child else 0
         
         return goals
     
@@ -219,12 +231,13 @@ class GoalListApi(Resource):
             )
             
             db.session.add(goal)
+            reached = refresh_goal_progress(child_id)
             db.session.commit()
+            touch_children(child_id)
+            notify_goal_achievements(reached)
             
-            # Add calculated fields for response
+            # Add child name for response
             goal.child_name = goal.child.user_account.name if goal.child and goal.child.user_account else None
-            goal.remaining_amount = float(goal.amount) - float(goal.child.total_balance) if goal.child else float(goal.amount)
-            goal.progress_percentage = (float(goal.child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 and goal.child else 0
             
             return goal, 201
             
@@ -242,7 +255,7 @@ class GoalListApi(Resource):
 class ChildGoalsApi(Resource):
     @auth_required('token')
     @cache.cached(timeout=5)
-    @marshal_with(goal_fields)
+    @serialize_with(goal_serializer)
     def get(self, child_id):
         return self.fetch_child_goals(child_id)
     
@@ -258,11 +271,9 @@ class ChildGoalsApi(Resource):
         
         goals = Goal.query.filter_by(child_id=child_id).all()
         
-        # Add calculated fields
+        # Add child names; progress is stored on the goal
         for goal in goals:
             goal.child_name = child.user_account.name if child.user_account else None
-            goal.remaining_amount = float(goal.amount) - float(child.total_balance)
-            goal.progress_percentage = (float(child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 else 0
         
         return goals
     
@@ -298,6 +309,17 @@ spending_fields = {
     'description': fields.String,
     'child_name': fields.String,
 }
+spending_serializer = Serializer(spending_fields)
+
+def spending_delta(spend):
+    """Compact spending payload for live events"""
+    return {
+        'id': spend.id,
+        'category': spend.category,
+        'amount': float(spend.amount),
+        'spend_date': spend.spend_date.isoformat(),
+        'description': spend.description
+    }
 
 # --------------------------Spending Management-----------------------------
 class SpendingApi(Resource):
@@ -334,7 +356,7 @@ class SpendingApi(Resource):
         return spend
 
     def update_spending_details(self, spend_id):
-        """Update spending record following child_routes.py pattern"""
+        """Update spending record and adjust the balance"""
         if 'child' in current_user.roles:
             child = Child.query.filter_by(user_id=current_user.id).first()
             if not child:
@@ -350,27 +372,47 @@ class SpendingApi(Resource):
         if not data:
             return {'message': 'No data provided'}, 400
 
-        try:
+        def update(spend):
             old_amount = float(spend.amount)
+            old_day, old_category = spend.spend_date, spend.category
+            reached = []
             
             if 'category' in data:
                 spend.category = data['category']
             if 'amount' in data:
                 new_amount = float(data['amount'])
-                # Adjust balance based on amount change
-                balance_change = old_amount - new_amount
-                child.total_balance += balance_change
                 spend.amount = new_amount
+                # Adjust balance based on amount change
+                reached = adjust_balance(child, old_amount - new_amount)
             if 'spend_date' in data:
                 spend.spend_date = datetime.strptime(data['spend_date'], '%Y-%m-%d').date()
             if 'description' in data:
                 spend.description = data['description']
+            roll_many([
+                (child.id, old_day, old_category, -old_amount, -1),
+                (child.id, spend.spend_date, spend.category, spend.amount, 1)
+            ])
 
             db.session.commit()
+            return reached
+
+        try:
+            # A rerun after a lock conflict starts from the reloaded row
+            reached = retry_on_conflict(lambda: update(db.session.get(Spending, spend_id)))
+            audiences = touch_children(child.id)
+            notify_goal_achievements(reached)
+            publish(audiences[child.id], 'spending.updated', {
+                'child_id': child.id,
+                'spending': spending_delta(spend),
+                'total_balance': float(child.total_balance)
+            })
             
             spend.child_name = child.user_account.name if child.user_account else None
             return spend, 200
 
+        except InsufficientBalance:
+            db.session.rollback()
+            return {'message': 'Insufficient balance'}, 400
         except Exception as e:
             db.session.rollback()
             return {'message': f'Error updating spending record: {str(e)}'}, 400
@@ -388,11 +430,23 @@ class SpendingApi(Resource):
         if not spend:
             return {'message': 'Spending record not found'}, 404
 
-        try:
+        def remove(spend):
             # Restore balance
-            child.total_balance += float(spend.amount)
+            reached = adjust_balance(child, spend.amount)
+            roll_spending(child.id, spend.spend_date, spend.category, -spend.amount, -1)
             db.session.delete(spend)
             db.session.commit()
+            return reached
+
+        try:
+            reached = retry_on_conflict(lambda: remove(db.session.get(Spending, spend_id)))
+            audiences = touch_children(child.id)
+            notify_goal_achievements(reached)
+            publish(audiences[child.id], 'spending.deleted', {
+                'child_id': child.id,
+                'spending_id': spend_id,
+                'total_balance': float(child.total_balance)
+            })
             
             return {'message': 'Spending record deleted successfully', 'new_balance': float(child.total_balance)}, 200
         except Exception as e:
@@ -401,8 +455,8 @@ class SpendingApi(Resource):
 
 class SpendingListApi(Resource):
     @auth_required('token')
-    @cache.cached(timeout=5)
-    @marshal_with(spending_fields)
+    @conditional_get
+    @serialize_with(spending_serializer)
     def get(self):
         return self.fetch_all_spendings()
 
@@ -412,7 +466,7 @@ class SpendingListApi(Resource):
         return self.create_new_spending()
 
     def fetch_all_spendings(self):
-        """Fetch spending records with filtering options like child_routes.py"""
+        """Fetch spending records with filtering options"""
         if 'child' in current_user.roles:
             child = Child.query.filter_by(user_id=current_user.id).first()
             if not child:
@@ -420,27 +474,21 @@ class SpendingListApi(Resource):
         else:
             return {'message': 'Not authorized'}, 403
 
-        # Get query parameters for filtering (matching child_routes.py)
+        # Get query parameters for filtering
         category = request.args.get('category')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         limit = request.args.get('limit', 50, type=int)
 
-        query = Spending.query.filter_by(child_id=child.id)
-
-        if category:
-            query = query.filter(Spending.category == category)
-        if start_date:
-            query = query.filter(Spending.spend_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-        if end_date:
-            query = query.filter(Spending.spend_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-
-        spendings = query.order_by(Spending.spend_date.desc()).limit(limit).all()
-
-        for spending in spendings:
-            spending.child_name = child.user_account.name if child.user_account else None
+        spendings = spending_query(
+            child.id,
+            category=category,
+            start_date=datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None,
+            end_date=datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        ).limit(limit).all()
+        child_name = child.user_account.name if child.user_account else None
 
-        return spendings
+        return spending_serializer.rows((*row, child_name) for row in spendings)
 
     def create_new_spending(self):
         """Create spending record with balance validation"""
@@ -460,32 +508,116 @@ class SpendingListApi(Resource):
             if field not in data:
                 return {'message': f'Missing required field: {field}'}, 400
 
-        # Check if child has enough balance
-        if float(data['amount']) > float(child.total_balance):
+        # Check if child has enough balance, in the same Decimal the column stores
+        try:
+            amount = Decimal(str(data['amount']))
+        except InvalidOperation:
+            return {'message': 'Invalid amount'}, 400
+        if not amount.is_finite() or amount <= 0:
+            return {'message': 'Invalid amount'}, 400
+        if amount > child.total_balance:
             return {'message': 'Insufficient balance'}, 400
 
-        try:
+        def create():
             spending = Spending(
                 child_id=child.id,
                 category=data['category'],
-                amount=data['amount'],
+                amount=amount,
                 spend_date=datetime.strptime(data['spend_date'], '%Y-%m-%d').date(),
                 description=data.get('description', '')
             )
 
-            # Update child's balance
-            child.total_balance -= float(data['amount'])
-
+            # Debit only if the stored balance still covers it
             db.session.add(spending)
+            adjust_balance(child, -amount)
+            roll_spending(child.id, spending.spend_date, spending.category, amount)
             db.session.commit()
+            return spending
+
+        try:
+            spending = retry_on_conflict(create)
+            audiences = touch_children(child.id)
+            publish(audiences[child.id], 'spending.created', {
+                'child_id': child.id,
+                'spending': spending_delta(spending),
+                'total_balance': float(child.total_balance)
+            })
 
             spending.child_name = child.user_account.name if child.user_account else None
             return spending, 201
 
+        except InsufficientBalance:
+            db.session.rollback()
+            return {'message': 'Insufficient balance'}, 400
         except Exception as e:
             db.session.rollback()
             return {'message': f'Error creating spending record: {str(e)}'}, 400
 
+class SpendingBatchApi(Resource):
+    @auth_required('token')
+    def post(self):
+        return self.create_spending_batch()
+
+    def create_spending_batch(self):
+        """
+        Create many spendings in one transaction, e.g. an offline client syncing
+
+        Body: {"items": [{"client_key", "category", "amount", "spend_date", "description"}]}
+        Each item gets its own result: created, duplicate (already uploaded,
+        not charged again), rejected (insufficient balance) or invalid.
+        """
+        if 'child' in current_user.roles:
+            child = Child.query.filter_by(user_id=current_user.id).first()
+            if not child:
+                return {'message': 'Child not found'}, 404
+        else:
+            return {'message': 'Not authorized'}, 403
+
+        data = request.get_json(silent=True)
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return {'message': 'items must be a non-empty list'}, 400
+        limit = app.config.get('SPENDING_BATCH_LIMIT', 100)
+        if len(items) > limit:
+            return {'message': f'At most {limit} items per batch'}, 400
+
+        try:
+            # A concurrent upload of the same keys trips the unique index;
+            # replaying then reports those items as duplicates. A concurrent
+            # debit that leaves too little for the batch replays it too, so
+            # items are rejected against the balance that was actually left.
+            def record():
+                results, created, reached = record_spendings(child, items)
+                db.session.commit()
+                return results, created, reached
+
+            for _ in range(2):
+                try:
+                    results, created, reached = retry_on_conflict(record)
+                    break
+                except (IntegrityError, InsufficientBalance):
+                    db.session.rollback()
+            else:
+                return {'message': 'Batch conflicted with another upload, please retry'}, 409
+        except Exception as e:
+            db.session.rollback()
+            return {'message': f'Error creating spending records: {str(e)}'}, 400
+
+        if created:
+            audiences = touch_children(child.id)
+            notify_goal_achievements(reached)
+            publish(audiences[child.id], 'spending.batch_created', {
+                'child_id': child.id,
+                'spendings': [spending_delta(spending) for spending in created],
+                'total_balance': float(child.total_balance)
+            })
+
+        return {
+            'results': results,
+            'created': len(created),
+            'total_balance': float(child.total_balance)
+        }, 200
+
 # --------------------------Money Sources Fields-----------------------------
 money_source_fields = {
     'id': fields.Integer,
@@ -494,6 +626,7 @@ money_source_fields = {
     'amount_stored': fields.Float,
     'child_name': fields.String,
 }
+money_source_serializer = Serializer(money_source_fields)
 
 class MoneySourceApi(Resource):
     @auth_required('token')
@@ -528,7 +661,7 @@ class MoneySourceApi(Resource):
         return place
 
     def update_money_source_details(self, source_id):
-        """Update money source following child_routes.py pattern"""
+        """Update money source"""
         if 'child' in current_user.roles:
             child = Child.query.filter_by(user_id=current_user.id).first()
             if not child:
@@ -551,6 +684,7 @@ class MoneySourceApi(Resource):
                 place.amount_stored = data['amount_stored']
 
             db.session.commit()
+            touch_children(child.id)
             
             place.child_name = child.user_account.name if child.user_account else None
             return place, 200
@@ -575,6 +709,7 @@ class MoneySourceApi(Resource):
         try:
             db.session.delete(place)
             db.session.commit()
+            touch_children(child.id)
             return {'message': 'Money source deleted successfully'}, 200
         except Exception as e:
             db.session.rollback()
@@ -583,7 +718,7 @@ class MoneySourceApi(Resource):
 class MoneySourceListApi(Resource):
     @auth_required('token')
     @cache.cached(timeout=5)
-    @marshal_with(money_source_fields)
+    @serialize_with(money_source_serializer)
     def get(self):
         return self.fetch_all_money_sources()
 
@@ -601,12 +736,13 @@ class MoneySourceListApi(Resource):
         else:
             return {'message': 'Not authorized'}, 403
 
-        places = PocketMoneyPlace.query.filter_by(child_id=child.id).all()
-
-        for place in places:
-            place.child_name = child.user_account.name if child.user_account else None
+        places = db.session.query(
+            PocketMoneyPlace.id, PocketMoneyPlace.child_id, PocketMoneyPlace.name,
+            PocketMoneyPlace.amount_stored
+        ).filter(PocketMoneyPlace.child_id == child.id).all()
+        child_name = child.user_account.name if child.user_account else None
 
-        return places
+        return money_source_serializer.rows((*row, child_name) for row in places)
 
     def create_new_money_source(self):
         """Create new money storage place"""
@@ -633,6 +769,7 @@ class MoneySourceListApi(Resource):
 
             db.session.add(place)
             db.session.commit()
+            touch_children(child.id)
 
             place.child_name = child.user_account.name if child.user_account else None
             return place, 201
@@ -651,13 +788,13 @@ balance_fields = {
 
 class BalanceApi(Resource):
     @auth_required('token')
-    @cache.cached(timeout=5)
+    @conditional_get
     @marshal_with(balance_fields)
     def get(self):
         return self.fetch_balance_details()
 
     def fetch_balance_details(self):
-        """Get child's balance breakdown like child_routes.py"""
+        """Get child's balance breakdown"""
         if 'child' in current_user.roles:
             child = Child.query.filter_by(user_id=current_user.id).first()
             if not child:
@@ -665,34 +802,7 @@ class BalanceApi(Resource):
         else:
             return {'message': 'Not authorized'}, 403
 
-        # Get money places breakdown
-        places = PocketMoneyPlace.query.filter_by(child_id=child.id).all()
-        places_breakdown = []
-        for place in places:
-            places_breakdown.append({
-                'name': place.name,
-                'amount': float(place.amount_stored)
-            })
-
-        # Get recent transactions
-        recent_logs = PocketMoneyLog.query.filter_by(child_id=child.id).order_by(
-            PocketMoneyLog.date.desc()
-        ).limit(5).all()
-        
-        recent_transactions = []
-        for log in recent_logs:
-            recent_transactions.append({
-                'amount': float(log.amount),
-                'date': log.date.isoformat(),
-                'source': log.source,
-                'destination': log.destination
-            })
-
-        return {
-            'total_balance': float(child.total_balance),
-            'places_breakdown': places_breakdown,
-            'recent_transactions': recent_transactions
-        }
+        return balance_breakdown(child)
 
 # --------------------------Challenge Progress Fields-----------------------------
 challenge_progress_fields = {
@@ -707,14 +817,14 @@ challenge_progress_fields = {
 }
 
 class CurrentChallengesApi(Resource):
+    # Not path-cached: the key would be shared by every child
     @auth_required('token')
-    @cache.cached(timeout=5)
     @marshal_with(challenge_progress_fields)
     def get(self):
         return self.fetch_current_challenges()
 
     def fetch_current_challenges(self):
-        """Get current active challenges like child_routes.py"""
+        """Get current active challenges"""
         if 'child' in current_user.roles:
             child = Child.query.filter_by(user_id=current_user.id).first()
             if not child:
@@ -722,28 +832,21 @@ class CurrentChallengesApi(Resource):
         else:
             return {'message': 'Not authorized'}, 403
 
-        # Get challenges that haven't ended yet
-        current_challenges = Challenge.query.filter(
-            Challenge.ends_on > datetime.now()
-        ).all()
+        # Shared catalog from process memory, then this child's progress in one query
+        current_challenges = app.challenges.active()
+        progress = child_challenge_progress(child.id, current_challenges)
 
         challenges_data = []
         for challenge in current_challenges:
-            # Check if child has progress on this challenge
-            progress = ChallengeProgress.query.filter_by(
-                child_id=child.id,
-                challenge_id=challenge.id
-            ).first()
-
             challenge_info = {
-                'challenge_id': challenge.id,
+                'challenge_id': challenge['id'],
                 'child_id': child.id,
-                'title': challenge.title,
-                'description': challenge.description,
-                'reward': challenge.reward,
-                'ends_on': challenge.ends_on.isoformat(),
-                'status': progress.status if progress else 'available',
-                'has_started': progress is not None
+                'title': challenge['title'],
+                'description': challenge['description'],
+                'reward': challenge['reward'],
+                'ends_on': challenge['ends_on'].isoformat(),
+                'status': progress.get(challenge['id'], 'available'),
+                'has_started': challenge['id'] in progress
             }
             challenges_data.append(challenge_info)
 
@@ -755,7 +858,7 @@ class ChallengeCompletionApi(Resource):
         return self.complete_challenge(challenge_id)
 
     def complete_challenge(self, challenge_id):
-        """Mark challenge as completed following child_routes.py pattern"""
+        """Mark challenge as completed"""
         if 'child' in current_user.roles:
             child = Child.query.filter_by(user_id=current_user.id).first()
             if not child:
@@ -786,8 +889,15 @@ class ChallengeCompletionApi(Resource):
             db.session.add(progress)
 
         try:
+            # Repeat completions must not count twice on the leaderboards
+            newly_completed = progress.status != 'completed'
             progress.status = 'completed'
+            if newly_completed:
+                progress.completed_on = datetime.now()
             db.session.commit()
+            touch_children(child.id)  # Challenge history is conditional_get
+            if newly_completed:
+                record_challenge_completion(child, challenge_id, progress.completed_on)
 
             return {
                 'message': 'Challenge completed successfully',
@@ -801,7 +911,84 @@ class ChallengeCompletionApi(Resource):
             return {'message': f'Error completing challenge: {str(e)}'}, 400
 
 
-# Register API routes matching child_routes.py patterns
+class SpendingCategoriesApi(Resource):
+    @auth_required('token')
+    @conditional_get
+    def get(self):
+        return self.fetch_spending_categories()
+
+    def fetch_spending_categories(self):
+        """Categories the child has used, with totals, plus suggestions"""
+        if 'child' in current_user.roles:
+            child = Child.query.filter_by(user_id=current_user.id).first()
+            if not child:
+                return {'message': 'Child not found'}, 404
+        else:
+            return {'message': 'Not authorized'}, 403
+
+        return {
+            'used_categories': [
+                {'category': category, 'total_amount': float(total), 'count': count}
+                for category, total, count in spending_by_category(child.id)
+            ],
+            'suggested_categories': SUGGESTED_CATEGORIES
+        }
+
+class ChallengeHistoryApi(Resource):
+    @auth_required('token')
+    @conditional_get
+    def get(self):
+        return self.fetch_challenge_history()
+
+    def fetch_challenge_history(self):
+        """Every challenge the child has started or completed"""
+        if 'child' in current_user.roles:
+            child = Child.query.filter_by(user_id=current_user.id).first()
+            if not child:
+                return {'message': 'Child not found'}, 404
+        else:
+            return {'message': 'Not authorized'}, 403
+
+        return [{
+            'challenge_id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'reward': row.reward,
+            'status': row.status,
+            'started_on': row.created_on.isoformat() if row.created_on else None,
+            'ended_on': row.ends_on.isoformat() if row.ends_on else None
+        } for row in challenge_history(child.id)]
+
+# --------------------------Financial Tips-----------------------------
+WEEKLY_TIPS = [
+    {'id': 1, 'title': 'Save Before You Spend', 'category': 'saving',
+     'content': 'Always put aside some money for savings before spending on wants.'},
+    {'id': 2, 'title': 'Compare Prices', 'category': 'smart_spending',
+     'content': 'Before buying something, check if you can find it for less money elsewhere.'},
+    {'id': 3, 'title': 'Track Your Spending', 'category': 'budgeting',
+     'content': 'Keep track of where your money goes to make better spending decisions.'},
+]
+ARCHIVED_TIPS = [  # Newest first, one per past week
+    {'id': 1, 'title': 'The 50/30/20 Rule', 'category': 'budgeting',
+     'content': 'Spend 50% on needs, 30% on wants, and save 20%.'},
+    {'id': 2, 'title': 'Emergency Fund', 'category': 'saving',
+     'content': 'Always keep some money aside for unexpected expenses.'},
+]
+
+class TipsApi(Resource):
+    @auth_required('token')
+    def get(self, period):
+        week = datetime.now().isocalendar()[1]
+        if period == 'weekly':
+            return [{**tip, 'week': week} for tip in WEEKLY_TIPS]
+        if period == 'archive':
+            return [{**tip, 'week': week - weeks_ago} for weeks_ago, tip in enumerate(ARCHIVED_TIPS, 1)]
+        return {'message': 'Tips not found'}, 404
+
+
+# Register API routes
+child_api.add_resource(SpendingCategoriesApi, '/spends/categories')
+child_api.add_resource(SpendingBatchApi, '/spends/batch')
 child_api.add_resource(SpendingApi, '/spends/<int:spend_id>')
 child_api.add_resource(SpendingListApi, '/spends')
 child_api.add_resource(MoneySourceApi, '/money-sources/<int:source_id>')
@@ -809,6 +996,8 @@ child_api.add_resource(MoneySourceListApi, '/money-sources')
 child_api.add_resource(BalanceApi, '/balance')
 child_api.add_resource(CurrentChallengesApi, '/challenges/current')
 child_api.add_resource(ChallengeCompletionApi, '/challenges/<int:challenge_id>/complete')
+child_api.add_resource(ChallengeHistoryApi, '/challenges/history')
+child_api.add_resource(TipsApi, '/tips/<string:period>')
 
 
 def register_child_routes(app):
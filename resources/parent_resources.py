@@ -1,15 +1,29 @@
-from flask import jsonify, request, current_app as app
+from flask import jsonify, request, current_app as app, Response, stream_with_context, send_file
 from flask_restful import Api, Resource, fields, marshal_with
 from models import (
-    Child, Parent, User, Goal, Spending, PocketMoney, PocketMoneyPlace, 
-    PocketMoneyLog, Challenge, ChallengeProgress, NotesEncouragement, 
+    Child, Parent, User, Goal, Spending, PocketMoney, 
+    PocketMoneyLog, AllowanceSchedule, Challenge, NotesEncouragement, 
     ParentChildLink, db
 )
 from flask_security import auth_required, current_user
 from datetime import datetime, date, timedelta
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, desc
-from decimal import Decimal
+from sqlalchemy import desc
+from services.serializers import Serializer, serialize_with
+from services.versioning import conditional_get, touch_children, touch_users, child_audiences
+from services.events import publish
+from services.goal_progress import notify_goal_achievements
+from services.child_data import (
+    adjust_balance, retry_on_conflict, goal_rows, recent_spendings, money_places, spending_by_category,
+    challenge_counts
+)
+from services.ledger import ledger_rows, iter_csv
+from services.allowance_schedule import schedule_allowance, resume_schedule
+from services.family_summary import SUMMARY_PERIODS, build_summaries, find_snapshot, snapshot_report
+from services.rollups import BUCKETS, spending_trends, transactions
+from backend_celery.tasks import export_child_ledger_xlsx
+from celery.result import AsyncResult
+import os
 
 cache = app.cache
 parent_api = Api(prefix='/api/parent')
@@ -49,6 +63,17 @@ allowance_fields = {
     'recurring_schedule': fields.String,
     'stored_in': fields.String,
 }
+allowance_serializer = Serializer(allowance_fields)
+
+def allowance_rows_query(parent_id):
+    """PocketMoney rows for a parent, with child_name, in allowance_fields order"""
+    return db.session.query(
+        PocketMoney.id, PocketMoney.child_id, User.name, PocketMoney.amount,
+        PocketMoney.date_given, PocketMoney.recurring, PocketMoney.recurring_schedule,
+        PocketMoney.stored_in
+    ).outerjoin(Child, PocketMoney.child_id == Child.id).outerjoin(
+        User, Child.user_id == User.id
+    ).filter(PocketMoney.parent_id == parent_id)
 
 # --------------------------Report Fields-----------------------------
 report_fields = {
@@ -73,7 +98,7 @@ message_fields = {
 # --------------------------Children Management-----------------------------
 class ChildrenApi(Resource):
     @auth_required('token')
-    @cache.cached(timeout=5)
+    @conditional_get
     @marshal_with(child_fields)
     def get(self):
         return self.fetch_all_children()
@@ -180,6 +205,7 @@ class ChildrenApi(Resource):
             )
             db.session.add(link)
             db.session.commit()
+            touch_children(child.id)
 
             return {
                 'id': child.id,
@@ -272,6 +298,7 @@ class ChildApi(Resource):
                 child.class_id = data['class_id']
 
             db.session.commit()
+            touch_children(child.id)
 
             return {
                 'id': child.id,
@@ -308,6 +335,9 @@ class ChildApi(Resource):
         try:
             db.session.delete(link)
             db.session.commit()
+            # The link is gone, so this parent isn't reached via the child
+            touch_children(child_id)
+            touch_users(current_user.id)
             return {'message': 'Child removed from management successfully'}, 200
         except Exception as e:
             db.session.rollback()
@@ -345,66 +375,36 @@ class ChildOverviewApi(Resource):
         if not child:
             return {'message': 'Child not found'}, 404
 
-        # Get goals
-        goals = Goal.query.filter_by(child_id=child_id).all()
-        goals_data = []
-        for goal in goals:
-            progress = (float(child.total_balance) / float(goal.amount)) * 100 if goal.amount > 0 else 0
-            goals_data.append({
-                'id': goal.id,
-                'title': goal.title,
-                'amount': float(goal.amount),
-                'deadline': goal.deadline.isoformat() if goal.deadline else None,
-                'status': goal.status,
-                'progress_percentage': min(100, progress)
-            })
-
-        # Get recent spending
-        recent_spending = Spending.query.filter_by(child_id=child_id).order_by(
-            desc(Spending.spend_date)
-        ).limit(10).all()
-
-        spending_data = []
-        for spend in recent_spending:
-            spending_data.append({
-                'id': spend.id,
-                'category': spend.category,
-                'amount': float(spend.amount),
-                'date': spend.spend_date.isoformat(),
-                'description': spend.description
-            })
-
-        # Get money sources
-        money_sources = PocketMoneyPlace.query.filter_by(child_id=child_id).all()
-        sources_data = []
-        for source in money_sources:
-            sources_data.append({
-                'id': source.id,
-                'name': source.name,
-                'amount': float(source.amount_stored)
-            })
-
-        # Get spending summary by category
-        spending_summary = db.session.query(
-            Spending.category,
-            func.sum(Spending.amount).label('total'),
-            func.count(Spending.id).label('count')
-        ).filter_by(child_id=child_id).group_by(Spending.category).all()
-
-        summary_data = {}
-        for category, total, count in spending_summary:
-            summary_data[category] = {
-                'total': float(total),
-                'count': count
-            }
-
-        # Get challenge progress
-        completed_challenges = ChallengeProgress.query.filter_by(
-            child_id=child_id,
-            status='completed'
-        ).count()
+        # Each section is one column query from the shared child data layer
+        goals_data = [{
+            'id': goal.id,
+            'title': goal.title,
+            'amount': float(goal.amount),
+            'deadline': goal.deadline.isoformat() if goal.deadline else None,
+            'status': goal.status,
+            'progress_percentage': goal.progress_percentage or 0
+        } for goal in goal_rows(child_id)]
+
+        spending_data = [{
+            'id': spend.id,
+            'category': spend.category,
+            'amount': float(spend.amount),
+            'date': spend.spend_date.isoformat(),
+            'description': spend.description
+        } for spend in recent_spendings(child_id, limit=10)]
+
+        sources_data = [{
+            'id': source.id,
+            'name': source.name,
+            'amount': float(source.amount_stored)
+        } for source in money_places(child_id)]
+
+        summary_data = {
+            category: {'total': float(total), 'count': count}
+            for category, total, count in spending_by_category(child_id)
+        }
 
-        total_challenges = ChallengeProgress.query.filter_by(child_id=child_id).count()
+        completed_challenges, total_challenges = challenge_counts(child_id)
 
         return {
             'id': child.id,
@@ -441,7 +441,7 @@ class ChildOverviewApi(Resource):
 class AllowanceApi(Resource):
     @auth_required('token')
     @cache.cached(timeout=5)
-    @marshal_with(allowance_fields)
+    @serialize_with(allowance_serializer)
     def get(self):
         return self.fetch_all_allowances()
 
@@ -473,11 +473,28 @@ class AllowanceApi(Resource):
         if not data or 'recurring' not in data:
             return {'message': 'No recurring status provided'}, 400
 
-        # Update recurring status
-        allowance.recurring = bool(data['recurring'])
-        if not allowance.recurring:
-            allowance.recurring_schedule = None  # Optional: clear schedule
+        # Pause or resume the schedule behind this allowance; payments already made stay as they are
+        schedule = AllowanceSchedule.query.get(allowance.schedule_id) if allowance.schedule_id else None
+        recurring = bool(data['recurring'])
+        try:
+            if not recurring:
+                if schedule:
+                    schedule.active = False
+                allowance.recurring_schedule = None  # Optional: clear schedule
+            elif schedule:
+                if not schedule.active:
+                    resume_schedule(schedule)
+                allowance.recurring_schedule = schedule.rule
+            else:
+                rule = data.get('recurring_schedule') or allowance.recurring_schedule
+                # Starts from now, like a resumed schedule, rather than back-paying since date_given
+                schedule_allowance(allowance, rule, data.get('cron'), start=datetime.now())
+                allowance.recurring_schedule = rule
+        except ValueError as e:
+            db.session.rollback()
+            return {'message': str(e)}, 400
 
+        allowance.recurring = recurring
         db.session.commit()
 
         return {
@@ -496,22 +513,8 @@ class AllowanceApi(Resource):
         if not parent:
             return {'message': 'Parent profile not found'}, 404
 
-        allowances = PocketMoney.query.filter_by(parent_id=parent.id).all()
-        allowances_data = []
-
-        for allowance in allowances:
-            allowances_data.append({
-                'id': allowance.id,
-                'child_id': allowance.child_id,
-                'child_name': allowance.child.user_account.name if allowance.child and allowance.child.user_account else None,
-                'amount': float(allowance.amount),
-                'date_given': allowance.date_given.isoformat(),
-                'recurring': allowance.recurring,
-                'recurring_schedule': allowance.recurring_schedule,
-                'stored_in': allowance.stored_in
-            })
-
-        return allowances_data
+        allowances = allowance_rows_query(parent.id).all()
+        return allowance_serializer.rows(allowances)
 
     def create_allowance(self):
         """Create new allowance for a child"""
@@ -535,7 +538,7 @@ class AllowanceApi(Resource):
         if not self._check_child_access(data['child_id']):
             return {'message': 'Not authorized to give allowance to this child'}, 403
 
-        try:
+        def create():
             allowance = PocketMoney(
                 child_id=data['child_id'],
                 parent_id=parent.id,
@@ -546,17 +549,21 @@ class AllowanceApi(Resource):
                 stored_in=data.get('stored_in')
             )
 
-            # Get child and update balance
-            child = Child.query.get(data['child_id'])
-            if child:
-                child.total_balance += Decimal(str(data['amount']))
-
-
+            # Get child and credit the stored balance in place
+            child = db.session.get(Child, data['child_id'])
             db.session.add(allowance)
+            if allowance.recurring:
+                schedule_allowance(allowance, allowance.recurring_schedule, data.get('cron'))
+            reached = adjust_balance(child, data['amount']) if child else []
             db.session.commit()
+            return allowance, child, reached
+
+        try:
+            allowance, child, reached = retry_on_conflict(create)
+            notify_goal_achievements(reached)
 
             # Return using the `child` object we already fetched
-            return {
+            allowance_data = {
                 'id': allowance.id,
                 'child_id': allowance.child_id,
                 'child_name': child.user_account.name if child and child.user_account else None,
@@ -565,7 +572,15 @@ class AllowanceApi(Resource):
                 'recurring': allowance.recurring,
                 'recurring_schedule': allowance.recurring_schedule,
                 'stored_in': allowance.stored_in
-            }, 201
+            }
+
+            audiences = touch_children(allowance.child_id)
+            publish(audiences[allowance.child_id], 'allowance.created', {
+                'child_id': allowance.child_id,
+                'allowance': allowance_data,
+                'total_balance': float(child.total_balance) if child else None
+            })
+            return allowance_data, 201
 
         except Exception as e:
             db.session.rollback()
@@ -592,7 +607,7 @@ class AllowanceApi(Resource):
 class AllowanceHistoryApi(Resource):
     @auth_required('token')
     @cache.cached(timeout=5)
-    @marshal_with(allowance_fields)
+    @serialize_with(allowance_serializer)
     def get(self):
         return self.fetch_allowance_history()
 
@@ -611,7 +626,7 @@ class AllowanceHistoryApi(Resource):
         end_date = request.args.get('end_date')
         limit = request.args.get('limit', 50, type=int)
 
-        query = PocketMoney.query.filter_by(parent_id=parent.id)
+        query = allowance_rows_query(parent.id)
 
         if child_id:
             query = query.filter(PocketMoney.child_id == child_id)
@@ -621,32 +636,22 @@ class AllowanceHistoryApi(Resource):
             query = query.filter(PocketMoney.date_given <= datetime.strptime(end_date, '%Y-%m-%d').date())
 
         allowances = query.order_by(desc(PocketMoney.date_given)).limit(limit).all()
-
-        history_data = []
-        for allowance in allowances:
-            history_data.append({
-                'id': allowance.id,
-                'child_id': allowance.child_id,
-                'child_name': allowance.child.user_account.name if allowance.child and allowance.child.user_account else None,
-                'amount': float(allowance.amount),
-                'date_given': allowance.date_given.isoformat(),
-                'recurring': allowance.recurring,
-                'recurring_schedule': allowance.recurring_schedule,
-                'stored_in': allowance.stored_in
-            })
-
-        return history_data
+        return allowance_serializer.rows(allowances)
 
 # --------------------------Reports-----------------------------
 class ReportSummaryApi(Resource):
     @auth_required('token')
-    @cache.cached(timeout=10)
+    @conditional_get
     @marshal_with(report_fields)
     def get(self):
         return self.fetch_summary_report()
 
     def fetch_summary_report(self):
-        """Get comprehensive summary report"""
+        """
+        Get comprehensive summary report
+        ?period=daily|weekly serves the stored snapshot covering ?date
+        (YYYY-MM-DD, default the latest); without it, all-time totals
+        """
         if 'parent' not in current_user.roles:
             return {'message': 'Not authorized'}, 403
 
@@ -654,43 +659,159 @@ class ReportSummaryApi(Resource):
         if not parent:
             return {'message': 'Parent profile not found'}, 404
 
-        # Get all children
-        children_links = ParentChildLink.query.filter_by(parent_id=parent.id).all()
-        children_data = []
-        total_balance = 0
-        total_spent = 0
-        total_allowances = 0
+        period = request.args.get('period')
+        if period:
+            if period not in SUMMARY_PERIODS:
+                return {'message': f"period must be one of: {', '.join(SUMMARY_PERIODS)}"}, 400
+            try:
+                on = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if request.args.get('date') else None
+            except ValueError:
+                return {'message': 'Invalid date, expected YYYY-MM-DD'}, 400
+
+            snapshot = find_snapshot(parent.id, period, on)
+            if not snapshot:
+                return {'message': 'No summary stored for that period yet'}, 404
+            return snapshot_report(snapshot)
+
+        report = build_summaries([parent.id])[parent.id]
+        report['generated_at'] = datetime.now().isoformat()
+        return report
+
+class SpendingTrendsApi(Resource):
+    @auth_required('token')
+    @conditional_get
+    @marshal_with(report_fields)
+    def get(self):
+        return self.fetch_spending_trends()
+
+    def fetch_spending_trends(self):
+        """
+        Spending per day, week or month for all the parent's children
+        Query: bucket=day|week|month (default month), start, end (YYYY-MM-DD),
+        category (repeatable), child_id, by_category=1 to split by category
+        """
+        if 'parent' not in current_user.roles:
+            return {'message': 'Not authorized'}, 403
 
-        for link in children_links:
-            child = link.child
-            if child:
-                child_spending = db.session.query(func.sum(Spending.amount)).filter_by(child_id=child.id).scalar() or 0
-                child_allowances = db.session.query(func.sum(PocketMoney.amount)).filter_by(child_id=child.id).scalar() or 0
-                
-                total_balance += float(child.total_balance)
-                total_spent += float(child_spending)
-                total_allowances += float(child_allowances)
+        parent = Parent.query.filter_by(user_id=current_user.id).first()
+        if not parent:
+            return {'message': 'Parent profile not found'}, 404
 
-                children_data.append({
-                    'id': child.id,
-                    'name': child.user_account.name if child.user_account else None,
-                    'balance': float(child.total_balance),
-                    'spent': float(child_spending),
-                    'allowances_received': float(child_allowances)
-                })
+        bucket = request.args.get('bucket', 'month')
+        if bucket not in BUCKETS:
+            return {'message': f"bucket must be one of: {', '.join(BUCKETS)}"}, 400
+        filters, error = _report_filters(parent.id)
+        if error:
+            return error
+
+        names, child_ids, start, end, categories = filters
+        by_category = request.args.get('by_category') in ('1', 'true')
+        rolled_up = app.config.get('REPORTS_USE_ROLLUPS', True)
+        rows = spending_trends(child_ids, bucket, start, end, categories, by_category, rolled_up) if child_ids else []
+
+        trends = []
+        for row in rows:
+            entry = {
+                'period': str(row.period),
+                'child_id': row.child_id,
+                'child_name': names.get(row.child_id),
+                'total': float(row.total or 0),
+                'entries': int(row.entries or 0)
+            }
+            if by_category:
+                entry['category'] = row.category
+            trends.append(entry)
 
         return {
             'summary': {
-                'total_children': len(children_data),
-                'total_balance': total_balance,
-                'total_spent': total_spent,
-                'total_allowances_given': total_allowances,
-                'average_balance': total_balance / len(children_data) if children_data else 0
+                'bucket': bucket,
+                'start': start.isoformat() if start else None,
+                'end': end.isoformat() if end else None,
+                'categories': categories,
+                'total_spent': sum(entry['total'] for entry in trends),
+                'entries': sum(entry['entries'] for entry in trends),
+                'source': 'rollups' if rolled_up else 'spendings'
             },
-            'children_data': children_data,
+            'spending_trends': trends,
             'generated_at': datetime.now().isoformat()
         }
 
+class TransactionsReportApi(Resource):
+    @auth_required('token')
+    @conditional_get
+    @marshal_with(report_fields)
+    def get(self):
+        return self.fetch_transactions()
+
+    def fetch_transactions(self):
+        """
+        Spendings and allowances across the parent's children, newest first
+        Query: start, end, category (repeatable; spendings only), child_id,
+        limit (default 100, at most 500), offset
+        """
+        if 'parent' not in current_user.roles:
+            return {'message': 'Not authorized'}, 403
+
+        parent = Parent.query.filter_by(user_id=current_user.id).first()
+        if not parent:
+            return {'message': 'Parent profile not found'}, 404
+
+        filters, error = _report_filters(parent.id)
+        if error:
+            return error
+        names, child_ids, start, end, categories = filters
+
+        try:
+            limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError:
+            return {'message': 'limit and offset must be integers'}, 400
+
+        rows = transactions(child_ids, start, end, categories, limit, offset) if child_ids else []
+        return {
+            'summary': {'count': len(rows), 'limit': limit, 'offset': offset, 'categories': categories},
+            'transactions': [{
+                'id': row.id,
+                'type': row.type,
+                'child_id': row.child_id,
+                'child_name': names.get(row.child_id),
+                'date': str(row.date),
+                'amount': float(row.amount),
+                'category': row.category,
+                'details': row.details
+            } for row in rows],
+            'generated_at': datetime.now().isoformat()
+        }
+
+def _report_filters(parent_id):
+    """
+    ((child names, child ids, start, end, categories), None) from the query
+    string, or (None, error response)
+    """
+    names = dict(db.session.query(Child.id, User.name).join(
+        ParentChildLink, ParentChildLink.child_id == Child.id
+    ).outerjoin(
+        User, Child.user_id == User.id
+    ).filter(ParentChildLink.parent_id == parent_id).all())
+
+    child_ids = list(names)
+    if request.args.get('child_id'):
+        try:
+            child_id = int(request.args['child_id'])
+        except ValueError:
+            return None, ({'message': 'Invalid child_id'}, 400)
+        if child_id not in names:
+            return None, ({'message': 'Not authorized to view this child'}, 403)
+        child_ids = [child_id]
+
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+    except ValueError:
+        return None, ({'message': 'Invalid date, expected YYYY-MM-DD'}, 400)
+
+    return (names, child_ids, start, end, request.args.getlist('category')), None
+
 # --------------------------Messaging-----------------------------
 class MessageApi(Resource):
     @auth_required('token')
@@ -768,7 +889,7 @@ class MessageApi(Resource):
             db.session.add(message)
             db.session.commit()
 
-            return {
+            message_data = {
                 'id': message.id,
                 'sender_id': message.sender_id,
                 'child_id': message.child_id,
@@ -776,7 +897,9 @@ class MessageApi(Resource):
                 'child_name': message.child.user_account.name if message.child and message.child.user_account else None,
                 'message': message.message,
                 'date_sent': message.date_sent.isoformat()
-            }, 201
+            }
+            publish(child_audiences(message.child_id)[message.child_id], 'message.created', message_data)
+            return message_data, 201
 
         except Exception as e:
             db.session.rollback()
@@ -798,6 +921,98 @@ class MessageApi(Resource):
 
         return link is not None
 
+# --------------------------Exports-----------------------------
+class ChildExportApi(Resource):
+    @auth_required('token')
+    def get(self, child_id):
+        return self.export_child_ledger(child_id)
+
+    def export_child_ledger(self, child_id):
+        """Stream a child's full transaction ledger as CSV, or queue an XLSX export"""
+        if not self._check_child_access(child_id):
+            return {'message': 'Not authorized to export this child'}, 403
+
+        export_format = request.args.get('format', 'csv')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+
+        try:
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError:
+            return {'message': 'Invalid date format, use YYYY-MM-DD'}, 400
+
+        if export_format == 'xlsx':
+            task = export_child_ledger_xlsx.delay(child_id, start_date, end_date)
+            return {'task_id': task.id, 'message': 'Export started'}, 202
+        if export_format != 'csv':
+            return {'message': 'Unsupported format, use csv or xlsx'}, 400
+
+        # Rows come off a server-side cursor as the response is written
+        rows = ledger_rows(child_id, start_dt, end_dt)
+        return Response(
+            stream_with_context(iter_csv(rows)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename=ledger_child_{child_id}.csv'}
+        )
+
+    def _check_child_access(self, child_id):
+        """Check if current user has access to this child"""
+        if 'parent' not in current_user.roles:
+            return False
+
+        parent = Parent.query.filter_by(user_id=current_user.id).first()
+        if not parent:
+            return False
+
+        link = ParentChildLink.query.filter_by(
+            parent_id=parent.id,
+            child_id=child_id
+        ).first()
+
+        return link is not None
+
+class ExportDownloadApi(Resource):
+    @auth_required('token')
+    def get(self, task_id):
+        return self.fetch_export(task_id)
+
+    def fetch_export(self, task_id):
+        """Poll an XLSX export; returns the file once the task has finished"""
+        result = AsyncResult(task_id)
+        if not result.ready():
+            return {'task_id': task_id, 'status': result.state}, 202
+
+        # Other tasks' ids (reports, deletions) and crashed exports have no child to check against
+        data = result.result if result.successful() else None
+        if not isinstance(data, dict) or 'child_id' not in data:
+            return {'message': 'Export not found'}, 404
+        if not self._check_child_access(data['child_id']):
+            return {'message': 'Not authorized to download this export'}, 403
+
+        if 'error' in data:
+            return {'message': f"Export failed: {data['error']}"}, 400
+        if not os.path.exists(data['path']):
+            return {'message': 'Export has expired, please request it again'}, 404
+
+        return send_file(data['path'], as_attachment=True, download_name=data['filename'])
+
+    def _check_child_access(self, child_id):
+        """Check if current user has access to this child"""
+        if 'parent' not in current_user.roles:
+            return False
+
+        parent = Parent.query.filter_by(user_id=current_user.id).first()
+        if not parent:
+            return False
+
+        link = ParentChildLink.query.filter_by(
+            parent_id=parent.id,
+            child_id=child_id
+        ).first()
+
+        return link is not None
+
 # Register API routes
 parent_api.add_resource(ChildrenApi, '/children')
 parent_api.add_resource(ChildApi, '/children/<int:child_id>')
@@ -810,7 +1025,11 @@ parent_api.add_resource(
 )
 parent_api.add_resource(AllowanceHistoryApi, '/allowances/history')
 parent_api.add_resource(ReportSummaryApi, '/reports/summary')
+parent_api.add_resource(SpendingTrendsApi, '/reports/spending-trends')
+parent_api.add_resource(TransactionsReportApi, '/reports/transactions')
 parent_api.add_resource(MessageApi, '/messages')
+parent_api.add_resource(ChildExportApi, '/children/<int:child_id>/export')
+parent_api.add_resource(ExportDownloadApi, '/exports/<string:task_id>')
 
 def register_parent_routes(app):
     parent_api.init_app(app)
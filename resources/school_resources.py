@@ -1,9 +1,15 @@
 from flask import request, current_app as app
 from flask_restful import Api, Resource, fields, marshal_with
-from models import db, School, Teacher, Challenge, Class, User
-from flask_security import auth_required
+from models import db, School, Teacher, Challenge, Class, User, Child
+from flask_security import auth_required, current_user
+from datetime import datetime
+from backend_celery.tasks import delete_records
+from services.deletion import remember_requester
+from services.versioning import touch_children
+from services.challenges import challenge_participants
 
 cache = app.cache
+challenges = app.challenges
 school_api = Api(prefix='/api/school')
 
 # ========== Serialization Fields ==========
@@ -108,9 +114,14 @@ class DeleteTeacherApi(Resource):
         teacher = Teacher.query.filter_by(id=teacher_id, school_id=school_id).first()
         if not teacher:
             return {'message': 'Teacher not found for this school'}, 404
-        db.session.delete(teacher)
-        db.session.commit()
-        return {'message': f'Teacher {teacher_id} removed from school {school_id}'}, 200
+        # Their classes go too, in batches; students stay, without a class
+        task = delete_records.delay('teacher', teacher.id, current_user.id)
+        remember_requester(task.id, current_user.id)
+        return {
+            'message': f'Teacher {teacher_id} is being removed from school {school_id}',
+            'task_id': task.id,
+            'status_url': f'/deletions/{task.id}'
+        }, 202
 
 class GetAllTeachersApi(Resource):
     @auth_required('token')
@@ -152,6 +163,7 @@ class CreateChallengeApi(Resource):
         )
         db.session.add(challenge)
         db.session.commit()
+        challenges.invalidate()
         return challenge, 201
 
 class EditChallengeApi(Resource):
@@ -170,6 +182,9 @@ class EditChallengeApi(Resource):
         if 'reward' in data: challenge.reward = data['reward']
         if 'ends_on' in data: challenge.ends_on = data['ends_on']
         db.session.commit()
+        challenges.invalidate()
+        # Children who took part see the new details in their challenge history
+        touch_children(*challenge_participants(challenge_id))
         return challenge
 
 class DeleteChallengeApi(Resource):
@@ -181,10 +196,64 @@ class DeleteChallengeApi(Resource):
         challenge = Challenge.query.get(challenge_id)
         if not challenge:
             return {'message': 'Challenge not found'}, 404
+        participants = challenge_participants(challenge_id)
         db.session.delete(challenge)
         db.session.commit()
+        challenges.invalidate()
+        touch_children(*participants)
         return {'message': f'Challenge {challenge_id} deleted'}, 200
 
+# ========== Leaderboards ==========
+
+class LeaderboardApi(Resource):
+    @auth_required('token')
+    def get(self, school_id, challenge_id=None, class_id=None):
+        return self.get_leaderboard(school_id, challenge_id, class_id)
+
+    def get_leaderboard(self, school_id, challenge_id=None, class_id=None):
+        if challenge_id is not None:
+            if not Challenge.query.get(challenge_id):
+                return {'message': 'Challenge not found'}, 404
+            board, board_id = 'challenge', challenge_id
+        elif class_id is not None:
+            if not Class.query.filter_by(id=class_id, school_id=school_id).first():
+                return {'message': 'Class not found'}, 404
+            board, board_id = 'class', class_id
+        else:
+            if not School.query.get(school_id):
+                return {'message': f'School with ID {school_id} not found'}, 404
+            board, board_id = 'school', school_id
+
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        top = app.leaderboards.top(board, board_id, limit)
+
+        # Names for the visible places only, in one query
+        names = dict(db.session.query(Child.id, User.name).join(
+            User, Child.user_id == User.id
+        ).filter(Child.id.in_([child_id for _, child_id, _ in top])).all()) if top else {}
+
+        result = {
+            'board': board,
+            'board_id': board_id,
+            'entries': [self._entry(board, rank, child_id, score, names.get(child_id)) for rank, child_id, score in top],
+            'me': None
+        }
+
+        if 'child' in current_user.roles:
+            child = Child.query.filter_by(user_id=current_user.id).first()
+            placed = app.leaderboards.rank(board, board_id, child.id) if child else None
+            if placed:
+                result['me'] = self._entry(board, placed[0], child.id, placed[1], current_user.name)
+        return result
+
+    def _entry(self, board, rank, child_id, score, name):
+        entry = {'rank': rank, 'child_id': child_id, 'name': name}
+        if board == 'challenge':
+            entry['completed_on'] = datetime.fromtimestamp(score).isoformat() if score else None
+        else:
+            entry['completed_challenges'] = int(score)
+        return entry
+
 # ========== Class and Reporting ==========
 
 class GetAllClassesApi(Resource):
@@ -240,6 +309,11 @@ school_api.add_resource(CreateChallengeApi, '/<int:school_id>/challenges')
 school_api.add_resource(EditChallengeApi, '/<int:school_id>/challenges/<int:challenge_id>')
 school_api.add_resource(DeleteChallengeApi, '/<int:school_id>/challenges/<int:challenge_id>')
 
+school_api.add_resource(LeaderboardApi,
+    '/<int:school_id>/leaderboard',
+    '/<int:school_id>/challenges/<int:challenge_id>/leaderboard',
+    '/<int:school_id>/classes/<int:class_id>/leaderboard')
+
 school_api.add_resource(GetAllClassesApi, '/<int:school_id>/classes')
 school_api.add_resource(GetSchoolStatisticsApi, '/<int:school_id>/statistics')
 school_api.add_resource(GenerateSchoolReportApi, '/<int:school_id>/report')
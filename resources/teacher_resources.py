@@ -1,7 +1,11 @@
 from flask import request, jsonify, current_app as app
 from flask_restful import Api, Resource, fields, marshal_with
 from models import db, Teacher, Class, Child, User
-from flask_security import auth_required
+from flask_security import auth_required, current_user
+from sqlalchemy import func
+from services.serializers import Serializer, serialize_with
+from backend_celery.tasks import delete_records
+from services.deletion import remember_requester
 
 cache = app.cache
 teacher_api = Api(prefix='/api/teacher')
@@ -35,6 +39,7 @@ student_fields = {
     "class_id": fields.Integer,
     "total_balance": fields.Float,
 }
+student_serializer = Serializer(student_fields)
 
 # ------------------ Teacher Identity ------------------ #
 
@@ -131,34 +136,33 @@ class DeleteClassApi(Resource):
         klass = Class.query.filter_by(id=class_id, teacher_id=teacher_id).first()
         if not klass:
             return {'message': 'Class not found for this teacher'}, 404
-        db.session.delete(klass)
-        db.session.commit()
-        return {'message': f'Class {class_id} deleted for teacher {teacher_id}'}, 200
+        # Students are unassigned in batches, then the class goes
+        task = delete_records.delay('class', klass.id, current_user.id)
+        remember_requester(task.id, current_user.id)
+        return {
+            'message': f'Class {class_id} is being deleted for teacher {teacher_id}',
+            'task_id': task.id,
+            'status_url': f'/deletions/{task.id}'
+        }, 202
 
 # ----------- Student Access -----------
 
 class GetStudentsApi(Resource):
     @auth_required('token')
-    @marshal_with(student_fields)
+    @serialize_with(student_serializer)
     def get(self, teacher_id):
         return self.get_students(teacher_id)
 
     def get_students(self, teacher_id):
-        classes = Class.query.filter_by(teacher_id=teacher_id).all()
-        students = []
-        for klass in classes:
-            # klass.students is a relationship
-            for student in klass.students:
-                # Append with required serializable fields
-                students.append({
-                    "id": student.id,
-                    "user_id": student.user_id,
-                    "name": student.user_account.name if student.user_account else "",
-                    "email": student.user_account.email if student.user_account else "",
-                    "class_id": student.class_id,
-                    "total_balance": float(student.total_balance)
-                })
-        return students
+        # One query across all of the teacher's classes, in student_fields order
+        students = db.session.query(
+            Child.id, Child.user_id,
+            func.coalesce(User.name, ""), func.coalesce(User.email, ""),
+            Child.class_id, Child.total_balance
+        ).join(Class, Child.class_id == Class.id).outerjoin(
+            User, Child.user_id == User.id
+        ).filter(Class.teacher_id == teacher_id).order_by(Class.id, Child.id).all()
+        return student_serializer.rows(students)
 
 # ----------- Educational Content -----------
 
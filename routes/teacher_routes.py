@@ -1,63 +0,0 @@
-from flask import Blueprint, jsonify, request
-
-teacher_bp = Blueprint('teacher', __name__)
-
-# Classroom Overview
-@teacher_bp.route('/classroom/overview', methods=['GET'])
-def get_classroom_overview():
-    return jsonify({'message': 'Get classroom overview'})
-
-# Students
-@teacher_bp.route('/students', methods=['GET'])
-def get_students():
-    return jsonify({'message': 'Get all students'})
-
-@teacher_bp.route('/students', methods=['POST'])
-def create_student():
-    return jsonify({'message': 'Create new student'})
-
-@teacher_bp.route('/students/<int:student_id>', methods=['PUT'])
-def update_student(student_id):
-    return jsonify({'message': f'Update student {student_id}'})
-
-@teacher_bp.route('/students/<int:student_id>', methods=['DELETE'])
-def delete_student(student_id):
-    return jsonify({'message': f'Delete student {student_id}'})
-
-@teacher_bp.route('/students/<int:student_id>/progress', methods=['GET'])
-def get_student_progress(student_id):
-    return jsonify({'message': f'Get progress for student {student_id}'})
-
-# Activities & Assignments
-@teacher_bp.route('/activities', methods=['GET'])
-def get_activities():
-    return jsonify({'message': 'Get all activities'})
-
-@teacher_bp.route('/activities', methods=['POST'])
-def create_activity():
-    return jsonify({'message': 'Create new activity'})
-
-@teacher_bp.route('/activities/<int:activity_id>', methods=['PUT'])
-def update_activity(activity_id):
-    return jsonify({'message': f'Update activity {activity_id}'})
-
-@teacher_bp.route('/activities/<int:activity_id>', methods=['DELETE'])
-def delete_activity(activity_id):
-    return jsonify({'message': f'Delete activity {activity_id}'})
-
-@teacher_bp.route('/activities/<int:activity_id>/participants', methods=['GET'])
-def get_activity_participants(activity_id):
-    return jsonify({'message': f'Get participants for activity {activity_id}'})
-
-# Progress Reports
-@teacher_bp.route('/reports/class-progress', methods=['GET'])
-def get_class_progress():
-    return jsonify({'message': 'Get class progress report'})
-
-@teacher_bp.route('/reports/student-performance', methods=['GET'])
-def get_student_performance():
-    return jsonify({'message': 'Get student performance report'})
-
-@teacher_bp.route('/reports/activity-engagement', methods=['GET'])
-def get_activity_engagement():
-    return jsonify({'message': 'Get activity engagement report'})
\ No newline at end of file
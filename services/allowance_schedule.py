@@ -0,0 +1,245 @@
+"""
+Allowance schedules for Kids Pocket Money Tracker
+Recurrence rules, next-due calculation and payment of due allowances
+
+Each AllowanceSchedule stores its next_due_at, and (active, next_due_at) is
+indexed. The daily task therefore reads only the schedules that are due, and
+the PocketMoney rows it writes are never modified later.
+"""
+
+import calendar
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from sqlalchemy import update
+from models import db, AllowanceSchedule, PocketMoney, PocketMoneyLog, PocketMoneyPlace
+from services.child_data import apply_balance_change
+
+RULES = ('daily', 'weekly', 'fortnightly', 'monthly', 'cron')
+STEP_DAYS = {'daily': 1, 'weekly': 7, 'fortnightly': 14}
+
+# name, lowest, highest; weekday 7 is Sunday as well as 0
+CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+
+class CronRule:
+    """
+    A five-field cron expression: minute hour day month weekday
+
+    Fields accept *, numbers, a-b ranges, /steps and comma lists. As in cron,
+    when neither day nor weekday starts with * a date matching either is due;
+    otherwise it must match both.
+    """
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError('Cron rule needs five fields: minute hour day month weekday')
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(part, *field) for part, field in zip(parts, CRON_FIELDS)
+        )
+        self.any_day = parts[2].startswith('*')
+        self.any_weekday = parts[4].startswith('*')
+        if self.any_weekday and all(self.days[0] > _longest_month(month) for month in self.months):
+            raise ValueError('Cron rule never matches a date')
+
+    def matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = day.isoweekday() % 7 in self.weekdays
+        # Vixie cron: a field starting with * (even */2) still restricts, so
+        # both must match; only two restricted fields are OR-ed
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        # Eight years always includes a 29 February
+        for _ in range(366 * 8):
+            if self.matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime.combine(day, time(hour, minute))
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError('Cron rule never matches a date')
+
+
+def _parse_field(text, name, low, high) -> list:
+    values = set()
+    for item in text.split(','):
+        span, slash, step = item.partition('/')
+        try:
+            step = int(step) if slash else 1
+            if span == '*':
+                start, end = low, high
+            elif '-' in span:
+                start, end = (int(value) for value in span.split('-', 1))
+            else:
+                start = int(span)
+                end = high if slash else start
+        except ValueError:
+            raise ValueError(f'Invalid cron {name} field: {text}')
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f'Invalid cron {name} field: {text}')
+        values.update(range(start, end + 1, step))
+    if name == 'weekday':
+        values = {value % 7 for value in values}
+    return sorted(values)
+
+def _longest_month(month) -> int:
+    return calendar.monthrange(2000, month)[1]
+
+# --------------------------Next due-----------------------------
+
+def next_due(schedule, after: datetime) -> datetime:
+    """The schedule's first payment time strictly after `after`"""
+    anchor = datetime.combine(schedule.anchor_date, time())
+    if schedule.rule in STEP_DAYS:
+        step = STEP_DAYS[schedule.rule]
+        if after < anchor:
+            return anchor
+        return anchor + timedelta(days=((after - anchor).days // step + 1) * step)
+    if schedule.rule == 'monthly':
+        months = max(0, (after.year - anchor.year) * 12 + after.month - anchor.month)
+        while _month_occurrence(anchor, months) <= after:
+            months += 1
+        return _month_occurrence(anchor, months)
+    if schedule.rule == 'cron':
+        return CronRule(schedule.cron).next_after(max(after, anchor - timedelta(minutes=1)))
+    raise ValueError(f'Unknown allowance rule: {schedule.rule}')
+
+def _month_occurrence(anchor, months) -> datetime:
+    """The anchor's day of month, `months` later; the 31st becomes the 30th or 28th/29th where needed"""
+    year, month = divmod(anchor.month - 1 + months, 12)
+    year += anchor.year
+    return anchor.replace(year=year, month=month + 1, day=min(anchor.day, calendar.monthrange(year, month + 1)[1]))
+
+# --------------------------Schedules-----------------------------
+
+def schedule_allowance(allowance, rule, cron=None, start=None) -> AllowanceSchedule:
+    """
+    Stage a schedule repeating `allowance`, which counts as its first payment
+
+    The schedule keeps the allowance's date as its anchor but first pays
+    after `start` when given, so an old allowance made recurring today is
+    not back-paid for the periods since it was given.
+
+    Raises ValueError for an unknown rule or a bad cron expression.
+    """
+    if rule not in RULES:
+        raise ValueError(f"recurring_schedule must be one of: {', '.join(RULES)}")
+    if rule == 'cron':
+        if not cron:
+            raise ValueError('A cron schedule needs a cron expression')
+        CronRule(cron)
+
+    paid_through = datetime.combine(allowance.date_given, time.max)
+    schedule = AllowanceSchedule(
+        child_id=allowance.child_id,
+        parent_id=allowance.parent_id,
+        amount=allowance.amount,
+        stored_in=allowance.stored_in,
+        rule=rule,
+        cron=cron if rule == 'cron' else None,
+        anchor_date=allowance.date_given,
+        last_paid_at=datetime.combine(allowance.date_given, time()),
+        active=True
+    )
+    schedule.next_due_at = next_due(schedule, max(paid_through, start) if start else paid_through)
+    db.session.add(schedule)
+    db.session.flush()
+    allowance.schedule_id = schedule.id
+    return schedule
+
+def resume_schedule(schedule, now=None):
+    """Reactivate a paused schedule from its next period; paused periods are not paid"""
+    schedule.active = True
+    schedule.next_due_at = next_due(schedule, now or datetime.now())
+
+def due_schedules(now, limit=None) -> list:
+    """Active schedules with next_due_at <= now, oldest first, read through ix_allowance_schedules_due"""
+    query = AllowanceSchedule.query.filter(
+        AllowanceSchedule.active == True,
+        AllowanceSchedule.next_due_at <= now
+    ).order_by(AllowanceSchedule.next_due_at, AllowanceSchedule.id)
+    return query.limit(limit).all() if limit else query.all()
+
+def pay_schedule(schedule, now, max_catch_up=12) -> list:
+    """
+    Stage every payment `schedule` owes up to `now` and advance next_due_at
+
+    Missed periods (worker down, back-dated schedule) are paid one row each,
+    oldest first, up to max_catch_up; any beyond that are skipped. Nothing is
+    staged if the rule cannot be evaluated.
+
+    Returns:
+        list: the payment times paid, oldest first
+    """
+    occurrences = []
+    due = schedule.next_due_at
+    while due <= now and len(occurrences) < max_catch_up:
+        occurrences.append(due)
+        due = next_due(schedule, due)
+    if due <= now:
+        due = next_due(schedule, now)
+    if not occurrences:
+        return []
+
+    amount = Decimal(str(schedule.amount))
+    for occurrence in occurrences:
+        db.session.add(PocketMoney(
+            child_id=schedule.child_id,
+            parent_id=schedule.parent_id,
+            amount=amount,
+            date_given=occurrence.date(),
+            recurring=True,
+            recurring_schedule=schedule.rule,
+            stored_in=schedule.stored_in,
+            schedule_id=schedule.id
+        ))
+        db.session.add(PocketMoneyLog(
+            child_id=schedule.child_id,
+            amount=amount,
+            date=occurrence.date(),
+            source='Recurring Allowance',
+            destination=schedule.stored_in or 'General Balance'
+        ))
+
+    # Both as in-place UPDATEs, so a concurrent spend or edit is not overwritten
+    total = amount * len(occurrences)
+    apply_balance_change(schedule.child, total)
+    if schedule.stored_in:
+        db.session.execute(
+            update(PocketMoneyPlace).where(
+                PocketMoneyPlace.child_id == schedule.child_id,
+                PocketMoneyPlace.name == schedule.stored_in
+            ).values(amount_stored=PocketMoneyPlace.amount_stored + total)
+            .execution_options(synchronize_session='fetch')
+        )
+
+    schedule.last_paid_at = occurrences[-1]
+    schedule.next_due_at = due
+    return occurrences
+
+def backfill_schedules() -> int:
+    """
+    Give each legacy recurring PocketMoney row a schedule
+
+    Before schedules existed, each payment created a new recurring row and
+    cleared the flag on the old one, so one row per allowance is still
+    flagged. That row's date_given is the last payment. Rows that already
+    have a schedule are skipped, so running this again is safe.
+    """
+    legacy = PocketMoney.query.filter(
+        PocketMoney.recurring == True,
+        PocketMoney.schedule_id.is_(None),
+        PocketMoney.recurring_schedule.in_(RULES[:-1])
+    ).all()
+    for allowance in legacy:
+        schedule_allowance(allowance, allowance.recurring_schedule)
+    db.session.commit()
+    return len(legacy)
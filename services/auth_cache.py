@@ -0,0 +1,91 @@
+"""
+Authenticated principal cache for Kids Pocket Money Tracker
+Token requests resolve the user, active flag and role names from the cache instead of the DB
+"""
+
+from flask_security import SQLAlchemyUserDatastore, UserMixin
+from sqlalchemy.orm import selectinload
+
+
+class CachedRole(str):
+    """Role name that still answers like a Role row to .name and get_permissions()"""
+
+    # Role rows carry no permissions; Flask-Security's identity loader asks anyway
+    permissions = ()
+
+    @property
+    def name(self):
+        return str(self)
+
+    def get_permissions(self) -> set:
+        return set()
+
+
+class CachedPrincipal(UserMixin):
+    """Read-only stand-in for User built from a cache entry"""
+
+    def __init__(self, data: dict):
+        self.id = data['id']
+        self.name = data['name']
+        self.email = data['email']
+        self.active = data['active']
+        self.fs_uniquifier = data['fs_uniquifier']
+        self.roles = [CachedRole(role) for role in data['roles']]
+
+
+class PrincipalCache:
+    """
+    Short-lived principal entries keyed by fs_uniquifier
+
+    Entries live in the shared app cache so an admin change made on one
+    worker is seen by all of them once invalidate() has run.
+    """
+
+    def __init__(self, cache, timeout: int = 60):
+        self.cache = cache
+        self.timeout = timeout
+
+    def get(self, fs_uniquifier: str):
+        data = self.cache.get(self._key(fs_uniquifier))
+        return CachedPrincipal(data) if data else None
+
+    def set(self, user):
+        self.cache.set(self._key(user.fs_uniquifier), {
+            'id': user.id,
+            'name': user.name,
+            'email': user.email,
+            'active': user.active,
+            'fs_uniquifier': user.fs_uniquifier,
+            'roles': [role.name for role in user.roles]
+        }, timeout=self.timeout)
+
+    def invalidate(self, fs_uniquifier: str):
+        self.cache.delete(self._key(fs_uniquifier))
+
+    def _key(self, fs_uniquifier):
+        return f'principal:{fs_uniquifier}'
+
+
+class CachedUserDatastore(SQLAlchemyUserDatastore):
+    """User datastore that serves token/session lookups from PrincipalCache"""
+
+    def __init__(self, db, user_model, role_model, principals: PrincipalCache):
+        super().__init__(db, user_model, role_model)
+        self.principals = principals
+
+    def find_user(self, case_insensitive=False, **kwargs):
+        # Only the fs_uniquifier lookup done by token auth is cached; login,
+        # registration and admin flows still get real User rows
+        if list(kwargs) != ['fs_uniquifier']:
+            return super().find_user(case_insensitive=case_insensitive, **kwargs)
+
+        principal = self.principals.get(kwargs['fs_uniquifier'])
+        if principal is not None:
+            return principal
+
+        user = self.user_model.query.options(
+            selectinload(self.user_model.roles)
+        ).filter_by(fs_uniquifier=kwargs['fs_uniquifier']).first()
+        if user:
+            self.principals.set(user)
+        return user
@@ -0,0 +1,64 @@
+"""
+Challenge catalog for Kids Pocket Money Tracker
+The active catalog is the same for every child, so each process keeps one copy
+"""
+
+import threading
+from datetime import datetime
+from models import db, Challenge, ChallengeProgress
+
+
+class ChallengeCatalog:
+    """
+    Active challenges cached in process memory
+
+    A shared version stamp (one cache GET per read) tells every worker when
+    a school edits the catalog; challenges that end drop out at read time.
+    """
+
+    def __init__(self, versions, scope: str = 'challenges'):
+        self.versions = versions
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._entries = ()
+
+    def active(self, now=None) -> list:
+        """Challenges that haven't ended yet, as plain dicts"""
+        now = now or datetime.now()
+        stamp = self.versions.get(self.scope)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._entries = self._load(now)
+                    self._stamp = stamp
+        return [challenge for challenge in self._entries if challenge['ends_on'] > now]
+
+    def invalidate(self):
+        """Call after committing any challenge create/edit/delete"""
+        self.versions.bump(self.scope)
+
+    def _load(self, now):
+        rows = db.session.query(
+            Challenge.id, Challenge.title, Challenge.description,
+            Challenge.reward, Challenge.ends_on
+        ).filter(Challenge.ends_on > now).order_by(Challenge.id).all()
+        return tuple(row._asdict() for row in rows)
+
+
+def child_challenge_progress(child_id, challenges) -> dict:
+    """Map challenge id -> progress status for one child, in a single IN query"""
+    if not challenges:
+        return {}
+    return dict(db.session.query(
+        ChallengeProgress.challenge_id, ChallengeProgress.status
+    ).filter(
+        ChallengeProgress.child_id == child_id,
+        ChallengeProgress.challenge_id.in_([challenge['id'] for challenge in challenges])
+    ).all())
+
+def challenge_participants(challenge_id) -> list:
+    """Ids of children who started or completed a challenge, whose history shows it"""
+    return [child_id for (child_id,) in db.session.query(ChallengeProgress.child_id).filter(
+        ChallengeProgress.challenge_id == challenge_id
+    )]
@@ -0,0 +1,293 @@
+"""
+Child data queries for Kids Pocket Money Tracker
+The single query layer behind the child and parent resources: spending lists,
+category totals, balance breakdowns, challenge history and balance changes
+
+Every list query selects plain columns, not ORM objects. Each one is ordered
+to match an index in models.py, so SQLite walks the index instead of sorting.
+The batch queries at the end answer for many children at once, for tasks.
+"""
+
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import func, desc, case, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.attributes import set_committed_value
+from models import (
+    db, Child, Goal, Spending, PocketMoneyPlace, PocketMoneyLog, Challenge, ChallengeProgress
+)
+from services.goal_progress import refresh_goal_progress
+from services.rollups import roll_many
+
+SUGGESTED_CATEGORIES = [
+    'Food & Drinks', 'Entertainment', 'Toys & Games', 'Books & Education',
+    'Clothes', 'Savings', 'Gifts', 'Other'
+]
+
+# --------------------------Balance-----------------------------
+
+class InsufficientBalance(Exception):
+    """A debit larger than the stored balance; nothing was changed"""
+
+def adjust_balance(child, delta) -> list:
+    """
+    Apply a balance change and refresh goal progress in the caller's transaction
+
+    Raises:
+        InsufficientBalance: a debit exceeds the stored balance
+
+    Returns:
+        list: goal ids just completed; pass to notify_goal_achievements() after commit
+    """
+    apply_balance_change(child, delta)
+    return refresh_goal_progress(child.id)
+
+def apply_balance_change(child, delta) -> Decimal:
+    """
+    Add `delta` to the stored balance in one conditional UPDATE and return
+    the new balance, also set on `child` without marking it dirty
+
+    The change is applied to whatever the row holds when the statement runs,
+    never written back from the value this request read, so a web worker and
+    a Celery worker changing the same child cannot lose each other's update.
+    A debit only matches while the stored balance still covers it.
+    """
+    delta = Decimal(str(delta))
+    balance = func.coalesce(Child.total_balance, 0)
+    stmt = update(Child).where(Child.id == child.id)
+    if delta < 0:
+        stmt = stmt.where(balance >= -delta)
+    new_balance = db.session.execute(
+        stmt.values(total_balance=func.round(balance + delta, 2))
+        .returning(Child.total_balance)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if new_balance is None:
+        raise InsufficientBalance(f'Balance does not cover {-delta}')
+    set_committed_value(child, 'total_balance', new_balance)
+    return new_balance
+
+def retry_on_conflict(work, attempts=3, delay=0.05):
+    """
+    Call work(), which stages and commits one unit of work, again after a
+    rollback while SQLite reports the database locked by another writer
+
+    A locked SQLite transaction cannot be resumed, only rerun, so work()
+    must read what it needs afresh each time. Other errors, and the last
+    conflict, are raised.
+    """
+    for attempt in range(attempts):
+        try:
+            return work()
+        except OperationalError as e:
+            db.session.rollback()
+            if 'database is locked' not in str(e.orig) or attempt == attempts - 1:
+                raise
+            time.sleep(delay * 2 ** attempt)
+
+def balance_breakdown(child, recent=5) -> dict:
+    """Total balance, per-place amounts and the latest money log entries"""
+    places = db.session.query(PocketMoneyPlace.name, PocketMoneyPlace.amount_stored).filter(
+        PocketMoneyPlace.child_id == child.id
+    ).all()
+    logs = db.session.query(
+        PocketMoneyLog.amount, PocketMoneyLog.date, PocketMoneyLog.source, PocketMoneyLog.destination
+    ).filter(
+        PocketMoneyLog.child_id == child.id
+    ).order_by(desc(PocketMoneyLog.date), desc(PocketMoneyLog.id)).limit(recent).all()
+
+    return {
+        'total_balance': float(child.total_balance),
+        'places_breakdown': [{'name': name, 'amount': float(amount)} for name, amount in places],
+        'recent_transactions': [{
+            'amount': float(log.amount),
+            'date': log.date.isoformat(),
+            'source': log.source,
+            'destination': log.destination
+        } for log in logs]
+    }
+
+def money_places(child_id) -> list:
+    """(id, name, amount_stored) rows for a child's storage places"""
+    return db.session.query(
+        PocketMoneyPlace.id, PocketMoneyPlace.name, PocketMoneyPlace.amount_stored
+    ).filter(PocketMoneyPlace.child_id == child_id).all()
+
+# --------------------------Spending-----------------------------
+
+def spending_query(child_id, category=None, start_date=None, end_date=None):
+    """
+    Spending columns in spending_fields order (without child_name), newest
+    first, filtered on the (child_id, spend_date) index
+    """
+    query = db.session.query(
+        Spending.id, Spending.child_id, Spending.category, Spending.amount,
+        Spending.spend_date, Spending.description
+    ).filter(Spending.child_id == child_id)
+    if category:
+        query = query.filter(Spending.category == category)
+    if start_date:
+        query = query.filter(Spending.spend_date >= start_date)
+    if end_date:
+        query = query.filter(Spending.spend_date <= end_date)
+    return query.order_by(desc(Spending.spend_date), desc(Spending.id))
+
+def recent_spendings(child_id, limit=10) -> list:
+    return spending_query(child_id).limit(limit).all()
+
+def spending_by_category(child_id) -> list:
+    """(category, total, count) rows in one grouped query"""
+    return db.session.query(
+        Spending.category,
+        func.sum(Spending.amount),
+        func.count(Spending.id)
+    ).filter(Spending.child_id == child_id).group_by(Spending.category).all()
+
+def record_spendings(child, items) -> tuple:
+    """
+    Validate and stage many spendings for one child in the caller's transaction
+
+    Every item carries a client_key. Keys this child has already stored (an
+    earlier upload of the same batch) come back as 'duplicate' with the stored
+    id and are never charged again. Accepted items are charged in order against
+    the balance, then applied with a single adjust_balance call, which raises
+    InsufficientBalance if a concurrent debit got there first.
+
+    Returns:
+        tuple: (per-item results in input order, new Spending rows, goal ids just completed)
+    """
+    results = [None] * len(items)
+    parsed = []
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            entry = _parse_spending(item)
+        except ValueError as e:
+            key = item.get('client_key') if isinstance(item, dict) else None
+            results[index] = {'client_key': key, 'status': 'invalid', 'message': str(e)}
+            continue
+        if entry['client_key'] in seen:
+            results[index] = {'client_key': entry['client_key'], 'status': 'duplicate', 'message': 'Repeated in this batch'}
+            continue
+        seen.add(entry['client_key'])
+        parsed.append((index, entry))
+
+    existing = dict(db.session.query(Spending.client_key, Spending.id).filter(
+        Spending.child_id == child.id,
+        Spending.client_key.in_(seen)
+    ).all()) if seen else {}
+
+    available = Decimal(str(child.total_balance))
+    created = []
+    for index, entry in parsed:
+        key = entry['client_key']
+        if key in existing:
+            results[index] = {'client_key': key, 'status': 'duplicate', 'id': existing[key]}
+        elif entry['amount'] > available:
+            results[index] = {'client_key': key, 'status': 'rejected', 'message': 'Insufficient balance'}
+        else:
+            available -= entry['amount']
+            created.append((index, Spending(child_id=child.id, **entry)))
+
+    if not created:
+        return results, [], []
+
+    db.session.add_all(spending for _, spending in created)
+    reached = adjust_balance(child, -sum(spending.amount for _, spending in created))
+    roll_many((child.id, spending.spend_date, spending.category, spending.amount, 1) for _, spending in created)
+    db.session.flush()
+    for index, spending in created:
+        results[index] = {'client_key': spending.client_key, 'status': 'created', 'id': spending.id}
+    return results, [spending for _, spending in created], reached
+
+# Spending.amount is Numeric(10, 2); quantize() itself fails far above this
+MAX_AMOUNT = Decimal('1e8')
+
+def _parse_spending(item) -> dict:
+    if not isinstance(item, dict):
+        raise ValueError('Item must be an object')
+    for field in ('client_key', 'category', 'amount', 'spend_date'):
+        if item.get(field) in (None, ''):
+            raise ValueError(f'Missing required field: {field}')
+    client_key = str(item['client_key'])
+    if len(client_key) > 64:
+        raise ValueError('client_key must be at most 64 characters')
+    try:
+        amount = Decimal(str(item['amount']))
+    except InvalidOperation:
+        raise ValueError('Invalid amount')
+    if not amount.is_finite() or abs(amount) >= MAX_AMOUNT:
+        raise ValueError('Invalid amount')
+    amount = amount.quantize(Decimal('0.01'))
+    if amount <= 0:
+        raise ValueError('Amount must be positive')
+    if not isinstance(item['category'], str):
+        raise ValueError('category must be a string')
+    try:
+        spend_date = datetime.strptime(item['spend_date'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError('Invalid spend_date, expected YYYY-MM-DD')
+    return {
+        'client_key': client_key,
+        'category': item['category'],
+        'amount': amount,
+        'spend_date': spend_date,
+        'description': item.get('description', '')
+    }
+
+# --------------------------Goals and Challenges-----------------------------
+
+def goal_rows(child_id) -> list:
+    """Goal columns including the stored progress"""
+    return db.session.query(
+        Goal.id, Goal.title, Goal.amount, Goal.deadline, Goal.status, Goal.progress_percentage
+    ).filter(Goal.child_id == child_id).order_by(Goal.id).all()
+
+def challenge_counts(child_id) -> tuple:
+    """(completed, total) challenge progress records, in one query"""
+    completed, total = db.session.query(
+        func.coalesce(func.sum(case((ChallengeProgress.status == 'completed', 1), else_=0)), 0),
+        func.count(ChallengeProgress.id)
+    ).filter(ChallengeProgress.child_id == child_id).one()
+    return int(completed), int(total)
+
+def challenge_history(child_id) -> list:
+    """Every challenge the child has progress on, newest challenge first"""
+    return db.session.query(
+        Challenge.id, Challenge.title, Challenge.description, Challenge.reward,
+        ChallengeProgress.status, Challenge.created_on, Challenge.ends_on
+    ).join(
+        ChallengeProgress, ChallengeProgress.challenge_id == Challenge.id
+    ).filter(
+        ChallengeProgress.child_id == child_id
+    ).order_by(desc(Challenge.created_on)).all()
+
+# --------------------------Batches-----------------------------
+
+def week_spending_totals(child_ids, start, end) -> dict:
+    """{child_id: (entries, total)} for spendings dated start..end, in one grouped query"""
+    rows = db.session.query(
+        Spending.child_id,
+        func.count(Spending.id),
+        func.sum(Spending.amount)
+    ).filter(
+        Spending.child_id.in_(child_ids),
+        Spending.spend_date >= start,
+        Spending.spend_date <= end
+    ).group_by(Spending.child_id).all()
+    return {child_id: (count, total or 0) for child_id, count, total in rows}
+
+def active_goals_by_child(child_ids) -> dict:
+    """{child_id: [(title, progress, remaining)]} for active goals, in one query"""
+    rows = db.session.query(
+        Goal.child_id, Goal.title, Goal.progress_percentage,
+        func.coalesce(Goal.remaining_amount, Goal.amount)
+    ).filter(
+        Goal.child_id.in_(child_ids),
+        Goal.status == 'active'
+    ).order_by(Goal.child_id, Goal.id).all()
+    goals = {}
+    for child_id, title, progress, remaining in rows:
+        goals.setdefault(child_id, []).append((title, progress or 0, remaining))
+    return goals
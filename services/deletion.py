@@ -0,0 +1,176 @@
+"""
+Cascading deletion for Kids Pocket Money Tracker
+Removes a user, school, teacher or class together with every row that
+depends on it, a small batch at a time
+
+Nothing in models.py cascades and SQLite does not enforce the foreign keys,
+so a bare db.session.delete() left orphans behind. plan_deletion() lists each
+dependent table, dependents first. run_plan() deletes their rows (or, for the
+students of a removed class, unassigns them) batch_size rows per statement
+and commits after each one, so the SQLite write lock is only ever held for
+one short statement and web requests get in between batches.
+
+A deletion that stops halfway can simply be run again: every step matches
+only the rows that are still there. Whether it finishes or not, everyone who
+saw the removed rows gets their version stamp bumped, so polled GETs stop
+answering 304, and the leaderboards the rows counted on are rebuilt.
+"""
+
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import select, delete, update, func, or_, literal_column
+from models import (
+    db, User, UserRoles, School, Teacher, Class, Child, Parent, ParentChildLink, PocketMoney,
+    AllowanceSchedule, PocketMoneyLog, PocketMoneyPlace, FamilySummary, PendingNotification, Goal,
+    Spending, SpendingRollup, ChallengeProgress, NotesEncouragement, LlmChats
+)
+from services.versioning import child_audiences, touch_users
+from services.leaderboard import invalidate_boards
+
+TARGETS = ('user', 'school', 'teacher', 'class')
+
+# values is None to delete matching rows, or the columns to set instead
+Step = namedtuple('Step', 'label model condition values')
+
+# steps in order; user ids whose views change; (board, board id) leaderboards to rebuild
+Plan = namedtuple('Plan', 'steps users boards')
+
+# Every table is batched by rowid, which link tables without an id have too
+ROWID = literal_column('rowid')
+
+
+def plan_deletion(target, target_id) -> Plan:
+    """
+    Steps that remove `target` and its dependents, in order, with who and
+    which leaderboards are affected
+
+    A user takes their child, parent, teacher and school profiles with them.
+    A school takes its teachers and classes. A teacher takes their classes.
+    Students of a removed class stay, without a class. Teachers' own user
+    accounts are kept when only their school or teacher profile goes.
+    Allowances a removed parent gave to children who stay are kept, with no
+    parent, so those children's balances still reconcile.
+    """
+    if target not in TARGETS:
+        raise ValueError(f'target must be one of: {", ".join(TARGETS)}')
+
+    user_ids = [target_id] if target == 'user' else []
+    school_ids = [target_id] if target == 'school' else _ids(School.id, School.user_id, user_ids)
+    teacher_ids = [target_id] if target == 'teacher' else []
+    teacher_ids += _ids(Teacher.id, Teacher.user_id, user_ids) + _ids(Teacher.id, Teacher.school_id, school_ids)
+    class_ids = [target_id] if target == 'class' else []
+    class_ids += _ids(Class.id, Class.teacher_id, teacher_ids) + _ids(Class.id, Class.school_id, school_ids)
+    child_ids = _ids(Child.id, Child.user_id, user_ids)
+    parent_ids = _ids(Parent.id, Parent.user_id, user_ids)
+
+    # Children who stay but lose a class or a parent, and whose teachers and schools see less
+    students = _ids(Child.id, Child.class_id, class_ids)
+    linked = _ids(ParentChildLink.child_id, ParentChildLink.parent_id, parent_ids)
+    audiences = child_audiences(*set(child_ids + students + linked))
+    teachers = set(teacher_ids + _ids(Class.teacher_id, Class.id, class_ids)) - {None}
+    board_classes = list(set(class_ids + _ids(Child.class_id, Child.id, child_ids)) - {None})
+    board_schools = list(set(
+        school_ids + _ids(Teacher.school_id, Teacher.id, teachers) + _ids(Class.school_id, Class.id, board_classes)
+    ) - {None})
+    users = set(user_ids).union(*audiences.values())
+    users.update(_ids(Teacher.user_id, Teacher.id, teachers), _ids(School.user_id, School.id, board_schools))
+    boards = [('class', class_id) for class_id in board_classes] + [('school', school_id) for school_id in board_schools]
+    boards += [('challenge', challenge_id)
+               for challenge_id in set(_ids(ChallengeProgress.challenge_id, ChallengeProgress.child_id, child_ids))]
+
+    steps = []
+
+    def add(label, model, *conditions, values=None):
+        conditions = [condition for condition in conditions if condition is not None]
+        if conditions:
+            steps.append(Step(label, model, or_(*conditions), values))
+
+    def among(column, ids):
+        return column.in_(ids) if ids else None
+
+    add('students unassigned', Child, among(Child.class_id, class_ids), values={'class_id': None})
+    for label, model in (
+        ('spendings', Spending), ('spending rollups', SpendingRollup), ('money logs', PocketMoneyLog),
+        ('money places', PocketMoneyPlace), ('goals', Goal), ('challenge progress', ChallengeProgress),
+    ):
+        add(label, model, among(model.child_id, child_ids))
+    add('allowances', PocketMoney, among(PocketMoney.child_id, child_ids))
+    add('allowances kept', PocketMoney, among(PocketMoney.parent_id, parent_ids),
+        values={'parent_id': None, 'schedule_id': None})
+    add('allowance schedules', AllowanceSchedule,
+        among(AllowanceSchedule.child_id, child_ids), among(AllowanceSchedule.parent_id, parent_ids))
+    add('notes', NotesEncouragement,
+        among(NotesEncouragement.child_id, child_ids), among(NotesEncouragement.sender_id, user_ids))
+    add('family links', ParentChildLink,
+        among(ParentChildLink.child_id, child_ids), among(ParentChildLink.parent_id, parent_ids))
+    add('family summaries', FamilySummary, among(FamilySummary.parent_id, parent_ids))
+    add('classes', Class, among(Class.id, class_ids))
+    add('teachers', Teacher, among(Teacher.id, teacher_ids))
+    add('schools', School, among(School.id, school_ids))
+    add('children', Child, among(Child.id, child_ids))
+    add('parents', Parent, among(Parent.id, parent_ids))
+    add('pending notifications', PendingNotification, among(PendingNotification.user_id, user_ids))
+    add('chats', LlmChats, among(LlmChats.sender_id, user_ids))
+    add('user roles', UserRoles, among(UserRoles.user_id, user_ids))
+    add('users', User, among(User.id, user_ids))
+    return Plan(steps, sorted(users - {None}), boards)
+
+def run_plan(plan, batch_size=500, pause=0.05, progress=None) -> dict:
+    """
+    Apply the plan's steps in committed batches; returns rows changed per step label
+
+    `progress`, if given, is called after every batch with
+    {'step', 'done', 'total', 'rows'}: the current step, rows changed so
+    far and in all (counted before starting), and the per-step counts.
+    `pause` seconds between batches leave room for other writers. The
+    affected users and leaderboards are touched after the last batch, or
+    after the batch that failed.
+    """
+    try:
+        return _run_steps(plan.steps, batch_size, pause, progress)
+    finally:
+        touch_users(*plan.users)
+        invalidate_boards(plan.boards)
+
+def _run_steps(steps, batch_size, pause, progress) -> dict:
+    totals = [
+        db.session.execute(select(func.count()).select_from(step.model.__table__).where(step.condition)).scalar()
+        for step in steps
+    ]
+    total = sum(totals)
+    rows = {}
+    done = 0
+
+    for step, expected in zip(steps, totals):
+        rows[step.label] = 0
+        while expected:
+            table = step.model.__table__
+            batch = ROWID.in_(select(ROWID).select_from(table).where(step.condition).limit(batch_size))
+            stmt = delete(table).where(batch) if step.values is None else update(table).where(batch).values(step.values)
+            changed = db.session.execute(stmt).rowcount
+            db.session.commit()
+
+            rows[step.label] += changed
+            done += changed
+            if progress:
+                progress({'step': step.label, 'done': done, 'total': max(total, done), 'rows': rows})
+            if changed < batch_size:
+                break
+            time.sleep(pause)
+    return rows
+
+def _ids(id_column, owner_column, owner_ids) -> list:
+    if not owner_ids:
+        return []
+    return list(db.session.scalars(select(id_column).where(owner_column.in_(list(owner_ids)))))
+
+def remember_requester(task_id, user_id):
+    """Record who queued a deletion, so they can poll it before a worker has picked it up"""
+    current_app.cache.set(
+        f'deletion:{task_id}', user_id, timeout=current_app.config.get('DELETION_REQUESTER_TIMEOUT', 86400)
+    )
+
+def requester_of(task_id):
+    """User id that queued the deletion task, or None once forgotten"""
+    return current_app.cache.get(f'deletion:{task_id}')
@@ -0,0 +1,147 @@
+"""
+Live event push for Kids Pocket Money Tracker
+Writes publish small deltas per user; the /events SSE stream delivers them
+
+Each web process keeps one Redis pub/sub connection and fans messages out to
+in-memory subscriber queues, so an idle SSE client costs a queue, not a Redis
+connection. Run the web app under an async worker (e.g. gunicorn -k gevent)
+to hold thousands of idle streams per process.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+import redis
+
+
+class Subscription:
+    """Bounded queue of events for one SSE client"""
+
+    def __init__(self, broker, user_id, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize)
+
+    def put(self, message):
+        # A slow client loses its oldest deltas rather than blocking publishers
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        """Next event, or None when timeout passes with nothing to send"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Delivers events to subscribers in this process only; used for tests and local dev"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id) -> Subscription:
+        subscription = Subscription(self, user_id, self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_ids, event: str, data: dict):
+        message = {'event': event, 'data': data}
+        for user_id in set(user_ids):
+            self.dispatch(user_id, message)
+
+    def dispatch(self, user_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis so events reach subscribers on every worker"""
+
+    def __init__(self, url: str, queue_size: int = 100, prefix: str = 'events:user:'):
+        super().__init__(queue_size)
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._listener = None
+        self._listener_pid = None
+
+    def publish(self, user_ids, event: str, data: dict):
+        payload = json.dumps({'event': event, 'data': data})
+        pipe = self.redis.pipeline(transaction=False)
+        for user_id in set(user_ids):
+            pipe.publish(f'{self.prefix}{user_id}', payload)
+        pipe.execute()
+
+    def subscribe(self, user_id) -> Subscription:
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def _ensure_listener(self):
+        # Publishers (e.g. Celery) never subscribe, so the thread starts lazily
+        if self._listener and self._listener.is_alive() and self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener and self._listener.is_alive() and self._listener_pid == os.getpid():
+                return
+            self._listener = threading.Thread(target=self._listen, name='events-listener', daemon=True)
+            self._listener_pid = os.getpid()
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{self.prefix}*')
+                for message in pubsub.listen():
+                    user_id = int(message['channel'].decode().rsplit(':', 1)[1])
+                    self.dispatch(user_id, json.loads(message['data']))
+            except redis.ConnectionError:
+                time.sleep(1)
+
+
+def create_broker(app):
+    """Build the broker named by EVENTS_BROKER ('redis' or 'memory')"""
+    queue_size = app.config.get('EVENTS_QUEUE_SIZE', 100)
+    if app.config.get('EVENTS_BROKER', 'redis') == 'memory':
+        return InProcessBroker(queue_size)
+    return RedisBroker(app.config.get('EVENTS_REDIS_URL', 'redis://localhost:6379/2'), queue_size)
+
+def publish(user_ids, event: str, data: dict):
+    """Publish a delta to users; failures are logged, never raised into the write path"""
+    if not user_ids:
+        return
+    try:
+        current_app.events.publish(user_ids, event, data)
+    except Exception as e:
+        current_app.logger.warning(f"Failed to publish {event} event: {str(e)}")
+
+def format_sse(message: dict) -> str:
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
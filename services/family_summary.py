@@ -0,0 +1,153 @@
+"""
+Family summaries for Kids Pocket Money Tracker
+Per-parent reports of every linked child's balance, spending, allowances and
+goals, built for many parents at once and stored as JSON snapshots
+
+The weekly parent summary task stores a 'weekly' snapshot for each parent it
+emails, and a nightly task stores 'daily' ones. GET /api/parent/reports/summary
+serves a stored period as a single-row read, and the same JSON fills the email.
+"""
+
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from models import db, User, Parent, Child, ParentChildLink, Spending, PocketMoney, FamilySummary
+from services.child_data import active_goals_by_child
+
+# period: days covered, ending on (and including) the snapshot date
+SUMMARY_PERIODS = {'daily': 1, 'weekly': 7}
+
+
+def period_bounds(period, end) -> tuple:
+    return end - timedelta(days=SUMMARY_PERIODS[period] - 1), end
+
+def build_summaries(parent_ids, start=None, end=None) -> dict:
+    """
+    {parent_id: {'summary': {...}, 'children_data': [...]}} for spending and
+    allowances dated start..end (all time when no dates), in four queries
+    however many parents there are
+    """
+    links = db.session.query(
+        ParentChildLink.parent_id, Child.id, Child.total_balance, User.name
+    ).join(
+        Child, ParentChildLink.child_id == Child.id
+    ).outerjoin(
+        User, Child.user_id == User.id
+    ).filter(
+        ParentChildLink.parent_id.in_(parent_ids)
+    ).order_by(ParentChildLink.parent_id, Child.id).all()
+    child_ids = {child_id for _, child_id, _, _ in links}
+
+    categories = {}
+    spent = {}
+    if child_ids:
+        query = db.session.query(
+            Spending.child_id, Spending.category, func.sum(Spending.amount), func.count(Spending.id)
+        ).filter(Spending.child_id.in_(child_ids))
+        for child_id, category, total, count in _in_period(query, Spending.spend_date, start, end).group_by(
+            Spending.child_id, Spending.category
+        ):
+            by_category = categories.setdefault(child_id, {})
+            by_category[category or 'Other'] = by_category.get(category or 'Other', 0) + float(total)
+            child_total, child_count = spent.get(child_id, (0, 0))
+            spent[child_id] = (child_total + float(total), child_count + count)
+
+    allowances = dict(_in_period(db.session.query(
+        PocketMoney.child_id, func.sum(PocketMoney.amount)
+    ).filter(PocketMoney.child_id.in_(child_ids)), PocketMoney.date_given, start, end).group_by(
+        PocketMoney.child_id
+    ).all()) if child_ids else {}
+    goals = active_goals_by_child(child_ids) if child_ids else {}
+
+    summaries = {parent_id: [] for parent_id in parent_ids}
+    for parent_id, child_id, balance, name in links:
+        child_spent, transactions = spent.get(child_id, (0, 0))
+        summaries[parent_id].append({
+            'id': child_id,
+            'name': name or 'Unknown',
+            'balance': float(balance or 0),
+            'spent': child_spent,
+            'transaction_count': transactions,
+            'allowances_received': float(allowances.get(child_id) or 0),
+            'spending_categories': categories.get(child_id, {}),
+            'goals': [{'title': title, 'progress': progress} for title, progress, _ in goals.get(child_id, [])]
+        })
+
+    return {parent_id: _with_totals(children) for parent_id, children in summaries.items()}
+
+def _in_period(query, column, start, end):
+    if start:
+        query = query.filter(column >= start)
+    if end:
+        query = query.filter(column <= end)
+    return query
+
+def _with_totals(children) -> dict:
+    total_balance = sum(child['balance'] for child in children)
+    return {
+        'summary': {
+            'total_children': len(children),
+            'total_balance': total_balance,
+            'total_spent': sum(child['spent'] for child in children),
+            'total_allowances_given': sum(child['allowances_received'] for child in children),
+            'average_balance': total_balance / len(children) if children else 0
+        },
+        'children_data': children
+    }
+
+# --------------------------Snapshots-----------------------------
+
+def save_snapshots(period, end, summaries) -> list:
+    """Store or replace each parent's snapshot for the period ending on `end`; the caller commits"""
+    start, end = period_bounds(period, end)
+    existing = {row.parent_id: row for row in FamilySummary.query.filter(
+        FamilySummary.parent_id.in_(summaries),
+        FamilySummary.period == period,
+        FamilySummary.period_start == start
+    )}
+    rows = []
+    for parent_id, data in summaries.items():
+        row = existing.get(parent_id)
+        if row is None:
+            row = FamilySummary(parent_id=parent_id, period=period, period_start=start)
+            db.session.add(row)
+        row.period_end = end
+        row.data = json.dumps(data, separators=(',', ':'))
+        row.created_at = datetime.now()
+        rows.append(row)
+    return rows
+
+def find_snapshot(parent_id, period, on=None):
+    """The snapshot covering `on`, or the latest one when no date is given"""
+    query = FamilySummary.query.filter_by(parent_id=parent_id, period=period)
+    if on:
+        query = query.filter(FamilySummary.period_start <= on, FamilySummary.period_end >= on)
+    return query.order_by(FamilySummary.period_end.desc()).first()
+
+def snapshot_report(row) -> dict:
+    """A stored snapshot in the report API's shape"""
+    data = json.loads(row.data)
+    data['summary'].update({
+        'period': row.period,
+        'period_start': row.period_start.isoformat(),
+        'period_end': row.period_end.isoformat()
+    })
+    data['generated_at'] = row.created_at.isoformat()
+    return data
+
+def parent_chunks(user_ids=None, chunk_size=500):
+    """Yield lists of (parent id, user id, name, email) for active parents, paged by id"""
+    query = select(Parent.id, User.id.label('user_id'), User.name, User.email).join(
+        User, Parent.user_id == User.id
+    ).where(User.active == True)
+    if user_ids:
+        query = query.where(User.id.in_(user_ids))
+    query = query.order_by(Parent.id).limit(chunk_size)
+
+    last_id = 0
+    while True:
+        rows = db.session.execute(query.where(Parent.id > last_id)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield rows
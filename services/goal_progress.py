@@ -0,0 +1,66 @@
+"""
+Goal progress engine for Kids Pocket Money Tracker
+Keeps Goal.progress_percentage / remaining_amount in step with the child's balance
+"""
+
+from sqlalchemy import select, update, case
+from models import db, Goal, Child
+
+# Completed and cancelled goals keep the progress they finished with
+FROZEN_STATUSES = ('completed', 'cancelled')
+
+def refresh_goal_progress(*child_ids) -> list:
+    """
+    Recompute stored progress for every open goal of these children and
+    complete the active goals whose target is now reached.
+
+    Runs inside the caller's transaction, after the balance change; commit,
+    then pass the result to notify_goal_achievements().
+
+    Returns:
+        list: ids of goals that just moved to 'completed'
+    """
+    if not child_ids:
+        return []
+
+    balance = select(Child.total_balance).where(Child.id == Goal.child_id).scalar_subquery()
+    db.session.execute(
+        update(Goal).where(
+            Goal.child_id.in_(child_ids),
+            Goal.status.notin_(FROZEN_STATUSES)
+        ).values(
+            progress_percentage=case(
+                (Goal.amount <= 0, 0.0),
+                (balance <= 0, 0.0),
+                (balance >= Goal.amount, 100.0),
+                else_=balance * 100.0 / Goal.amount
+            ),
+            remaining_amount=case(
+                (balance >= Goal.amount, 0),
+                (balance <= 0, Goal.amount),
+                else_=Goal.amount - balance
+            )
+        ).execution_options(synchronize_session='fetch')
+    )
+
+    reached = db.session.scalars(
+        select(Goal.id).where(
+            Goal.child_id.in_(child_ids),
+            Goal.status == 'active',
+            Goal.amount > 0,
+            Goal.progress_percentage >= 100.0
+        )
+    ).all()
+    if reached:
+        db.session.execute(
+            update(Goal).where(Goal.id.in_(reached)).values(status='completed')
+            .execution_options(synchronize_session='fetch')
+        )
+    return reached
+
+def notify_goal_achievements(goal_ids):
+    """Queue achievement emails for goals completed by refresh_goal_progress()"""
+    if goal_ids:
+        # Imported here: tasks.py itself refreshes progress for recurring allowances
+        from backend_celery.tasks import send_goal_achievement_notifications
+        send_goal_achievement_notifications.delay(list(goal_ids))
@@ -0,0 +1,136 @@
+"""
+Password hashing service for Kids Pocket Money Tracker
+Runs bcrypt work on a bounded process pool so login bursts don't block web workers
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from passlib.context import CryptContext
+from flask_security.utils import get_hmac, use_double_hash
+
+# Worker-side context, built once per pool process by _init_worker
+_worker_context = None
+
+def build_context(scheme: str, options: dict) -> CryptContext:
+    """
+    Build a passlib context that also flags hashes below the configured cost
+
+    Args:
+        scheme: passlib scheme name, e.g. 'bcrypt'
+        options: passlib options of the form {'<scheme>__rounds': n}
+
+    Returns:
+        CryptContext used for hashing, verifying and needs_update checks
+    """
+    options = dict(options)
+    rounds = options.get(f'{scheme}__rounds')
+    if rounds:
+        options.setdefault(f'{scheme}__min_rounds', rounds)
+    return CryptContext(schemes=[scheme], **options)
+
+def _init_worker(scheme: str, options: dict):
+    global _worker_context
+    _worker_context = build_context(scheme, options)
+
+def _hash(secret):
+    return _worker_context.hash(secret)
+
+def _verify(secret, password_hash):
+    return _worker_context.verify(secret, password_hash)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or a job times out"""
+
+    def __init__(self, retry_after: int):
+        super().__init__('Password hashing queue is full')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for password hashing
+
+    At most PASSWORD_HASH_MAX_PENDING jobs may be queued or running per web
+    process; callers beyond that get HashingBusy instead of piling up.
+    """
+
+    def __init__(self, app=None):
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.scheme = app.config.get('SECURITY_PASSWORD_HASH', 'bcrypt')
+        self.options = app.config.get('SECURITY_PASSWORD_HASH_PASSLIB_OPTIONS', {})
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.workers * 4)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER', 2)
+
+        # needs_update only parses the stored hash, so it stays in-process
+        self._context = build_context(self.scheme, self.options)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def hash(self, password: str) -> str:
+        """Hash a password the same way flask_security.hash_password does"""
+        return self._submit(_hash, self._secret(password))
+
+    def verify(self, password: str, password_hash: str):
+        """
+        Verify a password and rehash it if the cost parameters changed
+
+        Returns:
+            tuple: (valid, new_hash) where new_hash is None unless the stored
+            hash should be replaced
+        """
+        secret = self._secret(password, password_hash)
+        valid = self._submit(_verify, secret, password_hash)
+        if valid and self.needs_update(password_hash):
+            return True, self._submit(_hash, secret)
+        return valid, None
+
+    def needs_update(self, password_hash: str) -> bool:
+        try:
+            return self._context.needs_update(password_hash)
+        except ValueError:
+            return False
+
+    def _secret(self, password, password_hash=None):
+        # HMAC pre-hash is cheap and needs the app salt, so do it here. Whether
+        # to apply it is Flask-Security's call (SECURITY_PASSWORD_SINGLE_HASH
+        # may be a bool or a set of schemes), so hashes stay interchangeable
+        # with flask_security.hash_password / verify_password
+        return get_hmac(password).decode('ascii') if use_double_hash(password_hash) else password
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(self.retry_after)
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job itself ends, not until we stop
+        # waiting, so timed-out jobs still count against max_pending
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy(self.retry_after)
+
+    def _get_pool(self):
+        # Pools don't survive fork, so gunicorn/celery children build their own
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        initializer=_init_worker,
+                        initargs=(self.scheme, self.options)
+                    )
+                    self._pool_pid = os.getpid()
+        return self._pool
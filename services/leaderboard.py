@@ -0,0 +1,159 @@
+"""
+Challenge leaderboards for Kids Pocket Money Tracker
+Rankings live in Redis sorted sets, updated per completion and rebuilt from SQL
+"""
+
+from flask import current_app
+from sqlalchemy import func
+import redis
+from models import db, Child, Class, ChallengeProgress
+
+BOARDS = ('challenge', 'class', 'school')
+
+
+class Leaderboards:
+    """
+    One sorted set per board, keyed '<prefix><board>:<id>'
+
+    - challenge boards score completion time, earliest first
+    - class and school boards score completed challenges, most first
+
+    A board is trusted only while its ':built' marker lives. Otherwise the
+    next read rebuilds it from SQL, which also repairs drift such as a child
+    changing class, so top-N and rank reads never aggregate tables.
+
+    Completions write absolute scores (ZADD, never ZINCRBY) and bump the
+    board's ':writes' counter in the same pipeline. A rebuild WATCHes that
+    counter from before its SQL read, so a completion landing in between
+    makes it start over, and one landing after it only rewrites a score
+    the rebuild already has.
+    """
+
+    def __init__(self, url: str, prefix: str = 'leaderboard:', rebuild_after: int = 86400):
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.rebuild_after = rebuild_after
+
+    def record_completion(self, child_id, challenge_id, class_id, school_id, completed_on, completed):
+        """
+        Apply one newly completed challenge to every board it belongs to;
+        `completed` is the child's count of completed challenges, as committed
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        boards = [('challenge', challenge_id)]
+        pipe.zadd(self._key('challenge', challenge_id), {child_id: completed_on.timestamp()}, nx=True)
+        for board, board_id in (('class', class_id), ('school', school_id)):
+            if board_id:
+                pipe.zadd(self._key(board, board_id), {child_id: completed})
+                boards.append((board, board_id))
+        for board, board_id in boards:
+            pipe.incr(f'{self._key(board, board_id)}:writes')
+        pipe.execute()
+
+    def top(self, board: str, board_id: int, limit: int = 10) -> list:
+        """[(rank, child_id, score)] for the first `limit` places"""
+        key = self._ensure(board, board_id)
+        if board == 'challenge':
+            entries = self.redis.zrange(key, 0, limit - 1, withscores=True)
+        else:
+            entries = self.redis.zrevrange(key, 0, limit - 1, withscores=True)
+        return [(rank, int(member), score) for rank, (member, score) in enumerate(entries, 1)]
+
+    def rank(self, board: str, board_id: int, child_id: int):
+        """(rank, score) for one child, or None when they aren't on the board"""
+        key = self._ensure(board, board_id)
+        pipe = self.redis.pipeline(transaction=False)
+        if board == 'challenge':
+            pipe.zrank(key, child_id)
+        else:
+            pipe.zrevrank(key, child_id)
+        pipe.zscore(key, child_id)
+        position, score = pipe.execute()
+        if position is None:
+            return None
+        return position + 1, score
+
+    def rebuild(self, board: str, board_id: int, attempts: int = 5):
+        """
+        Replace a board with the SQL truth in one MULTI, so readers never see
+        it half-built; retried while completions keep landing mid-rebuild
+        """
+        key = self._key(board, board_id)
+        with self.redis.pipeline() as pipe:
+            for _ in range(attempts):
+                try:
+                    pipe.watch(f'{key}:writes')
+                    scores = {str(child_id): score for child_id, score in board_scores(board, board_id)}
+                    pipe.multi()
+                    pipe.delete(key)
+                    if scores:
+                        pipe.zadd(key, scores)
+                    pipe.set(f'{key}:built', 1, ex=self.rebuild_after)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+        # Still racing: leave the marker unset so the next read tries again
+
+    def invalidate(self, *boards):
+        """Drop the ':built' marker of each (board, board_id), so its next read rebuilds from SQL"""
+        if boards:
+            self.redis.delete(*(f'{self._key(board, board_id)}:built' for board, board_id in boards))
+
+    def _ensure(self, board, board_id):
+        key = self._key(board, board_id)
+        if not self.redis.exists(f'{key}:built'):
+            self.rebuild(board, board_id)
+        return key
+
+    def _key(self, board, board_id):
+        return f'{self.prefix}{board}:{board_id}'
+
+
+def board_scores(board: str, board_id: int) -> list:
+    """[(child_id, score)] for one board, computed from ChallengeProgress"""
+    completed = ChallengeProgress.status == 'completed'
+    if board == 'challenge':
+        rows = db.session.query(ChallengeProgress.child_id, ChallengeProgress.completed_on).filter(
+            ChallengeProgress.challenge_id == board_id, completed
+        ).all()
+        # Completions from before completed_on existed rank first, by child id
+        return [(child_id, completed_on.timestamp() if completed_on else 0.0) for child_id, completed_on in rows]
+
+    query = db.session.query(
+        ChallengeProgress.child_id, func.count(func.distinct(ChallengeProgress.challenge_id))
+    ).join(Child, Child.id == ChallengeProgress.child_id).filter(completed)
+    if board == 'class':
+        query = query.filter(Child.class_id == board_id)
+    else:
+        query = query.join(Class, Class.id == Child.class_id).filter(Class.school_id == board_id)
+    return [(child_id, float(count)) for child_id, count in query.group_by(ChallengeProgress.child_id)]
+
+def create_leaderboards(app):
+    return Leaderboards(
+        app.config.get('LEADERBOARD_REDIS_URL', 'redis://localhost:6379/3'),
+        rebuild_after=app.config.get('LEADERBOARD_REBUILD_AFTER', 86400)
+    )
+
+def record_challenge_completion(child, challenge_id, completed_on):
+    """Update rankings after a completion commits; failures are logged, never raised"""
+    try:
+        school_id = db.session.query(Class.school_id).filter(
+            Class.id == child.class_id
+        ).scalar() if child.class_id else None
+        completed = db.session.query(func.count(func.distinct(ChallengeProgress.challenge_id))).filter(
+            ChallengeProgress.child_id == child.id,
+            ChallengeProgress.status == 'completed'
+        ).scalar()
+        current_app.leaderboards.record_completion(
+            child.id, challenge_id, child.class_id, school_id, completed_on, float(completed)
+        )
+    except Exception as e:
+        current_app.logger.warning(f"Failed to update leaderboards for challenge {challenge_id}: {str(e)}")
+
+def invalidate_boards(boards):
+    """Have boards rebuild after rows behind them were removed; failures are logged, never raised"""
+    try:
+        current_app.leaderboards.invalidate(*boards)
+    except Exception as e:
+        current_app.logger.warning(f"Failed to invalidate leaderboards: {str(e)}")
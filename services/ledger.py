@@ -0,0 +1,58 @@
+"""
+Transaction ledger for Kids Pocket Money Tracker
+Merges Spending, PocketMoney and PocketMoneyLog into one date-ordered stream
+"""
+
+import csv
+import io
+from sqlalchemy import select, literal, union_all
+from models import db, Spending, PocketMoney, PocketMoneyLog
+
+LEDGER_HEADER = ['Date', 'Type', 'Amount', 'Category/Source', 'Details', 'Reference']
+
+def ledger_query(child_id, start_date=None, end_date=None):
+    """
+    One UNION ALL over the three history tables, ordered in the database
+
+    Spendings are negative so the Amount column sums to the net change.
+    """
+    parts = []
+    for date_col, kind, amount, category, details, ref, owner in (
+        (Spending.spend_date, 'spending', -Spending.amount, Spending.category,
+         Spending.description, Spending.id, Spending.child_id),
+        (PocketMoney.date_given, 'allowance', PocketMoney.amount, PocketMoney.recurring_schedule,
+         PocketMoney.stored_in, PocketMoney.id, PocketMoney.child_id),
+        (PocketMoneyLog.date, 'money_log', PocketMoneyLog.amount, PocketMoneyLog.source,
+         PocketMoneyLog.destination, PocketMoneyLog.id, PocketMoneyLog.child_id),
+    ):
+        part = select(
+            date_col.label('date'), literal(kind).label('type'), amount.label('amount'),
+            category.label('category'), details.label('details'), ref.label('ref_id')
+        ).where(owner == child_id)
+        if start_date:
+            part = part.where(date_col >= start_date)
+        if end_date:
+            part = part.where(date_col <= end_date)
+        parts.append(part)
+
+    ledger = union_all(*parts).subquery()
+    return select(ledger).order_by(ledger.c.date, ledger.c.type, ledger.c.ref_id)
+
+def ledger_rows(child_id, start_date=None, end_date=None, batch_size=1000):
+    """Stream ledger rows through a server-side cursor, batch_size at a time"""
+    query = ledger_query(child_id, start_date, end_date).execution_options(yield_per=batch_size)
+    for row in db.session.execute(query):
+        yield [str(row.date), row.type, str(row.amount), row.category or '', row.details or '', row.ref_id]
+
+def iter_csv(rows, chunk_rows=500):
+    """Encode rows as CSV text chunks; memory stays at one chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LEDGER_HEADER)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
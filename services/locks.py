@@ -0,0 +1,122 @@
+"""
+Distributed task locks for Kids Pocket Money Tracker
+Only one instance of each periodic task may run at a time, across all workers
+
+Locks are plain Redis keys (SET NX PX with a random token). Renew and release
+are compare-and-set under WATCH, so any client with WATCH/MULTI works,
+including fakeredis in tests.
+"""
+
+import hashlib
+import threading
+import uuid
+from functools import wraps
+from flask import current_app
+import redis
+
+
+class LeaseLock:
+    """
+    A lock that expires after `lease` seconds unless renewed
+
+    While held, a daemon thread extends the lease every `lease / 3` seconds.
+    A holder that dies stops renewing, so the lock frees itself and a crashed
+    worker can't block the task forever.
+    """
+
+    def __init__(self, client, name: str, lease: float = 60, prefix: str = 'lock:'):
+        self.client = client
+        self.key = f'{prefix}{name}'
+        self.lease_ms = int(lease * 1000)
+        self.token = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._renewer = None
+
+    def acquire(self) -> bool:
+        token = uuid.uuid4().hex
+        if not self.client.set(self.key, token, nx=True, px=self.lease_ms):
+            return False
+        self.token = token
+        self.lost = False
+        self._stop.clear()
+        self._renewer = threading.Thread(target=self._renew_loop, name=f'renew-{self.key}', daemon=True)
+        self._renewer.start()
+        return True
+
+    def release(self):
+        if self.token is None:
+            return
+        self._stop.set()
+        if self._renewer:
+            self._renewer.join()
+        self._compare_and(lambda pipe: pipe.delete(self.key))
+        self.token = None
+
+    def renew(self) -> bool:
+        """Extend the lease; False means another holder has the lock now"""
+        return self._compare_and(lambda pipe: pipe.pexpire(self.key, self.lease_ms))
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.lease_ms / 3000):
+            try:
+                if not self.renew():
+                    self.lost = True
+                    return
+            except redis.RedisError:
+                # Keep trying; the lease still has up to two thirds left
+                continue
+
+    def _compare_and(self, action) -> bool:
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.key)
+                    current = pipe.get(self.key)
+                    if current is None or _text(current) != self.token:
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    action(pipe)
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+def single_instance(lease: float = 60):
+    """
+    Skip a task run while another instance holds its lock
+
+    Stack under @shared_task. The lock name is the task function's name, plus
+    a digest of the arguments when there are any, so batches of one task run
+    side by side while a redelivered batch is still skipped. The client is
+    current_app.redis.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            name = f'task:{f.__name__}'
+            if args or kwargs:
+                name += ':' + hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()[:16]
+            lock = LeaseLock(current_app.redis, name, lease)
+            if not lock.acquire():
+                current_app.logger.info(f"{f.__name__} is already running; skipped")
+                return None
+            try:
+                return f(*args, **kwargs)
+            finally:
+                if lock.lost:
+                    current_app.logger.warning(f"{f.__name__} lost its lock before finishing")
+                lock.release()
+        return wrapper
+    return decorator
@@ -0,0 +1,251 @@
+"""
+Metrics for Kids Pocket Money Tracker
+Latency histograms and counters for requests, tasks, email and the cache,
+exposed in Prometheus text format on /metrics
+
+Each process buffers increments in memory and adds them into one Redis hash
+every METRICS_FLUSH_INTERVAL seconds. gunicorn workers and Celery prefork
+children therefore sum into the same series, and any process can render the
+totals. Recording never raises; a failed flush is retried on the next one.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import g, request
+from flask_caching.backends.rediscache import RedisCache
+from celery import signals
+import redis
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, registry, name: str, documentation: str, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, amount=1, **labels):
+        if amount:
+            self.registry.add({self._series(self.name, labels): amount})
+
+    def _series(self, name, labels, *extra):
+        return json.dumps([name, [(key, str(labels.get(key, ''))) for key in self.labelnames] + list(extra)])
+
+
+class Histogram(Counter):
+    type = 'histogram'
+
+    def __init__(self, registry, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        # Buckets are stored cumulative, as the exposition format expects
+        updates = {
+            self._series(f'{self.name}_bucket', labels, ('le', repr(bound))): 1
+            for bound in self.buckets if value <= bound
+        }
+        updates[self._series(f'{self.name}_bucket', labels, ('le', '+Inf'))] = 1
+        updates[self._series(f'{self.name}_sum', labels)] = value
+        updates[self._series(f'{self.name}_count', labels)] = 1
+        self.registry.add(updates)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class Metrics:
+    """Process-local buffer of metric increments, flushed into shared Redis"""
+
+    def __init__(self):
+        self.families = {}
+        self.redis = None
+        self.key = 'metrics'
+        self.flush_interval = 5
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # A forked worker must not flush increments its parent will flush too
+        os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.flush)
+
+    def init_app(self, app):
+        self.redis = redis.Redis.from_url(
+            app.config.get('METRICS_REDIS_URL', 'redis://localhost:6379/4'), decode_responses=True
+        )
+        self.key = app.config.get('METRICS_KEY', 'metrics')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+        app.before_request(_start_request_timer)
+        app.after_request(_observe_request)
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def add(self, updates: dict):
+        with self._lock:
+            for series, amount in updates.items():
+                self._pending[series] += amount
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.redis is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for series, amount in pending.items():
+                pipe.hincrbyfloat(self.key, series, amount)
+            pipe.execute()
+        except redis.RedisError:
+            self.add(pending)
+
+    def render(self) -> str:
+        """All processes' totals in Prometheus text exposition format"""
+        self.flush()
+        by_family = defaultdict(list)
+        for field, value in self.redis.hgetall(self.key).items():
+            name, labels = json.loads(field)
+            family = self._family_of(name)
+            if family:
+                by_family[family].append((name, labels, float(value)))
+
+        lines = []
+        for family in sorted(by_family):
+            metric = self.families[family]
+            lines.append(f'# HELP {family} {metric.documentation}')
+            lines.append(f'# TYPE {family} {metric.type}')
+            for name, labels, value in sorted(by_family[family], key=_sort_key):
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f'{name}{{{label_text}}} {_format_value(value)}' if labels else f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        self.families[metric.name] = metric
+        return metric
+
+    def _family_of(self, name):
+        if name in self.families:
+            return name
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix) and name[:-len(suffix)] in self.families:
+                return name[:-len(suffix)]
+        return None
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(float)
+        self._last_flush = time.monotonic()
+
+
+def _sort_key(sample):
+    name, labels, _ = sample
+    plain = [(key, val) for key, val in labels if key != 'le']
+    bound = next((val for key, val in labels if key == 'le'), None)
+    return name, plain, float('inf') if bound in (None, '+Inf') else float(bound)
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+metrics = Metrics()
+
+REQUEST_LATENCY = metrics.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint', ('endpoint', 'method', 'status')
+)
+TASK_LATENCY = metrics.histogram(
+    'celery_task_duration_seconds', 'Celery task run time', ('task', 'state'),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+)
+TASK_ITEMS = metrics.counter(
+    'task_items_total', 'Items handled by periodic tasks', ('task', 'outcome')
+)
+EMAIL_LATENCY = metrics.histogram(
+    'email_send_duration_seconds', 'SMTP send time', ('outcome',)
+)
+CACHE_REQUESTS = metrics.counter(
+    'cache_requests_total', 'Flask-Caching lookups', ('result',)
+)
+
+
+def record_task_items(task: str, successful: int, failed: int):
+    """Count what a periodic task has so far only logged"""
+    TASK_ITEMS.inc(successful, task=task, outcome='successful')
+    TASK_ITEMS.inc(failed, task=task, outcome='failed')
+
+
+# --------------------------Request timing-----------------------------
+
+def _start_request_timer():
+    g._metrics_start = time.perf_counter()
+
+def _observe_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is not None:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            endpoint=request.endpoint or 'unmatched', method=request.method, status=response.status_code
+        )
+    return response
+
+
+# --------------------------Task timing-----------------------------
+
+_task_starts = {}
+
+@signals.task_prerun.connect(weak=False)
+def _start_task_timer(task_id=None, **kwargs):
+    _task_starts[task_id] = time.perf_counter()
+
+@signals.task_postrun.connect(weak=False)
+def _observe_task(task_id=None, task=None, state=None, **kwargs):
+    start = _task_starts.pop(task_id, None)
+    if start is not None and task is not None:
+        TASK_LATENCY.observe(time.perf_counter() - start, task=task.name, state=state or 'UNKNOWN')
+
+@signals.worker_process_shutdown.connect(weak=False)
+def _flush_on_shutdown(**kwargs):
+    metrics.flush()
+
+
+# --------------------------Cache hit/miss-----------------------------
+
+class InstrumentedRedisCache(RedisCache):
+    """RedisCache that counts hits and misses; set CACHE_TYPE to this class's path"""
+
+    def get(self, key):
+        value = super().get(key)
+        CACHE_REQUESTS.inc(result='hit' if value is not None else 'miss')
+        return value
+
+    def get_many(self, *keys):
+        values = super().get_many(*keys)
+        hits = sum(value is not None for value in values)
+        CACHE_REQUESTS.inc(hits, result='hit')
+        CACHE_REQUESTS.inc(len(values) - hits, result='miss')
+        return values
@@ -0,0 +1,94 @@
+"""
+Notification delivery for Kids Pocket Money Tracker
+Sends each notification as its own email, or queues it for a digest
+
+Users in 'daily' or 'weekly' notification mode get one combined email per
+window at their reminder hour (see services/reminders.py). Queued
+notifications store the arguments of their email_templates fragment, and
+the digest is rendered from those fragments when it is sent. Reminder-type
+kinds collapse to the latest one, since an older reminder is stale.
+"""
+
+import itertools
+import json
+from collections import namedtuple
+from models import db, User, PendingNotification
+from backend_celery.mail_service import send_notification_email
+from backend_celery.email_templates import (
+    get_daily_reminder_template, get_daily_reminder_fragment,
+    get_weekly_reminder_template, get_weekly_reminder_fragment,
+    get_allowance_notification_template, get_allowance_notification_fragment,
+    get_goal_achievement_template, get_goal_achievement_fragment,
+    get_low_balance_warning_template, get_low_balance_warning_fragment,
+    get_spending_milestone_template, get_spending_milestone_fragment,
+    get_digest_template
+)
+
+NOTIFICATION_MODES = ('instant', 'daily', 'weekly')
+
+# kind: (full email template, digest fragment)
+TEMPLATES = {
+    'daily_reminder': (get_daily_reminder_template, get_daily_reminder_fragment),
+    'weekly_reminder': (get_weekly_reminder_template, get_weekly_reminder_fragment),
+    'allowance': (get_allowance_notification_template, get_allowance_notification_fragment),
+    'goal_achieved': (get_goal_achievement_template, get_goal_achievement_fragment),
+    'low_balance': (get_low_balance_warning_template, get_low_balance_warning_fragment),
+    'spending_milestone': (get_spending_milestone_template, get_spending_milestone_fragment),
+    'unusual_spending': (get_spending_milestone_template, get_spending_milestone_fragment),
+}
+
+# Only the newest of these is worth reading in a digest
+COLLAPSED_KINDS = {'daily_reminder', 'weekly_reminder', 'low_balance'}
+
+# Anything with id, name, email and notification_mode will do, User rows included
+Recipient = namedtuple('Recipient', 'id name email notification_mode')
+
+
+def deliver(recipient, kind, subject, **params) -> bool:
+    """
+    Email one notification now, or stage it for the recipient's digest
+
+    Queued rows are added to the session; the caller commits. `params` are
+    the kind's template arguments and must be JSON-serialisable.
+
+    Returns:
+        bool: True when sent or queued
+    """
+    full, _ = TEMPLATES[kind]
+    if (recipient.notification_mode or 'instant') == 'instant':
+        return send_notification_email(recipient.email, subject, full(**params))
+    db.session.add(PendingNotification(
+        user_id=recipient.id, kind=kind, subject=subject, payload=json.dumps(params)
+    ))
+    return True
+
+def pending_digests(user_ids=None):
+    """Yield (user, [PendingNotification]) for users with queued notifications, oldest first"""
+    query = PendingNotification.query
+    if user_ids:
+        query = query.filter(PendingNotification.user_id.in_(user_ids))
+    rows = query.order_by(PendingNotification.user_id, PendingNotification.id).all()
+    users = {user.id: user for user in User.query.filter(User.id.in_({row.user_id for row in rows}))} if rows else {}
+    for user_id, group in itertools.groupby(rows, key=lambda row: row.user_id):
+        if user_id in users:
+            yield users[user_id], list(group)
+
+def render_digest(user, rows) -> str:
+    """One email body from queued rows; collapsed kinds keep only their newest row"""
+    newest = {row.kind: row for row in rows if row.kind in COLLAPSED_KINDS}
+    sections = []
+    for row in rows:
+        if row.kind in COLLAPSED_KINDS and newest[row.kind] is not row:
+            continue
+        _, fragment = TEMPLATES[row.kind]
+        sections.append((row.subject, fragment(**json.loads(row.payload))))
+    period = user.notification_mode if user.notification_mode in ('daily', 'weekly') else 'daily'
+    return get_digest_template(user.name, sections, period)
+
+def discard(row_ids):
+    """Delete sent rows in the caller's transaction, in IN-list sized slices"""
+    row_ids = list(row_ids)
+    for start in range(0, len(row_ids), 500):
+        PendingNotification.query.filter(
+            PendingNotification.id.in_(row_ids[start:start + 500])
+        ).delete(synchronize_session=False)
@@ -0,0 +1,58 @@
+"""
+Rate limiting for Kids Pocket Money Tracker
+Fixed-window counters in Redis, shared by every web worker
+"""
+
+import time
+from functools import wraps
+from flask import request, current_app
+from flask_security import current_user
+
+
+class RateLimited(Exception):
+    """Raised when a caller is over its limit; routes.py turns it into a 429"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f'Rate limit exceeded, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    At most `limit` hits per `per` seconds for each key
+
+    One INCR+EXPIRE round trip per check. `clock` is injectable so tests can
+    drive windows with a fake Redis and a fake time source.
+    """
+
+    def __init__(self, client, prefix: str = 'ratelimit:', clock=time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    def hit(self, key: str, limit: int, per: int) -> int:
+        """Count one hit; returns 0 when allowed, else seconds until the window resets"""
+        now = self.clock()
+        window = int(now // per)
+        counter = f'{self.prefix}{key}:{window}'
+        pipe = self.client.pipeline()
+        pipe.incr(counter)
+        pipe.expire(counter, per + 1)
+        count, _ = pipe.execute()
+        if count <= limit:
+            return 0
+        return max(1, int((window + 1) * per - now + 0.999))
+
+
+def rate_limit(limit: int, per: int):
+    """Limit a view per endpoint and caller (user id when signed in, else address)"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            caller = current_user.id if current_user.is_authenticated else request.remote_addr
+            retry_after = RateLimiter(current_app.redis).hit(f'{request.endpoint}:{caller}', limit, per)
+            if retry_after:
+                raise RateLimited(retry_after)
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+"""
+Reminder scheduling for Kids Pocket Money Tracker
+Each user has a timezone and a local reminder hour. An hourly task picks the
+users whose local clock has reached that hour and queues their reminders in
+small batches spread over the hour, so SMTP and the DB never see the whole
+user base at once. Notification digests go out in the same slot.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+import pytz
+from sqlalchemy import and_, or_, select
+from models import db, User, Role, Child, PendingNotification
+from services.child_data import week_spending_totals, active_goals_by_child
+from services.notifications import Recipient, NOTIFICATION_MODES
+
+DEFAULT_TIMEZONE = 'Asia/Kolkata'
+DEFAULT_REMINDER_HOUR = 18
+
+# kind: (recipient role, local weekday or None for every day); Monday is 0
+REMINDER_KINDS = {
+    'daily_spending': ('child', None),
+    'weekly_spending': ('child', 6),
+    'parent_summary': ('parent', 6),
+}
+
+# notification modes whose digest goes out: local weekday or None for every day.
+# 'instant' users only have queued rows if they just left a digest mode.
+DIGEST_DAYS = {
+    ('daily', 'instant'): None,
+    ('weekly',): 6,
+}
+
+
+def parse_preferences(data) -> dict:
+    """Validated timezone / reminder_hour from a request body; raises ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    preferences = {}
+    if 'timezone' in data:
+        if data['timezone'] not in pytz.all_timezones_set:
+            raise ValueError('Unknown timezone')
+        preferences['timezone'] = data['timezone']
+    if 'notification_mode' in data:
+        if data['notification_mode'] not in NOTIFICATION_MODES:
+            raise ValueError('notification_mode must be instant, daily or weekly')
+        preferences['notification_mode'] = data['notification_mode']
+    if 'reminder_hour' in data:
+        hour = data['reminder_hour']
+        if isinstance(hour, bool) or not isinstance(hour, int) or not 0 <= hour <= 23:
+            raise ValueError('reminder_hour must be an integer from 0 to 23')
+        preferences['reminder_hour'] = hour
+    if not preferences:
+        raise ValueError('Provide timezone, reminder_hour and/or notification_mode')
+    return preferences
+
+def due_slots(now, weekday=None) -> dict:
+    """
+    {timezone: (local hour, local date)} for every timezone in use whose
+    local time is `now` (aware) and, when given, whose local weekday matches
+    """
+    slots = {}
+    for (name,) in db.session.query(User.timezone).distinct():
+        local = now.astimezone(pytz.timezone(name or DEFAULT_TIMEZONE))
+        if weekday is None or local.weekday() == weekday:
+            slots[name] = (local.hour, local.date())
+    return slots
+
+def due_recipients(role, now, weekday=None) -> list:
+    """
+    Active users with `role` whose reminder hour is now where they live
+
+    One query over the (timezone, reminder_hour) index. Returns
+    (local date, [user ids]) per timezone, so each batch carries its
+    recipients' own calendar day.
+    """
+    slots = due_slots(now, weekday)
+    if not slots:
+        return []
+    rows = db.session.query(User.timezone, User.id).filter(
+        _in_slots(slots),
+        User.active == True,
+        User.roles.any(Role.name == role)
+    ).order_by(User.timezone, User.id).all()
+
+    by_zone = defaultdict(list)
+    for name, user_id in rows:
+        by_zone[name].append(user_id)
+    return [(slots[name][1], user_ids) for name, user_ids in by_zone.items()]
+
+def due_digest_recipients(now) -> list:
+    """Ids of users with queued notifications whose digest is due this hour"""
+    user_ids = []
+    for modes, weekday in DIGEST_DAYS.items():
+        slots = due_slots(now, weekday)
+        if not slots:
+            continue
+        user_ids += [user_id for (user_id,) in db.session.query(User.id).filter(
+            _in_slots(slots),
+            User.notification_mode.in_(modes),
+            User.active == True,
+            db.session.query(PendingNotification.id).filter(PendingNotification.user_id == User.id).exists()
+        ).order_by(User.id)]
+    return user_ids
+
+def _in_slots(slots):
+    return or_(*(and_(User.timezone == name, User.reminder_hour == hour) for name, (hour, _) in slots.items()))
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+# --------------------------Weekly reminder data-----------------------------
+
+def weekly_reminder_chunks(today, user_ids=None, chunk_size=500):
+    """
+    Yield lists of (recipient, week_stats, goals) for active children with
+    an email address, chunk_size children at a time
+
+    Children are paged by id (keyset, so no read cursor stays open while
+    the caller sends mail). Each chunk costs two grouped queries (week
+    totals, active goals), however many children it holds.
+    """
+    week_ago = today - timedelta(days=7)
+    query = select(
+        Child.id, Child.total_balance, User.id.label('user_id'), User.name, User.email, User.notification_mode
+    ).join(
+        User, Child.user_id == User.id
+    ).where(
+        User.active == True,
+        User.email.isnot(None),
+        User.email != ''
+    )
+    if user_ids:
+        query = query.where(User.id.in_(user_ids))
+    query = query.order_by(Child.id).limit(chunk_size)
+
+    last_id = 0
+    while True:
+        rows = db.session.execute(query.where(Child.id > last_id)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        child_ids = [row.id for row in rows]
+        totals = week_spending_totals(child_ids, week_ago, today)
+        goals = active_goals_by_child(child_ids)
+        chunk = []
+        for row in rows:
+            entries, total = totals.get(row.id, (0, 0))
+            week_stats = {
+                'entries_count': entries,
+                'total_spent': float(total),
+                'current_balance': float(row.total_balance or 0),
+                'avg_per_entry': float(total) / entries if entries else 0
+            }
+            goals_data = [
+                {'title': title, 'progress': progress, 'remaining': float(remaining)}
+                for title, progress, remaining in goals.get(row.id, [])
+            ]
+            recipient = Recipient(row.user_id, row.name, row.email, row.notification_mode)
+            chunk.append((recipient, week_stats, goals_data))
+        yield chunk
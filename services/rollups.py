@@ -0,0 +1,131 @@
+"""
+Spending rollups for Kids Pocket Money Tracker
+One row per child, day and category with the total and entry count, kept in
+step with every spending write
+
+Each write path calls roll_spending() in its own transaction, with negative
+values for a removal, so reports and detection jobs read days instead of
+individual spendings. The upsert is one atomic statement, so concurrent
+writers never lose each other's increments. rebuild_rollups() recomputes
+rows from spendings, for existing databases or after bulk loads.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import func, delete, insert, literal, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, Spending, SpendingRollup, PocketMoney
+
+# bucket: SQLite expression for the first day of the bucket holding `column`
+BUCKETS = {
+    'day': lambda column: func.date(column),
+    'week': lambda column: func.date(column, 'weekday 0', '-6 days'),  # Monday
+    'month': lambda column: func.strftime('%Y-%m-01', column),
+}
+
+
+def roll_spending(child_id, day, category, amount, entries=1):
+    """Add one change to its day's rollup row; pass negative amount and entries to remove"""
+    roll_many([(child_id, day, category, amount, entries)])
+
+def roll_many(changes):
+    """Apply (child_id, day, category, amount, entries) changes, merged per row, in one executemany"""
+    merged = defaultdict(lambda: [Decimal('0'), 0])
+    for child_id, day, category, amount, entries in changes:
+        row = merged[(child_id, day, category)]
+        row[0] += Decimal(str(amount))
+        row[1] += entries
+    if not merged:
+        return
+    stmt = sqlite_insert(SpendingRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['child_id', 'day', 'category'],
+        set_={
+            'total': SpendingRollup.total + stmt.excluded.total,
+            'entries': SpendingRollup.entries + stmt.excluded.entries
+        }
+    )
+    db.session.execute(stmt, [
+        {'child_id': child_id, 'day': day, 'category': category, 'total': total, 'entries': entries}
+        for (child_id, day, category), (total, entries) in merged.items()
+    ])
+
+def rebuild_rollups(child_ids=None):
+    """Recompute rollup rows from spendings (all children when none are given); the caller commits"""
+    clear = delete(SpendingRollup)
+    source = db.session.query(
+        Spending.child_id, Spending.spend_date, Spending.category,
+        func.sum(Spending.amount), func.count(Spending.id)
+    )
+    if child_ids:
+        clear = clear.where(SpendingRollup.child_id.in_(child_ids))
+        source = source.filter(Spending.child_id.in_(child_ids))
+    db.session.execute(clear)
+    db.session.execute(
+        insert(SpendingRollup).from_select(
+            ['child_id', 'day', 'category', 'total', 'entries'],
+            source.group_by(Spending.child_id, Spending.spend_date, Spending.category).statement
+        )
+    )
+
+# --------------------------Reports-----------------------------
+
+def spending_trends(child_ids, bucket, start=None, end=None, categories=None, by_category=False, rolled_up=True):
+    """
+    Spending per bucket and child (and category when by_category) in one
+    grouped query, oldest bucket first
+
+    Reads spending_rollups by default; rolled_up=False aggregates the
+    spendings table itself, e.g. before rebuild_rollups() has been run.
+    """
+    if rolled_up:
+        child, day, category = SpendingRollup.child_id, SpendingRollup.day, SpendingRollup.category
+        total, entries = func.sum(SpendingRollup.total), func.sum(SpendingRollup.entries)
+    else:
+        child, day, category = Spending.child_id, Spending.spend_date, Spending.category
+        total, entries = func.sum(Spending.amount), func.count(Spending.id)
+
+    period = BUCKETS[bucket](day).label('period')
+    groups = [period, child] + ([category] if by_category else [])
+    query = db.session.query(*groups, total.label('total'), entries.label('entries')).filter(child.in_(child_ids))
+    if rolled_up:
+        query = query.filter(SpendingRollup.entries > 0)
+    if start:
+        query = query.filter(day >= start)
+    if end:
+        query = query.filter(day <= end)
+    if categories:
+        query = query.filter(category.in_(categories))
+    return query.group_by(*groups).order_by(*groups).all()
+
+def transactions(child_ids, start=None, end=None, categories=None, limit=100, offset=0):
+    """
+    Spendings (negative) and allowances across children, newest first, in
+    one UNION ALL
+
+    Allowances have no category, so a category filter leaves only spendings.
+    """
+    parts = [(Spending.spend_date, 'spending', -Spending.amount, Spending.category,
+              Spending.description, Spending.id, Spending.child_id)]
+    if not categories:
+        parts.append((PocketMoney.date_given, 'allowance', PocketMoney.amount, PocketMoney.recurring_schedule,
+                      PocketMoney.stored_in, PocketMoney.id, PocketMoney.child_id))
+
+    selects = []
+    for date_col, kind, amount, category, details, ref, owner in parts:
+        part = select(
+            date_col.label('date'), literal(kind).label('type'), owner.label('child_id'),
+            amount.label('amount'), category.label('category'), details.label('details'), ref.label('id')
+        ).where(owner.in_(child_ids))
+        if start:
+            part = part.where(date_col >= start)
+        if end:
+            part = part.where(date_col <= end)
+        if categories:
+            part = part.where(category.in_(categories))
+        selects.append(part)
+
+    merged = union_all(*selects).subquery() if len(selects) > 1 else selects[0].subquery()
+    return db.session.execute(
+        select(merged).order_by(merged.c.date.desc(), merged.c.type, merged.c.id.desc()).limit(limit).offset(offset)
+    ).all()
@@ -0,0 +1,145 @@
+"""
+Spending alerts for Kids Pocket Money Tracker
+Low balance warnings, unusual spending in a category and lifetime spending
+milestones, found for every child at once from spending_rollups
+
+A nightly task looks at one day. Two grouped queries cover all children:
+per-child totals (lifetime and that day, with balance and recipient) and
+per-category daily statistics over a trailing window. Only children who
+spent on the day can trigger anything, so both keep just those rows.
+
+Low balance fires when the day's spending took the balance below the
+threshold, so a child sitting at zero is warned once, not every night. The
+balance is the day's closing one: the current balance with anything dated
+after the day (spent or given since midnight) taken back out.
+"""
+
+import math
+from datetime import timedelta
+from collections import namedtuple
+from sqlalchemy import func, case, and_
+from models import db, User, Child, PocketMoney, SpendingRollup
+from services.notifications import Recipient
+
+# One notification for services.notifications.deliver()
+Alert = namedtuple('Alert', 'recipient kind subject params')
+
+
+def detect_alerts(day, low_balance=50, milestones=(), window_days=28, z_score=3.0,
+                  min_amount=0, min_active_days=3) -> list:
+    """
+    Alerts for spending dated `day`
+
+    Unusual spending compares the day's total in a category with the
+    child's daily totals there over the `window_days` before it (days
+    without spending count as zero). It needs at least `min_active_days`
+    of history and `min_amount` spent, so a first purchase or a small
+    blip in a quiet category is not flagged.
+    """
+    children = {row.id: row for row in _child_totals(day)}
+    alerts = []
+
+    for child in children.values():
+        recipient = Recipient(child.user_id, child.name, child.email, child.notification_mode)
+        balance = float(child.closing_balance or 0)
+        spent = float(child.day_total)
+        if balance < low_balance <= balance + spent:
+            alerts.append(Alert(recipient, 'low_balance', "⚠️ Low Balance Alert", {
+                'child_name': child.name,
+                'current_balance': balance,
+                'threshold': float(low_balance)
+            }))
+
+        lifetime = float(child.lifetime)
+        crossed = [milestone for milestone in milestones if lifetime - spent < milestone <= lifetime]
+        if crossed:
+            alerts.append(Alert(recipient, 'spending_milestone', f"📊 Spending Milestone: ₹{max(crossed):,}", {
+                'child_name': child.name,
+                'milestone_type': f"You've passed ₹{max(crossed):,} of tracked spending",
+                'amount': lifetime,
+                'timeframe': 'since you started tracking'
+            }))
+
+    for row in _category_stats(day, window_days):
+        child = children.get(row.child_id)
+        spent = float(row.day_total)
+        if child is None or row.active_days < min_active_days or spent < min_amount:
+            continue
+        mean = float(row.history) / window_days
+        deviation = math.sqrt(max(float(row.squares) / window_days - mean * mean, 0))
+        if deviation == 0 or (spent - mean) / deviation < z_score:
+            continue
+        alerts.append(Alert(
+            Recipient(child.user_id, child.name, child.email, child.notification_mode),
+            'unusual_spending',
+            f"📊 Unusual Spending: {row.category}",
+            {
+                'child_name': child.name,
+                'milestone_type': f"That's more than usual - you normally spend about ₹{mean:.2f} a day on {row.category}",
+                'amount': spent,
+                'timeframe': f"on {row.category} on {day.strftime('%d %b')}"
+            }
+        ))
+
+    return alerts
+
+def _child_totals(day):
+    """Active children with an email who spent on `day`: closing balance, recipient, lifetime and day totals"""
+    day_total = func.sum(case((SpendingRollup.day == day, SpendingRollup.total), else_=0))
+    spent = db.session.query(
+        SpendingRollup.child_id,
+        func.sum(SpendingRollup.total).label('lifetime'),
+        day_total.label('day_total')
+    ).filter(
+        SpendingRollup.day <= day
+    ).group_by(SpendingRollup.child_id).having(day_total > 0).subquery()
+
+    # Spent and given after `day`, to undo from the current balance
+    spent_since = db.session.query(
+        SpendingRollup.child_id, func.sum(SpendingRollup.total).label('amount')
+    ).filter(SpendingRollup.day > day).group_by(SpendingRollup.child_id).subquery()
+    given_since = db.session.query(
+        PocketMoney.child_id, func.sum(PocketMoney.amount).label('amount')
+    ).filter(PocketMoney.date_given > day).group_by(PocketMoney.child_id).subquery()
+    closing = (
+        func.coalesce(Child.total_balance, 0) + func.coalesce(spent_since.c.amount, 0)
+        - func.coalesce(given_since.c.amount, 0)
+    )
+
+    return db.session.query(
+        Child.id, closing.label('closing_balance'), User.id.label('user_id'), User.name, User.email,
+        User.notification_mode, spent.c.lifetime, spent.c.day_total
+    ).join(
+        spent, spent.c.child_id == Child.id
+    ).outerjoin(
+        spent_since, spent_since.c.child_id == Child.id
+    ).outerjoin(
+        given_since, given_since.c.child_id == Child.id
+    ).join(
+        User, Child.user_id == User.id
+    ).filter(
+        User.active == True,
+        User.email.isnot(None),
+        User.email != ''
+    ).all()
+
+def _category_stats(day, window_days):
+    """
+    Per child and category spent on `day`: the day's total plus the trailing
+    window's sum, sum of squares and days with spending
+    """
+    before = SpendingRollup.day < day
+    day_total = func.sum(case((SpendingRollup.day == day, SpendingRollup.total), else_=0))
+    return db.session.query(
+        SpendingRollup.child_id,
+        SpendingRollup.category,
+        day_total.label('day_total'),
+        func.sum(case((before, SpendingRollup.total), else_=0)).label('history'),
+        func.sum(case((before, SpendingRollup.total * SpendingRollup.total), else_=0)).label('squares'),
+        func.count(case((and_(before, SpendingRollup.total > 0), 1))).label('active_days')
+    ).filter(
+        SpendingRollup.day >= day - timedelta(days=window_days),
+        SpendingRollup.day <= day
+    ).group_by(
+        SpendingRollup.child_id, SpendingRollup.category
+    ).having(day_total > 0).all()
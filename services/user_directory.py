@@ -0,0 +1,93 @@
+"""
+Admin user directory for Kids Pocket Money Tracker
+Sorted, filtered pages of users for the admin API, each query walking an
+index in models.py
+
+Pages are keyset-paged: the cursor carries the last row's sort value and id,
+so page 5,000 costs the same as page 1, unlike OFFSET. Name and email are
+sorted and prefix-searched on lower() expression indexes, and a prefix match
+is a range scan (`abc` <= x < `abd`), not LIKE, which SQLite cannot serve
+from an index case-insensitively. Role names are loaded for the whole page
+in one extra query.
+"""
+
+import base64
+import json
+from sqlalchemy import and_, or_, func, tuple_
+from sqlalchemy.orm import selectinload
+from models import db, User, Role, UserRoles
+
+# sort name: the expression it orders by (ties broken by id)
+SORTS = {
+    'id': User.id,
+    'name': func.lower(User.name),
+    'email': func.lower(User.email),
+}
+
+
+def user_page(role=None, prefix=None, sort='id', descending=False, limit=50, after=None) -> tuple:
+    """
+    (users with roles loaded, cursor for the next page or None)
+
+    `after` is a cursor from a previous call with the same arguments; raises
+    ValueError if it does not decode.
+    """
+    key = SORTS[sort]
+    # The cursor carries the sort value as SQLite computed it; its lower()
+    # folds only ASCII, so Python's str.lower() would not match it
+    query = _filtered(User.query, role, prefix).options(selectinload(User.roles)).add_columns(key)
+
+    if after:
+        value, last_id = decode_cursor(after)
+        position = tuple_(key, User.id)
+        query = query.filter(position < tuple_(value, last_id) if descending else position > tuple_(value, last_id))
+
+    order = [key.desc(), User.id.desc()] if descending else [key, User.id]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    users = [user for user, _ in rows[:limit]]
+    if len(rows) <= limit:
+        return users, None
+    last, value = rows[limit - 1]
+    return users, encode_cursor(value, last.id)
+
+def count_users(role=None, prefix=None, cap=None) -> tuple:
+    """
+    (count, capped): with a cap, counting stops at cap + 1 matches and
+    capped says the real number is higher
+    """
+    query = _filtered(db.session.query(User.id), role, prefix)
+    if cap is None:
+        return query.count(), False
+    count = db.session.query(func.count()).select_from(query.limit(cap + 1).subquery()).scalar()
+    return min(count, cap), count > cap
+
+def _filtered(query, role, prefix):
+    if role:
+        # Drives from ix_user_roles_role instead of checking every user
+        query = query.filter(User.id.in_(
+            db.session.query(UserRoles.user_id).join(Role, UserRoles.role_id == Role.id).filter(Role.name == role)
+        ))
+    if prefix:
+        query = query.filter(or_(
+            _prefix_range(func.lower(User.email), prefix),
+            _prefix_range(func.lower(User.name), prefix)
+        ))
+    return query
+
+def _prefix_range(expression, prefix):
+    low = prefix.lower()
+    high = low[:-1] + chr(ord(low[-1]) + 1)
+    return and_(expression >= low, expression < high)
+
+def encode_cursor(value, last_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, last_id]).encode()).decode()
+
+def decode_cursor(cursor) -> tuple:
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(last_id, int):
+        raise ValueError('Invalid cursor')
+    return value, last_id
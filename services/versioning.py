@@ -0,0 +1,97 @@
+"""
+Version stamps and conditional GET support for Kids Pocket Money Tracker
+Writes bump a stamp per affected user; polled GETs answer 304 from the stamp alone
+"""
+
+import time
+from collections import defaultdict
+from functools import wraps
+from hashlib import sha1
+from flask import request, current_app
+from flask_security import current_user
+from flask_restful.utils import unpack
+from werkzeug.wrappers import Response
+from models import db, Child, Parent, ParentChildLink
+
+
+class VersionStamps:
+    """
+    Last-write timestamps per scope, kept in the shared app cache
+
+    A missing stamp (cold cache or eviction) is recreated as "now", which
+    only costs clients one full response.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, scope: str) -> float:
+        stamp = self.cache.get(self._key(scope))
+        if stamp is None:
+            stamp = time.time()
+            self.cache.set(self._key(scope), stamp, timeout=0)
+        return stamp
+
+    def bump(self, *scopes: str):
+        now = time.time()
+        self.cache.set_many({self._key(scope): now for scope in scopes}, timeout=0)
+
+    def _key(self, scope):
+        return f'version:{scope}'
+
+
+def touch_users(*user_ids):
+    """Mark everything shown to these users as changed"""
+    if user_ids:
+        current_app.versions.bump(*(f'user:{user_id}' for user_id in set(user_ids)))
+
+def child_audiences(*child_ids) -> dict:
+    """Map each child id to the user ids that see its data: the child and linked parents"""
+    audiences = defaultdict(set)
+    if not child_ids:
+        return audiences
+    child_users = db.session.query(Child.id, Child.user_id).filter(Child.id.in_(child_ids))
+    parent_users = db.session.query(ParentChildLink.child_id, Parent.user_id).join(
+        Parent, ParentChildLink.parent_id == Parent.id
+    ).filter(ParentChildLink.child_id.in_(child_ids))
+    for child_id, user_id in child_users.union_all(parent_users):
+        audiences[child_id].add(user_id)
+    return audiences
+
+def touch_children(*child_ids) -> dict:
+    """
+    Mark children's data as changed for each child and every linked parent
+
+    Returns:
+        dict: child id -> audience user ids, for callers that also publish events
+    """
+    audiences = child_audiences(*child_ids)
+    touch_users(*set().union(*audiences.values()))
+    return audiences
+
+
+def conditional_get(f):
+    """
+    Add a strong ETag to a GET and answer 304 when the client's copy is
+    current, before the handler runs any queries
+
+    There is no Last-Modified: its one-second resolution cannot tell apart
+    two writes in the same second, so If-Modified-Since could 304 a stale copy.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        stamp = current_app.versions.get(f'user:{current_user.id}')
+        etag = sha1(f'{current_user.id}|{request.full_path}|{stamp!r}'.encode()).hexdigest()
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': 'private, no-cache'
+        }
+
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+        data, code, extra = unpack(f(*args, **kwargs))
+        if code != 200:
+            return data, code, extra
+        return data, code, {**headers, **extra}
+    return wrapper